@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DocxParser / DocxOutlineExtractor 性能基准脚本
+
+用法:
+  python from_server_docx_bench.py load
+  python from_server_docx_bench.py load --sizes 1000 5000 10000 50000
+  python from_server_docx_bench.py chapter
+  python from_server_docx_bench.py boundary --sizes 2000 10000
+  python from_server_docx_bench.py table --rows 2000
+  python from_server_docx_bench.py sidecar --sizes 1000 10000
+  python from_server_docx_bench.py engines --sizes 1000 10000
+  python from_server_docx_bench.py classify --count 50000
+  python from_server_docx_bench.py suite --output results.json
+  python from_server_docx_bench.py suite --sizes 100 1000 100000 --toc --output results.json --compare baseline.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import platform
+import random
+import resource
+import tempfile
+import argparse
+import multiprocessing
+from typing import List, Dict, Optional
+
+from docx import Document
+
+from from_server_docx_para import DocxParser
+from from_server_docx_outline import DocxOutlineExtractor
+from from_server_docx_cache import get_docx_parse_cache
+from from_server_docx_corpus import NUMBERING_SYSTEMS, build_corpus_docx, corpus_name, corpus_specs, ensure_corpus
+
+
+def bench_load(sizes: List[int]):
+    """测试DocxParser加载时间随段落数的增长情况（应为线性）"""
+    print(f"{'段落数':>8} {'body元素':>8} {'_extract_paragraphs(s)':>22} {'每千段落(ms)':>12} {'DocxParser总耗时(s)':>18}")
+    print("=" * 76)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = build_corpus_docx(os.path.join(tmp_dir, f"bench_{size}.docx"), size)
+
+            start = time.perf_counter()
+            parser = DocxParser(path, use_cache=False)
+            total = time.perf_counter() - start
+
+            # 单独测量body遍历
+            doc = Document(path)
+            start = time.perf_counter()
+            DocxParser._extract_paragraphs(doc)
+            walk = time.perf_counter() - start
+
+            per_k = walk / (len(parser.paragraphs) / 1000) * 1000
+            print(f"{size:>8} {len(parser.paragraphs):>8} {walk:>22.3f} {per_k:>12.2f} {total:>18.3f}")
+
+
+def bench_chapter(sizes: List[int], repeat: int = 50):
+    """测试DocxParser.get_chapter单次调用耗时（建立章节索引后应与文档大小无关）"""
+    print(f"{'段落数':>8} {'章节数':>8} {'建索引(s)':>10} {'get_chapter平均(ms)':>20}")
+    print("=" * 52)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = build_corpus_docx(os.path.join(tmp_dir, f"bench_{size}.docx"), size)
+            parser = DocxParser(path, use_cache=False)
+
+            start = time.perf_counter()
+            parser._build_section_index()
+            index_time = time.perf_counter() - start
+
+            # 取同一批三级章节（内容大小相同），只比较定位开销
+            numbers = [ch['number'] for ch in parser.chapters if ch['number'].count('.') == 2][:repeat]
+            start = time.perf_counter()
+            for number in numbers:
+                parser.get_chapter(number)
+            per_call = (time.perf_counter() - start) / max(len(numbers), 1) * 1000
+
+            print(f"{size:>8} {len(parser.chapters):>8} {index_time:>10.3f} {per_call:>20.3f}")
+
+
+def legacy_find_next_sibling(parser: DocxParser, start_pos: int, current_chapter: Dict) -> int:
+    """
+    原 _find_next_sibling_chapter_in_doc 实现（逐段落 × 逐章节调用 _is_chapter_title_match），仅用于对比
+    """
+    current_number = current_chapter.get('number', '')
+    current_level = len(current_number.split('.')) if current_number else 0
+
+    for i in range(start_pos + 1, len(parser.paragraphs)):
+        para_info = parser.paragraphs[i]
+        if para_info.kind != 'paragraph':
+            continue
+
+        para_text = para_info.text.strip()
+        if not para_text:
+            continue
+
+        for chapter in parser.chapters:
+            ch_number = chapter.get('number', '')
+            ch_title = chapter.get('title', '')
+
+            if parser._is_chapter_title_match(para_text, ch_title, ch_number):
+                if ch_number:
+                    ch_level = len(ch_number.split('.'))
+                    if ch_level <= current_level:
+                        return i
+
+    return len(parser.paragraphs)
+
+
+def bench_boundary(sizes: List[int], sample: int = 5):
+    """对比章节结束位置查找：原逐段落×逐章节扫描 vs 标题位置表二分查找"""
+    print(f"{'段落数':>8} {'章节数':>8} {'原实现(ms/次)':>14} {'位置表(ms/次)':>14} {'加速比':>10} {'一致':>6}")
+    print("=" * 68)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = build_corpus_docx(os.path.join(tmp_dir, f"bench_{size}.docx"), size)
+            parser = DocxParser(path, use_cache=False)
+
+            # 取文档前部的一级章节：原实现需要扫描到下一个一级章节，位置表只需一次二分查找
+            sections = [s for s in parser._sections if s.start is not None and s.level == 1][:sample]
+
+            start = time.perf_counter()
+            legacy = [legacy_find_next_sibling(parser, s.start, s.chapter) for s in sections]
+            legacy_ms = (time.perf_counter() - start) / max(len(sections), 1) * 1000
+
+            repeat = 1000
+            start = time.perf_counter()
+            for _ in range(repeat):
+                current = [parser._find_next_sibling_chapter_in_doc(s.start, s.level) for s in sections]
+            new_ms = (time.perf_counter() - start) / max(len(sections), 1) / repeat * 1000
+
+            speedup = legacy_ms / new_ms if new_ms else float('inf')
+            print(f"{size:>8} {len(parser.chapters):>8} {legacy_ms:>14.2f} {new_ms:>14.4f} "
+                  f"{speedup:>9.0f}x {str(legacy == current):>6}")
+
+
+def build_table_docx(path: str, row_count: int, col_count: int = 6, merge_every: int = 10) -> str:
+    """
+    生成包含一张大表格的docx文档（每隔 merge_every 行做一次横向、纵向合并）
+
+    Args:
+        path: 输出路径
+        row_count: 表格行数
+        col_count: 表格列数
+        merge_every: 合并间隔（0表示不合并）
+
+    Returns:
+        文档路径
+    """
+    doc = Document()
+    doc.add_paragraph("1 表格测试")
+    table = doc.add_table(rows=row_count, cols=col_count)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"R{r}C{c}"
+
+    # 直接修改XML合并单元格（table.cell().merge() 每次都要重建整个网格，大表格上很慢）
+    if merge_every:
+        tr_lst = table._tbl.tr_lst
+        for r in range(0, row_count - 1, merge_every):
+            top, below = tr_lst[r].tc_lst, tr_lst[r + 1].tc_lst
+            top[0].get_or_add_tcPr().vMerge_val = 'restart'
+            below[0].get_or_add_tcPr().vMerge_val = 'continue'
+            top[1].get_or_add_tcPr().grid_span = 2
+            tr_lst[r].remove(top[2])
+
+    doc.save(path)
+    return path
+
+
+def legacy_read_table(table) -> List[List[str]]:
+    """原 _format_table 的读取方式（table.rows / row.cells），仅用于对比"""
+    return [[cell.text.strip() for cell in row.cells] for row in table.rows]
+
+
+def bench_table(rows: List[int], repeat: int = 3):
+    """对比表格读取：python-docx row.cells vs 直接遍历 w:tr/w:tc"""
+    print(f"{'行数':>8} {'row.cells(ms)':>14} {'XML网格(ms)':>12} {'加速比':>8}")
+    print("=" * 48)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for row_count in rows:
+            path = build_table_docx(os.path.join(tmp_dir, f"table_{row_count}.docx"), row_count)
+            table = Document(path).tables[0]
+
+            legacy = min(_timed(legacy_read_table, table) for _ in range(repeat))
+            grid = min(_timed(DocxParser._read_table_grid, table._tbl) for _ in range(repeat))
+
+            print(f"{row_count:>8} {legacy * 1000:>14.1f} {grid * 1000:>12.1f} {legacy / grid:>7.1f}x")
+
+
+def bench_sidecar(sizes: List[int]):
+    """对比进程重启后的模板加载：完整解析 vs 读取边车文件"""
+    print(f"{'段落数':>8} {'完整解析(ms)':>12} {'边车文件(ms)':>12} {'大纲(ms)':>10}")
+    print("=" * 48)
+
+    cache = get_docx_parse_cache()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = build_corpus_docx(os.path.join(tmp_dir, f"bench_{size}.docx"), size)
+
+            # 首次加载：解析文档并写入边车文件
+            cache.clear()
+            full = _timed(DocxParser, path)
+            DocxOutlineExtractor().extract_outline_text(path)
+
+            # 清空进程内缓存，模拟服务重启
+            cache.clear()
+            sidecar = _timed(DocxParser, path)
+            outline = _timed(DocxOutlineExtractor().extract_outline_text, path)
+
+            print(f"{size:>8} {full * 1000:>12.1f} {sidecar * 1000:>12.1f} {outline * 1000:>10.1f}")
+
+
+def peak_rss_mb() -> float:
+    """
+    当前进程的峰值RSS（MB）
+
+    优先读取 /proc/self/status 的 VmHWM（exec后重新计数）；
+    ru_maxrss 在 Linux 上会继承 exec 前父进程的峰值，仅作为后备
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux下ru_maxrss单位为KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_outline_engine(path: str, engine: str, queue):
+    """在独立进程中运行一次大纲提取，返回耗时与峰值RSS增量"""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    chapters = DocxOutlineExtractor(engine=engine).extract_outline(path, max_depth=6, use_cache=False)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, peak_rss_mb() - rss_before, len(chapters)))
+
+
+def bench_engines(sizes: List[int]):
+    """对比 docx / stream 两种大纲提取引擎的耗时与峰值内存"""
+    ctx = multiprocessing.get_context('spawn')
+    print(f"{'段落数':>8} {'引擎':>8} {'章节数':>8} {'耗时(s)':>10} {'峰值RSS增量(MB)':>16}")
+    print("=" * 58)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = build_corpus_docx(os.path.join(tmp_dir, f"bench_{size}.docx"), size)
+            for engine in DocxOutlineExtractor.ENGINES:
+                # 每次在新进程中运行，保证峰值RSS互不影响
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run_outline_engine, args=(path, engine, queue))
+                proc.start()
+                elapsed, peak_mb, chapter_count = queue.get()
+                proc.join()
+                print(f"{size:>8} {engine:>8} {chapter_count:>8} {elapsed:>10.3f} {peak_mb:>16.1f}")
+
+
+class LegacyClassifyExtractor(DocxOutlineExtractor):
+    """
+    逐条 re.match 的段落分类实现（HeadingClassifier 之前的版本）
+
+    仅用于 classify 基准：对比吞吐量并校验新分类器结果完全一致
+    """
+
+    def _is_filtered_content(self, text: str) -> bool:
+        """过滤不需要的内容"""
+        # 过滤日期
+        if re.match(self.patterns['date'], text) or re.match(self.patterns['hash_date'], text):
+            return True
+        
+        # 过滤目录标识
+        if re.match(r'^目\s*录', text) or re.match(r'^contents?$', text.lower()):
+            return True
+        
+        # 过滤页码行
+        if re.match(r'^\d+\s*$', text):
+            return True
+        
+        # 过滤制表符行（目录中的页码对齐）
+        if '\t' in text and re.match(r'^.+\t+\d+\s*$', text):
+            return True
+        
+        # 过滤目录内容：章节标题后跟多个空格和页码
+        if re.match(r'^.+\s{3,}\d+\s*$', text):
+            return True
+        
+        # 过滤包含详细描述的工具列表项
+        if re.match(r'^\d+\s*、.*[:：]', text):
+            return True
+        
+        # 过滤表格标题行
+        if re.match(r'.*表\s*$', text) and len(text) < 20:
+            return True
+        
+        return False
+    
+    def _match_chapter_pattern(self, text: str, system_type: str) -> Optional[Dict]:
+        """匹配章节模式"""
+        
+        if system_type == 'numeric':
+            # 数字体系：优先匹配多级数字编号
+            match = re.match(self.patterns['numeric'], text)
+            if match:
+                number = match.group(1)
+                title = match.group(2).strip()
+                level = len(number.split('.'))
+                return {'title': title, 'level': level, 'number': number}
+            
+            # 检查单级数字编号，如 "1 总论"
+            single_match = re.match(r'^(\d+)\s+([^\d、)）].*)$', text)
+            if single_match:
+                number = single_match.group(1)
+                title = single_match.group(2).strip()
+                # 过滤掉不是真正章节标题的内容
+                if self._is_valid_chapter_title(title):
+                    return {'title': title, 'level': 1, 'number': number}
+        
+        else:  # mixed system
+            # 混合体系：按级别顺序匹配
+            
+            # 第一级：第一章, 第1章
+            match = re.match(self.patterns['chapter'], text)
+            if match:
+                chinese_num = match.group(1)
+                arabic_num = match.group(2)
+                title = match.group(3).strip()
+                if chinese_num:
+                    number = chinese_num
+                else:
+                    number = arabic_num
+                return {'title': title, 'level': 1, 'number': f"第{number}章"}
+            
+            # 第二级：一、二、
+            match = re.match(self.patterns['chinese_item'], text)
+            if match:
+                chinese_num = match.group(1)
+                title = match.group(2).strip()
+                return {'title': title, 'level': 2, 'number': chinese_num}
+            
+            # 第三级：1、1.
+            match = re.match(self.patterns['numbered_item'], text)
+            if match:
+                number = match.group(1)
+                title = match.group(2).strip()
+                # 在混合体系中，检查是否为最高级别的数字
+                if self._is_top_level_number(text, number):
+                    return {'title': title, 'level': 1, 'number': number}
+                else:
+                    return {'title': title, 'level': 3, 'number': number}
+            
+            # 第四级：1) 1）
+            match = re.match(self.patterns['parenthesis'], text)
+            if match:
+                number = match.group(1)
+                title = match.group(2).strip()
+                return {'title': title, 'level': 4, 'number': f"{number})"}
+            
+            # 第五级：(1) （1）
+            match = re.match(self.patterns['bracket'], text)
+            if match:
+                number = match.group(1)
+                title = match.group(2).strip()
+                return {'title': title, 'level': 5, 'number': f"({number})"}
+            
+            # 第六级：a) (a)
+            match = re.match(self.patterns['letter'], text)
+            if match:
+                letter = match.group(1)
+                title = match.group(2).strip()
+                return {'title': title, 'level': 6, 'number': f"{letter})"}
+            
+            match = re.match(self.patterns['bracket_letter'], text)
+            if match:
+                letter = match.group(1)
+                title = match.group(2).strip()
+                return {'title': title, 'level': 6, 'number': f"({letter})"}
+        
+        return None
+
+
+def build_classify_corpus(count: int, seed: int = 0) -> List[str]:
+    """生成段落分类基准用的合成段落文本（正文、各类编号标题、目录行、日期、表格标题混合）"""
+    rng = random.Random(seed)
+    cn = '一二三四五六七八九十'
+    makers = [
+        lambda: f"本节正文{rng.randint(1, 999)}，介绍项目建设的背景、目标与具体实施路径，并给出相应的技术经济分析。",
+        lambda: f"建设规模与投资估算说明{rng.randint(1, 99)}，详见附件。",
+        lambda: f"{rng.randint(1, 9)}.{rng.randint(1, 9)}.{rng.randint(1, 9)} 具体方案",
+        lambda: f"{rng.randint(1, 9)} 总论",
+        lambda: f"第{rng.choice(cn)}章 概述",
+        lambda: f"第{rng.randint(1, 20)}章 方案",
+        lambda: f"{rng.choice(cn)}、建设目标",
+        lambda: f"{rng.randint(1, 9)}、工作内容",
+        lambda: f"{rng.randint(1, 9)}）细节说明",
+        lambda: f"（{rng.randint(1, 9)}）子项说明",
+        lambda: f"{rng.choice('abc')}) 字母项",
+        lambda: f"({rng.choice('abc')}) 字母项",
+        lambda: f"{rng.randint(1, 9)}.{rng.randint(1, 9)} 概况\t{rng.randint(1, 99)}",
+        lambda: f"{rng.randint(1, 9)} 结论    {rng.randint(1, 99)}",
+        lambda: f"{rng.randint(2000, 2030)}年{rng.randint(1, 12)}月{rng.randint(1, 28)}日",
+        lambda: f"# {rng.randint(2000, 2030)}年{rng.randint(1, 12)}月{rng.randint(1, 28)}日",
+        lambda: "目 录",
+        lambda: "Contents",
+        lambda: f"{rng.randint(1, 300)}",
+        lambda: f"{rng.randint(1, 9)}、工具名称：说明",
+        lambda: "投资估算表",
+        lambda: "本项目的主要设备清单及其技术参数如下表",
+    ]
+    # 正文段落占多数
+    weights = [30, 10] + [1] * (len(makers) - 2)
+    return [rng.choices(makers, weights)[0]() for _ in range(count)]
+
+
+def bench_classify(count: int, repeat: int = 3):
+    """段落分类（过滤 + 章节匹配）吞吐量：逐条re.match vs HeadingClassifier"""
+    corpus = build_classify_corpus(count)
+    legacy = LegacyClassifyExtractor()
+    extractor = DocxOutlineExtractor()
+
+    def run_legacy(system_type):
+        results = []
+        for text in corpus:
+            if legacy._is_filtered_content(text):
+                results.append((True, None))
+            else:
+                results.append((False, legacy._match_chapter_pattern(text, system_type)))
+        return results
+
+    def run_classifier(system_type):
+        classify = extractor.classifier.classify
+        return [classify(text, system_type) for text in corpus]
+
+    print(f"{'编号体系':>8} {'实现':>16} {'段落/秒':>12} {'结果一致':>8}")
+    print("=" * 50)
+    for system_type in ('numeric', 'mixed'):
+        expected = run_legacy(system_type)
+        same = run_classifier(system_type) == expected
+        for name, runner in (('re.match逐条', run_legacy), ('HeadingClassifier', run_classifier)):
+            best = min(_timed(runner, system_type) for _ in range(repeat))
+            print(f"{system_type:>8} {name:>16} {count / best:>12,.0f} {str(same):>8}")
+
+
+def _run_suite_case(path: str, engine: str, chapter_samples: int, seed: int, queue):
+    """
+    在独立进程中对一个语料文件依次测量 extract_outline、format_outline、DocxParser 加载和随机 get_chapter
+
+    各步骤均不使用缓存；峰值RSS为整个过程的进程峰值
+    """
+    rss_before = peak_rss_mb()
+    extractor = DocxOutlineExtractor(engine=engine)
+
+    start = time.perf_counter()
+    chapters = extractor.extract_outline(path, max_depth=6, use_cache=False)
+    outline_s = time.perf_counter() - start
+
+    format_s = _timed(extractor.format_outline, chapters)
+
+    start = time.perf_counter()
+    parser = DocxParser(path, use_cache=False)
+    parser_s = time.perf_counter() - start
+
+    # 按固定种子随机抽取章节，首次调用包含文档主体的延迟加载，单独记录
+    numbers = [ch['number'] for ch in parser.chapters if ch.get('number')]
+    rng = random.Random(seed)
+    sample = rng.sample(numbers, min(chapter_samples, len(numbers)))
+    chapter_ms = []
+    for number in sample:
+        chapter_ms.append(_timed(parser.get_chapter, number) * 1000)
+
+    first_ms = chapter_ms[0] if chapter_ms else None
+    rest = sorted(chapter_ms[1:])
+    queue.put({
+        'chapters': len(chapters),
+        'extract_outline_s': round(outline_s, 4),
+        'format_outline_ms': round(format_s * 1000, 3),
+        'parser_load_s': round(parser_s, 4),
+        'get_chapter_first_ms': round(first_ms, 3) if first_ms is not None else None,
+        'get_chapter_avg_ms': round(sum(rest) / len(rest), 3) if rest else None,
+        'get_chapter_p95_ms': round(rest[min(len(rest) - 1, int(len(rest) * 0.95))], 3) if rest else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'peak_rss_delta_mb': round(peak_rss_mb() - rss_before, 1),
+    })
+
+
+def _compare_suite(results: List[Dict], baseline_path: str):
+    """与基线结果按语料文件名逐项对比，打印耗时/内存变化比例"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {item['corpus']: item for item in json.load(f)['results']}
+
+    metrics = ('extract_outline_s', 'parser_load_s', 'get_chapter_avg_ms', 'peak_rss_mb')
+    print(f"\n与基线对比: {baseline_path}（当前/基线）")
+    print(f"{'语料':<48} " + " ".join(f"{m:>20}" for m in metrics))
+    for item in results:
+        base = baseline.get(item['corpus'])
+        if base is None:
+            continue
+        ratios = []
+        for m in metrics:
+            if item.get(m) and base.get(m):
+                ratios.append(f"{item[m] / base[m]:>19.2f}x")
+            else:
+                ratios.append(f"{'-':>20}")
+        print(f"{item['corpus']:<48} " + " ".join(ratios))
+
+
+def bench_suite(sizes: List[int], numberings: List[str], depths: List[int], tocs: List[bool],
+                table_densities: List[float], engine: str = 'docx', chapter_samples: int = 20, seed: int = 0,
+                corpus_dir: Optional[str] = None, output: Optional[str] = None,
+                compare: Optional[str] = None) -> List[Dict]:
+    """
+    基准套件：按语料参数组合生成（或复用）合成模板，逐个在新进程中测量，结果写入JSON
+
+    Args:
+        sizes: 段落数
+        numberings: 编号体系
+        depths: 标题深度
+        tocs: 是否带目录
+        table_densities: 表格密度
+        engine: 大纲提取引擎
+        chapter_samples: 每个文档随机抽取的章节数
+        seed: 语料与抽样的随机种子
+        corpus_dir: 语料目录（为空时使用临时目录）
+        output: 结果JSON路径
+        compare: 基线结果JSON路径
+
+    Returns:
+        结果列表
+    """
+    ctx = multiprocessing.get_context('spawn')
+    specs = corpus_specs(sizes, numberings, depths, tocs, table_densities, seed)
+    results = []
+
+    print(f"{'语料':<48} {'章节':>6} {'大纲(s)':>8} {'格式化(ms)':>10} {'加载(s)':>8} "
+          f"{'章节avg(ms)':>11} {'p95(ms)':>8} {'峰值RSS(MB)':>11}")
+    print("=" * 120)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for spec, path in ensure_corpus(corpus_dir or tmp_dir, specs):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_suite_case, args=(path, engine, chapter_samples, seed, queue))
+            proc.start()
+            metrics = queue.get()
+            proc.join()
+
+            item = {'corpus': corpus_name(spec), 'engine': engine, **spec, **metrics}
+            results.append(item)
+            avg = item['get_chapter_avg_ms']
+            p95 = item['get_chapter_p95_ms']
+            print(f"{item['corpus']:<48} {item['chapters']:>6} {item['extract_outline_s']:>8.3f} "
+                  f"{item['format_outline_ms']:>10.2f} {item['parser_load_s']:>8.3f} "
+                  f"{avg if avg is not None else '-':>11} {p95 if p95 is not None else '-':>8} "
+                  f"{item['peak_rss_mb']:>11.1f}")
+
+    if output:
+        report = {
+            'meta': {
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'engine': engine,
+                'chapter_samples': chapter_samples,
+            },
+            'results': results,
+        }
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {output}")
+
+    if compare:
+        _compare_suite(results, compare)
+
+    return results
+
+
+def _timed(func, *args) -> float:
+    """返回一次调用的耗时（秒）"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    """主函数，处理命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="DocxParser / DocxOutlineExtractor 性能基准",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    load_parser = sub.add_parser('load', help='DocxParser加载（body遍历）耗时')
+    load_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 20000, 50000],
+                             help='合成文档的段落数')
+
+    chapter_parser = sub.add_parser('chapter', help='get_chapter单次调用耗时')
+    chapter_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 20000],
+                                help='合成文档的段落数')
+
+    boundary_parser = sub.add_parser('boundary', help='章节结束位置查找（原嵌套扫描 vs 标题位置表）')
+    boundary_parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 10000],
+                                 help='合成文档的段落数')
+
+    table_parser = sub.add_parser('table', help='大表格读取耗时（row.cells vs XML网格）')
+    table_parser.add_argument('--rows', type=int, nargs='+', default=[200, 2000],
+                              help='表格行数')
+
+    sidecar_parser = sub.add_parser('sidecar', help='进程重启后的模板加载（完整解析 vs 边车文件）')
+    sidecar_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000],
+                                help='合成文档的段落数')
+
+    engines_parser = sub.add_parser('engines', help='对比大纲提取引擎(docx/stream)的耗时与峰值内存')
+    engines_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                                help='合成文档的段落数')
+
+    classify_parser = sub.add_parser('classify', help='段落分类吞吐量（逐条re.match vs HeadingClassifier）')
+    classify_parser.add_argument('--count', type=int, default=50000, help='合成段落数')
+
+    suite_parser = sub.add_parser('suite', help='合成语料基准套件（大纲/格式化/加载/随机章节/峰值内存，输出JSON）')
+    suite_parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='段落数')
+    suite_parser.add_argument('--numbering', nargs='+', choices=NUMBERING_SYSTEMS, default=list(NUMBERING_SYSTEMS),
+                              help='编号体系')
+    suite_parser.add_argument('--depths', type=int, nargs='+', default=[3], help='标题深度')
+    suite_parser.add_argument('--toc', action='store_true', help='同时测试带目录的语料')
+    suite_parser.add_argument('--table-density', type=float, nargs='+', default=[0.2], help='表格密度')
+    suite_parser.add_argument('--engine', choices=DocxOutlineExtractor.ENGINES, default='docx', help='大纲提取引擎')
+    suite_parser.add_argument('--samples', type=int, default=20, help='每个文档随机抽取的章节数')
+    suite_parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    suite_parser.add_argument('--corpus-dir', help='语料目录（复用已生成的语料）')
+    suite_parser.add_argument('--output', help='结果JSON路径')
+    suite_parser.add_argument('--compare', help='基线结果JSON路径')
+
+    args = parser.parse_args()
+
+    if args.bench == 'load':
+        bench_load(args.sizes)
+    elif args.bench == 'chapter':
+        bench_chapter(args.sizes)
+    elif args.bench == 'boundary':
+        bench_boundary(args.sizes)
+    elif args.bench == 'table':
+        bench_table(args.rows)
+    elif args.bench == 'sidecar':
+        bench_sidecar(args.sizes)
+    elif args.bench == 'engines':
+        bench_engines(args.sizes)
+    elif args.bench == 'classify':
+        bench_classify(args.count)
+    elif args.bench == 'suite':
+        bench_suite(args.sizes, args.numbering, args.depths, [False, True] if args.toc else [False],
+                    args.table_density, engine=args.engine, chapter_samples=args.samples, seed=args.seed,
+                    corpus_dir=args.corpus_dir, output=args.output, compare=args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DOC/DOCX 模板解析结果的进程级缓存
+
+同一模板在一次报告编制中会被反复解析（每个章节都要提取大纲和章节内容），
+这里按 (路径, mtime, size) 缓存解析结果，文件被修改后自动失效（内存中的模板按内容哈希缓存）；
+缓存按估算的内存占用做 LRU 淘汰。
+
+注意：只通过 get_docx_parse_cache() 获取全局实例，
+避免模块被不同路径多次导入时出现多个缓存。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from from_server_docx_source import DocxSource
+
+# 默认缓存上限（估算内存）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class DocxParseCache:
+    """
+    模板解析结果缓存（线程安全，LRU淘汰）
+
+    缓存项的键为 (kind, 文件键, 附加参数)，其中文件键为 (真实路径, mtime_ns, size)
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存估算内存上限（字节）
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_key(file_path: Union[str, DocxSource]) -> Tuple[str, int, int]:
+        """
+        获取文件键：(真实路径, mtime_ns, size)
+
+        文件内容变化（重新上传、编辑保存）后 mtime/size 随之变化，旧缓存自然失效；
+        内存中的模板为 ("memory:内容哈希", 0, size)
+        """
+        if isinstance(file_path, DocxSource):
+            if file_path.in_memory:
+                return file_path.identity, 0, len(file_path.data)
+            file_path = file_path.path
+        real_path = os.path.realpath(file_path)
+        st = os.stat(real_path)
+        return real_path, st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _identity(file_path: Union[str, DocxSource]) -> str:
+        """文件键中的来源标识（不含 mtime/size）"""
+        if isinstance(file_path, DocxSource):
+            return file_path.identity
+        return os.path.realpath(file_path)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取缓存项，未命中返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int):
+        """
+        写入缓存项，超过上限时按LRU淘汰
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            size: 估算的内存占用（字节）
+        """
+        # 单项超过上限时不缓存
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def get_or_create(self, kind: str, file_path: Union[str, DocxSource], factory: Callable[[], Any],
+                      sizer: Callable[[Any], int], extra: Hashable = None) -> Any:
+        """
+        获取缓存项，未命中时调用 factory 生成并写入缓存
+
+        Args:
+            kind: 缓存类型，如 'outline'、'parser'
+            file_path: 源文件路径或模板来源
+            factory: 生成缓存值的函数
+            sizer: 估算缓存值内存占用的函数
+            extra: 附加键（如 max_depth）
+
+        Returns:
+            缓存值
+        """
+        key = (kind, self.file_key(file_path), extra)
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value, sizer(value))
+        return value
+
+    def find_latest(self, kind: str, file_path: Union[str, DocxSource], extra: Hashable = None) -> Optional[Any]:
+        """
+        查找同一路径最近使用的缓存项（不论 mtime/size 是否变化）
+
+        用于文件被修改后基于上一版本的结果做增量更新；不计入命中统计
+        """
+        real_path = self._identity(file_path)
+        with self._lock:
+            for key in reversed(self._entries):
+                if key[0] == kind and key[1][0] == real_path and key[2] == extra:
+                    return self._entries[key][0]
+        return None
+
+    def invalidate(self, file_path: Union[str, DocxSource]):
+        """删除指定文件的全部缓存项"""
+        real_path = self._identity(file_path)
+        with self._lock:
+            for key in [k for k in self._entries if k[1][0] == real_path]:
+                _, size = self._entries.pop(key)
+                self._total_bytes -= size
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_docx_parse_cache = None
+_docx_parse_cache_lock = threading.Lock()
+
+
+def get_docx_parse_cache() -> DocxParseCache:
+    """获取全局模板解析缓存"""
+    global _docx_parse_cache
+    if _docx_parse_cache is None:
+        with _docx_parse_cache_lock:
+            if _docx_parse_cache is None:
+                _docx_parse_cache = DocxParseCache()
+    return _docx_parse_cache
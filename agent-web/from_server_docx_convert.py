@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+常驻的 LibreOffice 文档转换服务（.doc -> .docx）
+
+每次调用 soffice --convert-to 都要冷启动 LibreOffice（数秒），且并发调用会争用同一个用户配置目录。
+这里启动若干个常驻的 headless soffice 实例（每个实例使用独立的配置目录和 UNO 管道），
+通过 UNO socket 提交转换请求，由有界的工作进程池处理并发请求，崩溃的实例会自动重启。
+
+依赖：LibreOffice 及其 Python UNO 绑定（sudo apt install libreoffice python3-uno）。
+UNO 不可用时 get_libreoffice_service() 返回 None，调用方应回退到 soffice 子进程方式。
+"""
+
+import os
+import time
+import atexit
+import queue
+import shutil
+import hashlib
+import pathlib
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+    UNO_AVAILABLE = True
+except ImportError:
+    uno = None
+    PropertyValue = None
+    NoConnectException = Exception
+    UNO_AVAILABLE = False
+
+# 默认工作进程数量
+DEFAULT_POOL_SIZE = 2
+# 启动后等待 UNO 管道就绪的时间（秒）
+STARTUP_TIMEOUT = 30
+# 等待空闲工作进程的时间（秒）
+ACQUIRE_TIMEOUT = 120
+# 单个文件转换的时限（秒），超时后结束该工作进程（下次使用时重启），调用方回退到 CLI 转换
+CONVERT_TIMEOUT = 120
+
+# .docx 导出过滤器
+DOCX_FILTER_NAME = "MS Word 2007 XML"
+
+# 转换结果缓存目录及容量上限
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "docx_convert_cache")
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def find_soffice() -> Optional[str]:
+    """查找 soffice / libreoffice 可执行文件"""
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+class ConversionError(RuntimeError):
+    """源文件本身无法转换（不是工作进程故障，不需要重启重试）"""
+
+
+class ConversionTimeout(RuntimeError):
+    """转换超过时限（工作进程已被结束，不在服务内重试）"""
+
+
+def _make_property(name: str, value):
+    """构造 UNO PropertyValue"""
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class SofficeWorker:
+    """
+    一个常驻的 headless soffice 实例
+
+    每个实例使用独立的用户配置目录（-env:UserInstallation），避免并发实例之间的配置目录冲突；
+    UNO 连接使用带进程号的命名管道，多个进程（--jobs 进程池、多个服务进程）各自启动的实例
+    互不连接、互不关闭
+    """
+
+    def __init__(self, soffice: str, pipe_name: str, profile_dir: str):
+        self.soffice = soffice
+        self.pipe_name = pipe_name
+        self.profile_dir = profile_dir
+        self.process = None
+        self.desktop = None
+
+    def start(self):
+        """启动 soffice 并建立 UNO 连接"""
+        cmd = [
+            self.soffice,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+            f"-env:UserInstallation={pathlib.Path(self.profile_dir).as_uri()}",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.desktop = self._connect()
+
+    def _connect(self):
+        """等待 UNO 管道就绪并获取 Desktop 对象"""
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        url = f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+
+        deadline = time.time() + STARTUP_TIMEOUT
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"soffice 进程启动后退出 (exit {self.process.returncode})")
+            try:
+                ctx = resolver.resolve(url)
+                return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+            except NoConnectException:
+                if time.time() > deadline:
+                    raise RuntimeError(f"等待 soffice UNO 管道 {self.pipe_name} 超时")
+                time.sleep(0.5)
+
+    def kill(self):
+        """强制结束 soffice 进程（不经过 UNO，用于转换卡死时）；阻塞中的 UNO 调用随连接断开而返回"""
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def is_alive(self) -> bool:
+        """soffice 进程是否仍在运行"""
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        """关闭 soffice 进程"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def restart(self):
+        """重启 soffice（用于崩溃或连接失效后恢复）"""
+        self.stop()
+        self.start()
+
+    def convert(self, src: pathlib.Path, dst: pathlib.Path):
+        """
+        将 src 转换为 .docx 并保存到 dst
+
+        Args:
+            src: 源文件路径
+            dst: 目标 .docx 路径
+        """
+        load_props = (_make_property("Hidden", True), _make_property("ReadOnly", True))
+        store_props = (_make_property("FilterName", DOCX_FILTER_NAME), _make_property("Overwrite", True))
+
+        document = self.desktop.loadComponentFromURL(src.resolve().as_uri(), "_blank", 0, load_props)
+        if document is None:
+            raise ConversionError(f"LibreOffice 无法打开文件: {src}")
+        try:
+            document.storeToURL(dst.resolve().as_uri(), store_props)
+        finally:
+            document.close(True)
+
+
+class LibreOfficeService:
+    """
+    LibreOffice 转换服务：有界的常驻 soffice 工作进程池
+
+    convert() 可被多个线程并发调用，同时进行的转换数量不超过工作进程数量。
+    服务只属于创建它的进程：fork 出的子进程不会使用或关闭父进程启动的 soffice 实例
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, soffice: Optional[str] = None,
+                 convert_timeout: float = CONVERT_TIMEOUT):
+        self.soffice = soffice or find_soffice()
+        if not self.soffice:
+            raise RuntimeError("未找到 LibreOffice，可执行文件 soffice / libreoffice 不在 PATH。")
+        if not UNO_AVAILABLE:
+            raise RuntimeError("未找到 LibreOffice Python UNO 绑定 (python3-uno)。")
+
+        self.pool_size = pool_size
+        self.convert_timeout = convert_timeout
+        self.pid = os.getpid()
+        self._profile_root = tempfile.mkdtemp(prefix=f"lo_convert_{self.pid}_")
+        self._workers: List[SofficeWorker] = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """启动全部工作进程（首次转换时自动调用）"""
+        with self._lock:
+            if self._started:
+                return
+            try:
+                for i in range(self.pool_size):
+                    worker = SofficeWorker(
+                        self.soffice,
+                        f"{os.path.basename(self._profile_root)}_{i}",
+                        os.path.join(self._profile_root, f"worker_{i}"),
+                    )
+                    self._workers.append(worker)
+                    worker.start()
+                    self._idle.put(worker)
+            except Exception:
+                # 启动失败时关闭已启动的实例，下次调用重新启动
+                for worker in self._workers:
+                    worker.stop()
+                self._workers = []
+                self._idle = queue.Queue()
+                raise
+            self._started = True
+
+    def shutdown(self):
+        """关闭本进程启动的全部工作进程"""
+        if os.getpid() != self.pid:
+            # fork 出的子进程继承了服务对象，实例属于父进程，不能关闭
+            return
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
+            self._started = False
+        shutil.rmtree(self._profile_root, ignore_errors=True)
+
+    def convert(self, src: pathlib.Path, dst: pathlib.Path) -> pathlib.Path:
+        """
+        将 .doc 转换为 .docx
+
+        工作进程已崩溃或转换过程中连接断开时，重启该工作进程并重试一次；
+        转换超过 convert_timeout 时结束该工作进程并抛出 ConversionTimeout（不重试）
+
+        Args:
+            src: 源 .doc 路径
+            dst: 目标 .docx 路径
+
+        Returns:
+            目标 .docx 路径
+        """
+        self.start()
+
+        try:
+            worker = self._idle.get(timeout=ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError(f"等待 LibreOffice 转换工作进程超时 ({ACQUIRE_TIMEOUT}s)")
+
+        try:
+            if not worker.is_alive():
+                worker.restart()
+            try:
+                self._convert_with_deadline(worker, src, dst)
+            except (ConversionError, ConversionTimeout):
+                # 超时被结束的工作进程在下次取用时重启
+                raise
+            except Exception:
+                # 可能是 soffice 崩溃或 UNO 连接失效：重启后重试一次
+                worker.restart()
+                self._convert_with_deadline(worker, src, dst)
+        finally:
+            self._idle.put(worker)
+
+        if not dst.exists():
+            raise RuntimeError("LibreOffice 转换完成，但未找到生成的 .docx 文件。")
+        return dst
+
+
+    def _convert_with_deadline(self, worker: SofficeWorker, src: pathlib.Path, dst: pathlib.Path):
+        """
+        在时限内完成转换：看门狗超时后结束 soffice 进程，卡住的 UNO 调用随之返回
+
+        Raises:
+            ConversionTimeout: 转换超过 convert_timeout
+        """
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            worker.kill()
+
+        watchdog = threading.Timer(self.convert_timeout, on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            worker.convert(src, dst)
+        except Exception:
+            if timed_out.is_set():
+                raise ConversionTimeout(f"LibreOffice 转换超时 ({self.convert_timeout}s): {src}")
+            raise
+        finally:
+            watchdog.cancel()
+        if timed_out.is_set():
+            raise ConversionTimeout(f"LibreOffice 转换超时 ({self.convert_timeout}s): {src}")
+
+
+class ConversionCache:
+    """
+    .doc -> .docx 转换结果缓存（按源文件内容的 SHA-256 寻址）
+
+    - 同一内容的 .doc 无论位于哪个模板目录，只转换一次
+    - 转换先写临时文件再 rename，缓存目录中不会出现不完整的 .docx
+    - 同一内容的并发转换（同进程的多个线程，或多个进程）通过锁合并为一次，
+      其余调用等待后直接使用转换结果
+    - 缓存总大小超过上限时，按最近使用时间（mtime，命中时刷新）淘汰；
+      <digest>.lock 锁文件不随淘汰删除（删除后其他进程会锁住新的文件，失去互斥）
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def file_digest(path: pathlib.Path) -> str:
+        """计算文件内容的 SHA-256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _thread_lock(self, digest: str) -> threading.Lock:
+        """同一内容对应的进程内锁"""
+        with self._locks_lock:
+            return self._locks.setdefault(digest, threading.Lock())
+
+    def get_or_convert(self, src: pathlib.Path,
+                       convert: Callable[[pathlib.Path, pathlib.Path], pathlib.Path]) -> pathlib.Path:
+        """
+        获取 src 转换后的 .docx，缓存未命中时调用 convert 转换
+
+        Args:
+            src: 源 .doc 路径
+            convert: 转换函数 convert(src, dst)，将 src 转换后写入 dst
+
+        Returns:
+            缓存中的 .docx 路径
+        """
+        digest = self.file_digest(src)
+        dst = self.cache_dir / f"{digest}.docx"
+
+        if self._touch(dst):
+            return dst
+
+        with self._thread_lock(digest):
+            with open(self.cache_dir / f"{digest}.lock", 'w') as lock_file:
+                # 跨进程锁：另一进程正在转换同一内容时在此等待
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    if self._touch(dst):
+                        return dst
+
+                    with tempfile.TemporaryDirectory(dir=self.cache_dir, prefix=f".{digest[:16]}_") as tmp_dir:
+                        tmp_dst = pathlib.Path(tmp_dir) / f"{src.stem}.docx"
+                        convert(src, tmp_dst)
+                        os.replace(tmp_dst, dst)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._evict()
+        return dst
+
+    @staticmethod
+    def _touch(path: pathlib.Path) -> bool:
+        """若缓存文件存在则刷新其使用时间并返回True"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _evict(self):
+        """缓存总大小超过上限时，删除最久未使用的转换结果"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.docx"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        evicted = []
+        # 保留最近使用的一项（刚转换完成的文件）
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            evicted.append(path.stem)
+            total -= size
+
+        # 同时清理已淘汰内容的进程内锁（正在使用的锁保留）
+        with self._locks_lock:
+            for digest in evicted:
+                lock = self._locks.get(digest)
+                if lock is not None and not lock.locked():
+                    del self._locks[digest]
+
+
+_conversion_cache = None
+_conversion_cache_lock = threading.Lock()
+
+
+def get_conversion_cache() -> ConversionCache:
+    """获取全局 .doc -> .docx 转换缓存"""
+    global _conversion_cache
+    if _conversion_cache is None:
+        with _conversion_cache_lock:
+            if _conversion_cache is None:
+                _conversion_cache = ConversionCache()
+    return _conversion_cache
+
+
+_libreoffice_service = None
+_libreoffice_service_lock = threading.Lock()
+
+
+def get_libreoffice_service() -> Optional[LibreOfficeService]:
+    """
+    获取全局 LibreOffice 转换服务
+
+    Returns:
+        转换服务；LibreOffice 或 UNO 绑定不可用时返回 None
+    """
+    global _libreoffice_service
+    # fork 出的子进程继承的服务属于父进程，需要启动自己的实例
+    if _libreoffice_service is None or _libreoffice_service.pid != os.getpid():
+        if not UNO_AVAILABLE or not find_soffice():
+            return None
+        with _libreoffice_service_lock:
+            if _libreoffice_service is None or _libreoffice_service.pid != os.getpid():
+                _libreoffice_service = LibreOfficeService()
+                atexit.register(_libreoffice_service.shutdown)
+    return _libreoffice_service
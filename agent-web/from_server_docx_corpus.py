@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成 docx 模板语料生成器（用于 DocxOutlineExtractor / DocxParser 基准测试）
+
+可调整的维度：
+- 段落数（100 ~ 100000）
+- 标题深度（1 ~ 6 级）
+- 编号体系：numeric（1 / 1.1 / 1.1.1）或 mixed（第X章 / 一、 / 1、 / 1） / （1） / a)）
+- 是否带目录（目录条目带制表符和页码）
+- 表格密度（每个小节后插入表格的概率，部分表格含合并单元格）
+
+同一组参数和随机种子生成的文件逐字节相同（zip 条目时间固定），便于不同版本之间对比。
+document.xml 直接按字符串拼接生成，10万段落的文档也只需数秒。
+
+用法:
+  python from_server_docx_corpus.py --output-dir /tmp/docx_corpus
+  python from_server_docx_corpus.py --output-dir /tmp/docx_corpus --sizes 100 1000 100000 --numbering mixed --toc
+"""
+
+import io
+import os
+import random
+import zipfile
+import argparse
+import itertools
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+from docx import Document
+
+NUMBERING_SYSTEMS = ('numeric', 'mixed')
+
+# 固定的 zip 条目时间，保证输出可复现
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+_CHINESE_DIGITS = '零一二三四五六七八九'
+
+_TITLE_WORDS = ['项目概述', '建设背景', '需求分析', '总体设计', '技术方案', '实施计划', '投资估算',
+                '效益分析', '风险评估', '运维保障', '安全防护', '数据治理', '系统架构', '应用功能',
+                '部署方案', '测试验证', '培训推广', '组织保障']
+
+_BODY_SENTENCES = ['本项目围绕业务数字化转型的核心需求展开建设',
+                   '系统采用微服务架构并部署于企业一体化云平台',
+                   '通过统一的数据中台实现跨部门数据共享与交换',
+                   '建设内容包括平台能力提升、应用功能扩展和运维体系完善',
+                   '项目实施分为需求调研、系统设计、开发测试和上线推广四个阶段',
+                   '预计投资主要用于软件开发、硬件购置和实施服务',
+                   '项目建成后将显著提升基层人员的办公效率',
+                   '安全防护遵循国家网络安全等级保护三级要求']
+
+
+def chinese_number(n: int) -> str:
+    """1 ~ 99 的中文数字（如 11 -> 十一，21 -> 二十一）"""
+    if n < 10:
+        return _CHINESE_DIGITS[n]
+    tens, ones = divmod(n, 10)
+    prefix = '十' if tens == 1 else _CHINESE_DIGITS[tens] + '十'
+    return prefix + (_CHINESE_DIGITS[ones] if ones else '')
+
+
+def format_heading(numbering: str, counters: List[int], level: int, title: str) -> str:
+    """
+    生成标题文本
+
+    Args:
+        numbering: 编号体系
+        counters: 各级编号计数
+        level: 标题级别（1开始）
+        title: 标题文字
+
+    Returns:
+        带编号的标题文本
+    """
+    n = counters[level - 1]
+    if numbering == 'numeric':
+        return f"{'.'.join(str(c) for c in counters[:level])} {title}"
+
+    if level == 1:
+        return f"第{chinese_number(min(n, 99))}章 {title}"
+    if level == 2:
+        return f"{chinese_number(min(n, 99))}、{title}"
+    if level == 3:
+        return f"{n}、{title}"
+    if level == 4:
+        return f"{n}）{title}"
+    if level == 5:
+        return f"（{n}）{title}"
+    return f"{chr(ord('a') + (n - 1) % 26)}) {title}"
+
+
+def _paragraph_xml(text: str, style_id: str = None) -> str:
+    """段落 XML（文本中的制表符转为 w:tab）"""
+    ppr = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ''
+    runs = '<w:tab/>'.join(f'<w:t xml:space="preserve">{escape(part)}</w:t>' for part in text.split('\t'))
+    return f'<w:p>{ppr}<w:r>{runs}</w:r></w:p>'
+
+
+def _table_xml(rng: random.Random, rows: int, cols: int) -> str:
+    """表格 XML，首行部分单元格横向合并，首列部分单元格纵向合并"""
+    width = 8000 // cols
+    grid = ''.join(f'<w:gridCol w:w="{width}"/>' for _ in range(cols))
+    parts = [f'<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>']
+
+    merge_header = cols >= 3 and rng.random() < 0.3
+    merge_first_col = rows >= 3 and rng.random() < 0.3
+    for r in range(rows):
+        parts.append('<w:tr>')
+        c = 0
+        while c < cols:
+            tc_pr = ''
+            span = 1
+            if r == 0 and c == 1 and merge_header:
+                span = 2
+                tc_pr = '<w:tcPr><w:gridSpan w:val="2"/></w:tcPr>'
+            elif c == 0 and merge_first_col and r in (1, 2):
+                tc_pr = '<w:tcPr><w:vMerge w:val="restart"/></w:tcPr>' if r == 1 else '<w:tcPr><w:vMerge/></w:tcPr>'
+            text = '' if (c == 0 and merge_first_col and r == 2) else f"{_TITLE_WORDS[(r + c) % len(_TITLE_WORDS)]}{r}-{c}"
+            parts.append(f'<w:tc>{tc_pr}{_paragraph_xml(text)}</w:tc>')
+            c += span
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def _build_items(paragraphs: int, depth: int, numbering: str, table_density: float,
+                 paras_per_section: int, rng: random.Random) -> Tuple[List[Tuple[str, str]], List[Tuple[int, str]]]:
+    """
+    生成正文内容（不含目录）
+
+    Returns:
+        (内容项列表 [(类型, XML)], 标题列表 [(级别, 标题文本)])
+    """
+    items = []
+    headings = []
+    counters = [0] * depth
+    count = 0
+    level = 1
+
+    while count < paragraphs:
+        # 从 level 级开始产生新标题，更深的级别依次编号为 1
+        counters[level - 1] += 1
+        for deeper in range(level, depth):
+            counters[deeper] = 0
+        for lvl in range(level, depth + 1):
+            if lvl > level:
+                counters[lvl - 1] = 1
+            title = f"{rng.choice(_TITLE_WORDS)}{counters[lvl - 1]}"
+            text = format_heading(numbering, counters, lvl, title)
+            # 前三级标题使用内置标题样式，其余只靠编号识别
+            style_id = f"Heading{lvl}" if lvl <= 3 else None
+            items.append(('p', _paragraph_xml(text, style_id)))
+            headings.append((lvl, text))
+            count += 1
+
+        # 正文段落：长度不等，偶尔夹杂日期、表格标题等需要过滤的内容
+        for _ in range(rng.randint(1, paras_per_section * 2 - 1)):
+            roll = rng.random()
+            if roll < 0.03:
+                text = f"{rng.randint(2020, 2025)}年{rng.randint(1, 12)}月{rng.randint(1, 28)}日"
+            elif roll < 0.06:
+                text = f"表{count % 50 + 1} {rng.choice(_TITLE_WORDS)}"
+            else:
+                text = '，'.join(rng.choice(_BODY_SENTENCES) for _ in range(rng.randint(1, 4))) + '。'
+            items.append(('p', _paragraph_xml(text)))
+            count += 1
+
+        if table_density and rng.random() < table_density:
+            items.append(('tbl', _table_xml(rng, rng.randint(2, 10), rng.randint(2, 5))))
+
+        # 下一个标题的起始级别：多数为最深一级，偶尔回到上级
+        level = depth
+        while level > 1 and rng.random() < 0.3:
+            level -= 1
+
+    return items, headings
+
+
+def build_corpus_docx(path: str, paragraphs: int = 1000, depth: int = 3, numbering: str = 'numeric',
+                      toc: bool = False, table_density: float = 0.2, paras_per_section: int = 4,
+                      seed: int = 0) -> str:
+    """
+    生成一个合成 docx 模板
+
+    Args:
+        path: 输出路径
+        paragraphs: 正文段落数（含标题，不含目录和表格内段落）
+        depth: 标题深度（1 ~ 6）
+        numbering: 编号体系，'numeric' 或 'mixed'
+        toc: 是否在开头生成目录
+        table_density: 每个小节后插入表格的概率（0 ~ 1）
+        paras_per_section: 每个小节的平均正文段落数
+        seed: 随机种子
+
+    Returns:
+        输出路径
+    """
+    if numbering not in NUMBERING_SYSTEMS:
+        raise ValueError(f"不支持的编号体系: {numbering}，可选: {', '.join(NUMBERING_SYSTEMS)}")
+    if not 1 <= depth <= 6:
+        raise ValueError(f"标题深度应为 1 ~ 6: {depth}")
+
+    rng = random.Random(seed)
+    items, headings = _build_items(paragraphs, depth, numbering, table_density, paras_per_section, rng)
+
+    body = []
+    if toc:
+        body.append(_paragraph_xml("目录", "TOCHeading"))
+        page = 1
+        for level, text in headings:
+            if level <= 2:
+                body.append(_paragraph_xml(f"{text}\t{page}"))
+            page += 1 if level == 1 else 0
+    body.extend(xml for _, xml in items)
+
+    # 以 python-docx 默认模板为基础，只替换 document.xml 的 body 内容
+    base = io.BytesIO()
+    Document().save(base)
+    with zipfile.ZipFile(base) as src:
+        entries = [(info.filename, src.read(info.filename)) for info in src.infolist()]
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for name, data in entries:
+            if name == 'word/document.xml':
+                xml = data.decode('utf-8')
+                head, tail = xml.split('<w:body>', 1)
+                data = f"{head}<w:body>{''.join(body)}{tail}".encode('utf-8')
+            info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            dst.writestr(info, data)
+
+    return path
+
+
+def corpus_name(spec: Dict) -> str:
+    """语料文件名（由生成参数决定）"""
+    return (f"corpus_{spec['numbering']}_p{spec['paragraphs']}_d{spec['depth']}"
+            f"_{'toc' if spec['toc'] else 'notoc'}_t{int(spec['table_density'] * 100)}_s{spec['seed']}.docx")
+
+
+def corpus_specs(sizes: List[int], numberings: List[str], depths: List[int], tocs: List[bool],
+                 table_densities: List[float], seed: int = 0) -> List[Dict]:
+    """各维度取值的全组合"""
+    return [
+        {'paragraphs': size, 'numbering': numbering, 'depth': depth, 'toc': toc,
+         'table_density': density, 'seed': seed}
+        for size, numbering, depth, toc, density in itertools.product(sizes, numberings, depths, tocs, table_densities)
+    ]
+
+
+def ensure_corpus(output_dir: str, specs: List[Dict]) -> List[Tuple[Dict, str]]:
+    """
+    生成语料（已存在的文件直接复用）
+
+    Returns:
+        [(参数, 文件路径)]
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    corpus = []
+    for spec in specs:
+        path = os.path.join(output_dir, corpus_name(spec))
+        if not os.path.exists(path):
+            build_corpus_docx(path, **spec)
+        corpus.append((spec, path))
+    return corpus
+
+
+def main():
+    """主函数，处理命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="生成合成 docx 模板语料",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--output-dir', required=True, help='输出目录')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='段落数')
+    parser.add_argument('--numbering', nargs='+', choices=NUMBERING_SYSTEMS, default=list(NUMBERING_SYSTEMS),
+                        help='编号体系')
+    parser.add_argument('--depths', type=int, nargs='+', default=[3], help='标题深度')
+    parser.add_argument('--toc', action='store_true', help='同时生成带目录的版本')
+    parser.add_argument('--table-density', type=float, nargs='+', default=[0.2], help='表格密度')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    specs = corpus_specs(args.sizes, args.numbering, args.depths, [False, True] if args.toc else [False],
+                         args.table_density, args.seed)
+    for spec, path in ensure_corpus(args.output_dir, specs):
+        print(f"{path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
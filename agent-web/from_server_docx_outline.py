@@ -4,21 +4,222 @@
 import re
 import pathlib
 import shutil
+import zipfile
+import tempfile
+import itertools
 import subprocess
-from typing import List, Dict, Tuple, Optional, Union
+from typing import Any, List, Dict, Tuple, Optional, Union, Iterator
 from docx import Document
+from docx.oxml.ns import qn
 from docx.shared import Inches
+from lxml import etree
 import os
+import sys
+import glob
+import json
+import time
+import difflib
+import hashlib
 import argparse
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+from from_server_docx_cache import get_docx_parse_cache
+from from_server_docx_sidecar import get_docx_sidecar_store
+from from_server_docx_convert import get_libreoffice_service, get_conversion_cache, find_soffice, CONVERT_TIMEOUT
+from from_server_docx_source import DocxSource, DocxInput
+
+# 段落样式、大纲级别用到的 WordprocessingML 标签和属性
+_W_PPR = qn('w:pPr')
+_W_PSTYLE = qn('w:pStyle')
+_W_OUTLINE_LVL = qn('w:outlineLvl')
+_W_VAL = qn('w:val')
+
+# 段落或样式未设置 w:outlineLvl
+_NO_OUTLINE_LEVEL = object()
+
+class HeadingClassifier:
+    """
+    段落分类器：一次正则匹配完成"过滤判断 + 章节编号识别"
+
+    将各过滤规则与章节模式按原有判断顺序组合为一个带命名分组的预编译正则，
+    每个段落只做一次匹配（命中章节时再用对应的单项正则取出编号和标题），
+    分类结果与逐条 re.match 判断完全一致
+    """
+
+    # 过滤规则（顺序无关；表格标题规则另有长度条件，必须放在最后）
+    FILTER_PATTERNS = (
+        ('date', None),  # 使用 extractor.patterns['date']
+        ('hash_date', None),  # 使用 extractor.patterns['hash_date']
+        ('toc_title', r'^目\s*录'),  # 目录标识
+        ('page_number', r'^\d+\s*$'),  # 页码行
+        ('tab_page', r'^.+\t+\d+\s*$'),  # 制表符对齐的目录页码
+        ('space_page', r'^.+\s{3,}\d+\s*$'),  # 章节标题后跟多个空格和页码
+        ('tool_item', r'^\d+\s*、.*[:：]'),  # 包含详细描述的工具列表项
+        ('table_caption', r'.*表\s*$'),  # 表格标题行（仅限长度小于20）
+    )
+
+    # 各编号体系下的章节模式（按匹配优先级排列）
+    HEADING_PATTERNS = {
+        'numeric': (
+            ('numeric', None),  # 使用 extractor.patterns['numeric']
+            ('single_numeric', r'^(\d+)\s+([^\d、)）].*)$'),  # 单级数字编号，如 "1 总论"
+        ),
+        'mixed': (
+            ('chapter', None),
+            ('chinese_item', None),
+            ('numbered_item', None),
+            ('parenthesis', None),
+            ('bracket', None),
+            ('letter', None),
+            ('bracket_letter', None),
+        ),
+    }
+
+    TABLE_CAPTION_MAX_LEN = 20
+
+    def __init__(self, extractor: 'DocxOutlineExtractor'):
+        self.extractor = extractor
+
+        filters = [(name, pattern or extractor.patterns[name]) for name, pattern in self.FILTER_PATTERNS]
+
+        # 每个单项正则都预编译，命中后用于提取分组
+        self.heading_regexes = {}
+        self.combined = {}
+        self.heading_only = {}
+        for system_type, heading_patterns in self.HEADING_PATTERNS.items():
+            headings = [(name, pattern or extractor.patterns[name]) for name, pattern in heading_patterns]
+            for name, pattern in headings:
+                self.heading_regexes[name] = re.compile(pattern)
+            self.combined[system_type] = self._combine(filters + headings)
+            self.heading_only[system_type] = self._combine(headings)
+
+        self.filter_names = frozenset(name for name, _ in filters)
+
+    @staticmethod
+    def _combine(patterns: List[Tuple[str, str]]):
+        """将多个正则按顺序组合为一个带命名分组的选择分支正则"""
+        return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in patterns))
+
+    def classify(self, text: str, system_type: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        对段落文本分类
+
+        Args:
+            text: 段落文本（已strip）
+            system_type: 编号体系 'numeric' 或 'mixed'
+
+        Returns:
+            (是否被过滤, 章节信息)；被过滤时章节信息为None
+        """
+        # 目录标识 "Contents"
+        if text.lower() in ('content', 'contents'):
+            return True, None
+
+        system_type = 'numeric' if system_type == 'numeric' else 'mixed'
+        match = self.combined[system_type].match(text)
+        if match is None:
+            return False, None
+
+        name = match.lastgroup
+        if name in self.filter_names:
+            if name != 'table_caption' or len(text) < self.TABLE_CAPTION_MAX_LEN:
+                return True, None
+            # 表格标题规则不满足长度条件，其余过滤规则均未命中，继续匹配章节
+            match = self.heading_only[system_type].match(text)
+            if match is None:
+                return False, None
+            name = match.lastgroup
+
+        return False, self._build_heading(name, text)
+
+    def match_heading(self, text: str, system_type: str) -> Optional[Dict]:
+        """只匹配章节模式（不做过滤判断）"""
+        system_type = 'numeric' if system_type == 'numeric' else 'mixed'
+        match = self.heading_only[system_type].match(text)
+        if match is None:
+            return None
+        return self._build_heading(match.lastgroup, text)
+
+    def _build_heading(self, name: str, text: str) -> Optional[Dict]:
+        """根据命中的章节模式生成章节信息"""
+        match = self.heading_regexes[name].match(text)
+
+        if name == 'numeric':
+            number = match.group(1)
+            title = match.group(2).strip()
+            level = len(number.split('.'))
+            return {'title': title, 'level': level, 'number': number}
+
+        if name == 'single_numeric':
+            number = match.group(1)
+            title = match.group(2).strip()
+            # 过滤掉不是真正章节标题的内容
+            if self.extractor._is_valid_chapter_title(title):
+                return {'title': title, 'level': 1, 'number': number}
+            return None
+
+        # 第一级：第一章, 第1章
+        if name == 'chapter':
+            chinese_num = match.group(1)
+            arabic_num = match.group(2)
+            title = match.group(3).strip()
+            number = chinese_num if chinese_num else arabic_num
+            return {'title': title, 'level': 1, 'number': f"第{number}章"}
+
+        number = match.group(1)
+        title = match.group(2).strip()
+
+        # 第二级：一、二、
+        if name == 'chinese_item':
+            return {'title': title, 'level': 2, 'number': number}
+
+        # 第三级：1、1.
+        if name == 'numbered_item':
+            # 在混合体系中，检查是否为最高级别的数字
+            if self.extractor._is_top_level_number(text, number):
+                return {'title': title, 'level': 1, 'number': number}
+            return {'title': title, 'level': 3, 'number': number}
+
+        # 第四级：1) 1）
+        if name == 'parenthesis':
+            return {'title': title, 'level': 4, 'number': f"{number})"}
+
+        # 第五级：(1) （1）
+        if name == 'bracket':
+            return {'title': title, 'level': 5, 'number': f"({number})"}
+
+        # 第六级：a) (a)
+        if name == 'letter':
+            return {'title': title, 'level': 6, 'number': f"{number})"}
+
+        return {'title': title, 'level': 6, 'number': f"({number})"}
+
 
 class DocxOutlineExtractor:
     """
     DOCX/DOC文档大纲提取器
     支持 .doc 自动转换为 .docx（依赖 LibreOffice CLI）
     通过正则表达式系统性分析文档结构，提取章节大纲
+
+    读取段落的引擎（engine）：
+        'docx': 使用 python-docx 加载完整文档（默认）
+        'stream': 直接从zip中流式解析 word/document.xml（lxml iterparse），内存占用恒定
     """
     
-    def __init__(self):
+    ENGINES = ('docx', 'stream')
+    
+    # styles.xml 中内置样式名与UI名称的对应关系（与 python-docx BabelFish 一致）
+    ui_style_names = {
+        'caption': 'Caption', 'footer': 'Footer', 'header': 'Header',
+        **{f'heading {i}': f'Heading {i}' for i in range(1, 10)},
+    }
+    
+    def __init__(self, engine: str = 'docx'):
+        if engine not in self.ENGINES:
+            raise ValueError(f"不支持的解析引擎: {engine}，可选: {', '.join(self.ENGINES)}")
+        self.engine = engine
+        
         # 中文数字映射
         self.chinese_numbers = {
             '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
@@ -38,103 +239,544 @@ class DocxOutlineExtractor:
             'date': r'^\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日',  # 过滤日期
             'hash_date': r'^#\s*\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日',  # 过滤# 2024年12月16日
         }
+        
+        # 编号体系判断用的正则（预编译）
+        self.numbering_patterns = {
+            'numeric': re.compile(r'^\d+(?:\.\d+)+\s'),  # 多级数字编号
+            'single_numeric': re.compile(r'^\d+\s+[^\d、)）]'),  # 单级数字编号，如 "1 总论"
+            'chapter': re.compile(r'^(?:第[一二三四五六七八九十\d]+章)'),
+            'chinese_item': re.compile(r'^[一二三四五六七八九十]+、'),
+        }
+        
+        # 段落分类器（过滤 + 章节匹配），每个提取器只构建一次
+        self.classifier = HeadingClassifier(self)
     
-    def _convert_with_libreoffice(self, src: pathlib.Path) -> pathlib.Path:
+    def _convert_with_libreoffice(self, src: pathlib.Path, dst: pathlib.Path) -> pathlib.Path:
+        """
+        使用 LibreOffice 将 .doc 转为 .docx 并保存到 dst。
+        
+        优先使用常驻的 LibreOffice 转换服务（UNO socket，免去每次冷启动）；
+        服务不可用或转换失败时回退到 soffice CLI 子进程。
+        """
+        service = get_libreoffice_service()
+        if service is not None:
+            try:
+                return service.convert(src, dst)
+            except Exception as e:
+                print(f"LibreOffice 转换服务不可用，改用 soffice 子进程转换: {e!r}")
+        
+        return self._convert_with_soffice_cli(src, dst)
+    
+    def _convert_with_soffice_cli(self, src: pathlib.Path, dst: pathlib.Path) -> pathlib.Path:
         """
         使用 LibreOffice CLI 将 .doc 转为 .docx。
         
-        LibreOffice 会把输出文件放到工作目录（缺省是 cwd）。
-        若目标存在则覆盖。
+        LibreOffice 会把输出文件放到 --outdir 指定的目录（文件名取源文件名），这里输出到临时目录后再移动到 dst。
+        每次调用使用独立的临时用户配置目录，避免并发转换争用同一配置目录；超过 CONVERT_TIMEOUT 时结束子进程。
         """
-        soffice = shutil.which("soffice") or shutil.which("libreoffice")
+        soffice = find_soffice()
         if not soffice:
             raise RuntimeError("未找到 LibreOffice，可执行文件 soffice / libreoffice 不在 PATH。\n"
                              "请安装 LibreOffice: sudo apt install libreoffice")
 
-        dst = src.with_suffix(".docx")
-        # --headless: 无界面；--convert-to: 格式；--outdir: 指定输出目录
-        cmd = [
-            soffice,
-            "--headless",
-            "--convert-to",
-            "docx",
-            "--outdir",
-            str(src.parent),
-            str(src),
-        ]
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if proc.returncode:
-            raise RuntimeError(
-                f"LibreOffice 转换失败 (exit {proc.returncode}).\nSTDERR:\n{proc.stderr.decode(errors='ignore')}"
-            )
-        if not dst.exists():
-            raise RuntimeError("LibreOffice 返回 0，但未找到生成的 .docx 文件。")
+        with tempfile.TemporaryDirectory(prefix="lo_convert_") as tmp_dir:
+            profile_dir = pathlib.Path(tmp_dir) / "profile"
+            out_dir = pathlib.Path(tmp_dir) / "out"
+            # --headless: 无界面；--convert-to: 格式；--outdir: 指定输出目录
+            cmd = [
+                soffice,
+                "--headless",
+                f"-env:UserInstallation={profile_dir.as_uri()}",
+                "--convert-to",
+                "docx",
+                "--outdir",
+                str(out_dir),
+                str(src),
+            ]
+            try:
+                proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=CONVERT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                raise RuntimeError(f"LibreOffice 转换超时 ({CONVERT_TIMEOUT}s): {src}")
+            if proc.returncode:
+                raise RuntimeError(
+                    f"LibreOffice 转换失败 (exit {proc.returncode}).\nSTDERR:\n{proc.stderr.decode(errors='ignore')}"
+                )
+            produced = out_dir / f"{src.stem}.docx"
+            if not produced.exists():
+                raise RuntimeError("LibreOffice 返回 0，但未找到生成的 .docx 文件。")
+            shutil.move(str(produced), str(dst))
         return dst
 
-    def _ensure_docx(self, path: Union[str, pathlib.Path]) -> str:
-        """若输入是 .doc，调用 LibreOffice 转换；否则直接返回 .docx 路径。"""
-        p = pathlib.Path(path)
-        if p.suffix.lower() == ".docx":
-            return str(p)
-        if p.suffix.lower() == ".doc":
-            print(f"检测到 .doc 文件，正在转换为 .docx: {p}")
-            converted_path = self._convert_with_libreoffice(p)
-            print(f"转换完成: {converted_path}")
-            return str(converted_path)
+    def _ensure_docx(self, path: DocxInput) -> DocxSource:
+        """
+        若输入是 .doc，转换为 .docx（转换结果按内容缓存，同一 .doc 只转换一次）；
+        否则直接返回 .docx 来源。
+        
+        内存中的 .docx 不落盘，直接从内存读取；内存中的 .doc 写入临时文件后转换。
+        """
+        source = DocxSource.of(path)
+        suffix = source.suffix
+        if suffix == ".docx":
+            return source
+        if suffix == ".doc":
+            if source.in_memory:
+                with tempfile.TemporaryDirectory(prefix="doc_upload_") as tmp_dir:
+                    p = pathlib.Path(tmp_dir) / "upload.doc"
+                    p.write_bytes(source.data)
+                    converted_path = get_conversion_cache().get_or_convert(p, self._convert_with_libreoffice)
+            else:
+                p = pathlib.Path(source.path)
+                converted_path = get_conversion_cache().get_or_convert(p, self._convert_with_libreoffice)
+            print(f".doc 已转换为 .docx: {source.name} -> {converted_path}")
+            return DocxSource.of(str(converted_path))
         raise ValueError("仅支持 .doc / .docx 文件")
 
-    def extract_outline(self, file_path: str, max_depth: int = 6) -> List[Dict]:
+    def extract_outline(self, file_path: DocxInput, max_depth: int = 6, use_cache: bool = True) -> List[Dict]:
         """
         提取文档大纲
         
         Args:
-            file_path: doc/docx文件路径
+            file_path: doc/docx文件路径，或内存中的文件内容（bytes / 二进制流）
             max_depth: 最大级别深度
+            use_cache: 是否使用进程级解析缓存（文件未变化时直接返回上次结果）
             
         Returns:
             章节列表，每个章节包含：title, level, number
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"文件不存在: {file_path}")
+        file_path = DocxSource.of(file_path)
+        
+        if not use_cache:
+            return self._extract_outline(file_path, max_depth)
+        
+        entry = self._get_cached_outline(file_path, max_depth)
+        # 返回副本，避免调用方修改缓存内容
+        return [dict(chapter) for chapter in entry['chapters']]
+    
+    def extract_outline_text(self, file_path: DocxInput, max_depth: int = 6) -> str:
+        """
+        提取文档大纲并格式化为字符串（使用缓存）
+        
+        Args:
+            file_path: doc/docx文件路径，或内存中的文件内容（bytes / 二进制流）
+            max_depth: 最大级别深度
+            
+        Returns:
+            format_outline 格式的大纲字符串
+        """
+        return self._get_cached_outline(DocxSource.of(file_path), max_depth)['outline']
+    
+    def _get_cached_outline(self, file_path: DocxSource, max_depth: int) -> Dict:
+        """
+        获取缓存的大纲（章节列表及格式化字符串），未命中时解析文档
+        
+        进程内缓存未命中时先读取磁盘边车文件，源文件哈希一致则不再解析文档；
+        模板被修改（mtime/size变化）后，以进程内缓存或边车文件中上一版本的提取状态为依据增量更新
+        """
+        cache = get_docx_parse_cache()
+        extra = (max_depth, self.engine)
         
+        def build():
+            store = get_docx_sidecar_store()
+            params = f"max_depth={max_depth};engine={self.engine}"
+            digest = store.source_digest(file_path)
+            stored = store.load('outline', file_path, params)
+            
+            if stored and stored[0] == digest:
+                state = self._outline_state_from_sidecar(stored[1], max_depth)
+            else:
+                previous = cache.find_latest('outline', file_path, extra=extra)
+                if previous:
+                    previous_state = previous['state']
+                elif stored:
+                    previous_state = self._outline_state_from_sidecar(stored[1], max_depth)
+                else:
+                    previous_state = None
+                state = self.extract_outline_state(file_path, max_depth, previous_state=previous_state)
+                store.save('outline', file_path, params, digest, self._outline_state_to_sidecar(state))
+            
+            return {'chapters': state['chapters'], 'outline': self.format_outline(state['chapters']), 'state': state}
+        
+        def size(entry):
+            return len(entry['outline']) * 4 + len(entry['chapters']) * 400 + len(entry['state']['hashes']) * 120
+        
+        return cache.get_or_create('outline', file_path, build, size, extra=extra)
+    
+    def _extract_outline(self, file_path: DocxInput, max_depth: int) -> List[Dict]:
+        """解析文档并提取大纲（不使用缓存）"""
         # 确保是 .docx 格式（如果是 .doc 则自动转换）
         docx_path = self._ensure_docx(file_path)
         
-        # 读取文档
-        doc = Document(docx_path)
-        paragraphs = []
+        # 逐个读取非空段落
+        paragraphs = self._iter_paragraphs(docx_path)
+        
+        # 分析章节体系（只需要前50个段落）
+        head = list(itertools.islice(paragraphs, 50))
+        system_type = self._analyze_numbering_system(head)
+        
+        # 提取章节（其余段落边读取边处理，不整体保存）
+        chapters = self._extract_chapters(itertools.chain(head, paragraphs), system_type, max_depth)
+        
+        return chapters
+    
+    def _iter_paragraphs(self, docx_path: DocxInput) -> Iterator[Dict]:
+        """按当前引擎逐个读取非空段落（docx_path 为 .docx 路径或来源）"""
+        docx_path = DocxSource.of(docx_path)
+        if self.engine == 'stream':
+            return self._iter_paragraphs_stream(docx_path)
+        return self._iter_paragraphs_docx(docx_path)
+    
+    def extract_outline_state(self, file_path: DocxInput, max_depth: int = 6,
+                              previous_state: Optional[Dict] = None) -> Dict:
+        """
+        提取文档大纲，并返回可用于下次增量更新的提取状态
+        
+        状态中保存每个非空段落的内容哈希和分类结果。传入上一版本的状态时，
+        只对内容有变化的段落重新分类，其余段落沿用上次结果，再重新组装章节列表；
+        结果与完整提取完全一致
+        
+        Args:
+            file_path: doc/docx文件路径，或内存中的文件内容（bytes / 二进制流）
+            max_depth: 最大级别深度
+            previous_state: 上一版本文档的提取状态（None 表示完整提取）
+            
+        Returns:
+            提取状态字典：
+            - chapters: 章节列表（与 extract_outline 相同）
+            - positions: 每个章节所在的段落序号（非空段落中的下标）
+            - hashes / infos: 每个非空段落的内容哈希、分类结果
+            - system_type / max_depth / engine: 提取参数
+        """
+        docx_path = self._ensure_docx(file_path)
+        paragraphs = self._iter_paragraphs(docx_path)
+        
+        if previous_state is not None and previous_state['max_depth'] == max_depth \
+                and previous_state['engine'] == self.engine:
+            return self.update_outline_state(previous_state, list(paragraphs))
+        
+        head = list(itertools.islice(paragraphs, 50))
+        system_type = self._analyze_numbering_system(head)
+        
+        hashes = []
+        infos = []
+        for para in itertools.chain(head, paragraphs):
+            hashes.append(self._paragraph_hash(para))
+            infos.append(self._classify_paragraph(para, system_type, max_depth))
+        
+        return self._build_outline_state(hashes, infos, system_type, max_depth)
+    
+    def update_outline_state(self, previous_state: Dict, paragraphs: List[Dict]) -> Dict:
+        """
+        根据新版本文档的段落增量更新提取状态
+        
+        Args:
+            previous_state: 上一版本的提取状态
+            paragraphs: 新版本的全部非空段落（_iter_paragraphs 的结果）
+            
+        Returns:
+            新的提取状态
+        """
+        max_depth = previous_state['max_depth']
+        old_hashes = previous_state['hashes']
+        old_infos = previous_state['infos']
+        hashes = [self._paragraph_hash(para) for para in paragraphs]
         
-        # 提取所有段落
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        # 公共前缀、后缀之外的部分才可能有变化
+        limit = min(len(old_hashes), len(hashes))
+        prefix = 0
+        while prefix < limit and old_hashes[prefix] == hashes[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_hashes[-1 - suffix] == hashes[-1 - suffix]:
+            suffix += 1
+        
+        # 编号体系由前50个段落决定：前部有变化且体系改变时，全部段落都要重新分类
+        system_type = previous_state['system_type']
+        if prefix < 50 and self._analyze_numbering_system(paragraphs[:50]) != system_type:
+            system_type = self._analyze_numbering_system(paragraphs[:50])
+            infos = [self._classify_paragraph(para, system_type, max_depth) for para in paragraphs]
+            return self._build_outline_state(hashes, infos, system_type, max_depth)
+        
+        old_end = len(old_hashes) - suffix
+        new_end = len(hashes) - suffix
+        infos = old_infos[:prefix]
+        
+        # 中间部分按段落哈希比对，只重新分类变化的段落
+        matcher = difflib.SequenceMatcher(None, old_hashes[prefix:old_end], hashes[prefix:new_end], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                infos.extend(old_infos[prefix + i1:prefix + i2])
+            else:
+                infos.extend(self._classify_paragraph(para, system_type, max_depth)
+                             for para in paragraphs[prefix + j1:prefix + j2])
+        
+        infos.extend(old_infos[old_end:])
+        
+        return self._build_outline_state(hashes, infos, system_type, max_depth)
+    
+    def _build_outline_state(self, hashes: List[bytes], infos: List[Optional[Dict]],
+                             system_type: str, max_depth: int) -> Dict:
+        """由段落分类结果组装章节列表（目录过滤规则与 _filter_toc_content 一致）"""
+        positions = [i for i, info in enumerate(infos) if info]
+        candidates = [infos[i] for i in positions]
+        
+        kept = [j for j, chapter in enumerate(candidates) if not self._is_likely_toc_entry(chapter, candidates, j)]
+        
+        return {
+            'chapters': [dict(candidates[j]) for j in kept],
+            'positions': [positions[j] for j in kept],
+            'hashes': hashes,
+            'infos': infos,
+            'system_type': system_type,
+            'max_depth': max_depth,
+            'engine': self.engine,
+        }
+    
+    @staticmethod
+    def _outline_state_to_sidecar(state: Dict) -> Dict:
+        """提取状态 -> 边车文件字段（只保存被识别为章节标题的段落）"""
+        positions = [i for i, info in enumerate(state['infos']) if info]
+        return {
+            'system_type': state['system_type'],
+            'hashes': b''.join(state['hashes']),
+            'positions': positions,
+            'levels': [state['infos'][i]['level'] for i in positions],
+            'numbers': [state['infos'][i]['number'] for i in positions],
+            'titles': [state['infos'][i]['title'] for i in positions],
+        }
+    
+    def _outline_state_from_sidecar(self, fields: Dict, max_depth: int) -> Dict:
+        """边车文件字段 -> 提取状态"""
+        blob = fields['hashes']
+        hashes = [blob[i:i + 8] for i in range(0, len(blob), 8)]
+        infos = [None] * len(hashes)
+        for pos, level, number, title in zip(fields['positions'], fields['levels'], fields['numbers'], fields['titles']):
+            infos[pos] = {'title': title, 'level': level, 'number': number}
+        return self._build_outline_state(hashes, infos, fields['system_type'], max_depth)
+    
+    @staticmethod
+    def _paragraph_hash(para: Dict) -> bytes:
+        """段落内容哈希（文本、样式、大纲级别任一变化都会改变哈希）"""
+        key = f"{para['text']}\x00{para['style'] or ''}\x00{para['level'] or 0}"
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    
+    def _iter_paragraphs_docx(self, docx_path: DocxSource) -> Iterator[Dict]:
+        """
+        使用 python-docx 读取所有非空段落
+        
+        样式名和大纲级别通过预先建立的样式表获取（每个段落一次字典查找），
+        不再逐段落经 Paragraph.style 查询 styles 部件
+        """
+        doc = Document(docx_path.open())
+        style_table, default_style = self._build_style_table(doc.styles.element)
+        
+        # 与 doc.paragraphs 相同：w:body 下的直接 w:p 子元素
+        for p in doc.element.body.iterchildren(qn('w:p')):
+            text = p.text.strip()
             if text:
-                paragraphs.append({
+                style_name, level = self._resolve_paragraph_style(p, style_table, default_style)
+                yield {
                     'text': text,
-                    'style': para.style.name if para.style else None,
-                    'level': self._get_outline_level(para)
-                })
+                    'style': style_name,
+                    'level': level
+                }
+    
+    def _iter_paragraphs_stream(self, docx_path: DocxSource) -> Iterator[Dict]:
+        """
+        流式读取所有非空段落（不构建 python-docx 文档对象）
         
-        # 分析章节体系
-        system_type = self._analyze_numbering_system(paragraphs)
+        与 python-docx 的 doc.paragraphs 保持一致：只读取 w:body 下的直接 w:p 子元素，
+        段落文本、样式名的计算规则与 python-docx 相同；处理完的元素立即清除，内存占用恒定
+        """
+        w_body, w_p, w_tbl = qn('w:body'), qn('w:p'), qn('w:tbl')
         
-        # 提取章节
-        chapters = self._extract_chapters(paragraphs, system_type, max_depth)
+        with zipfile.ZipFile(docx_path.open()) as zf:
+            style_table, default_style = self._load_style_table(zf)
+            
+            with zf.open('word/document.xml') as f:
+                for _, elem in etree.iterparse(f, events=('end',), tag=(w_p, w_tbl)):
+                    parent = elem.getparent()
+                    # 表格内的段落随表格一起清除
+                    if parent is None or parent.tag != w_body:
+                        continue
+                    
+                    if elem.tag == w_p:
+                        text = self._stream_paragraph_text(elem).strip()
+                        if text:
+                            style_name, level = self._resolve_paragraph_style(elem, style_table, default_style)
+                            yield {
+                                'text': text,
+                                'style': style_name,
+                                'level': level
+                            }
+                    
+                    # 释放已处理的元素及其之前的兄弟元素
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del parent[0]
+    
+    def _load_style_table(self, zf: zipfile.ZipFile) -> Tuple[Dict[str, Tuple[Optional[str], Optional[int]]],
+                                                              Tuple[Optional[str], Optional[int]]]:
+        """从 zip 包中的 styles.xml 建立样式表（见 _build_style_table），缺少 styles.xml 时为空表"""
+        try:
+            styles_xml = zf.read('word/styles.xml')
+        except KeyError:
+            return {}, (None, None)
         
-        return chapters
+        return self._build_style_table(etree.fromstring(styles_xml))
     
-    def _get_outline_level(self, paragraph) -> Optional[int]:
-        """获取段落的大纲级别"""
+    def _build_style_table(self, styles_root) -> Tuple[Dict[str, Tuple[Optional[str], Optional[int]]],
+                                                        Tuple[Optional[str], Optional[int]]]:
+        """
+        建立段落样式表 styleId -> (样式名, 大纲级别)，每个文档只建立一次
+        
+        - 样式名为UI名称（如 "Heading 1"），与 python-docx 的解析规则一致：styleId重复时取第一个，
+          默认段落样式取最后一个 w:default 为真的段落样式
+        - 大纲级别取样式 w:pPr/w:outlineLvl，未设置时沿 w:basedOn 链继承；
+          整条链都未设置时按样式名（"Heading N"）判断
+        
+        Args:
+            styles_root: styles.xml 的根元素（w:styles）
+            
+        Returns:
+            (styleId到(样式名, 大纲级别)的映射, 默认段落样式的(样式名, 大纲级别))
+        """
+        w_style, w_name, w_based_on = qn('w:style'), qn('w:name'), qn('w:basedOn')
+        w_type, w_style_id, w_default, w_val = qn('w:type'), qn('w:styleId'), qn('w:default'), qn('w:val')
+        
+        names = {}
+        based_on = {}
+        own_levels = {}
+        default_style_id = None
+        on_values = ('1', 'true', 'on')
+        
+        for style in styles_root.iterchildren(w_style):
+            if style.get(w_type) != 'paragraph':
+                continue
+            
+            style_id = style.get(w_style_id)
+            if style_id is None or style_id in names:
+                continue
+            
+            name_elem = style.find(w_name)
+            name = name_elem.get(w_val) if name_elem is not None else None
+            names[style_id] = self.ui_style_names.get(name, name)
+            
+            based_on_elem = style.find(w_based_on)
+            if based_on_elem is not None:
+                based_on[style_id] = based_on_elem.get(w_val)
+            
+            level = self._outline_level_of(style.find(_W_PPR))
+            if level is not _NO_OUTLINE_LEVEL:
+                own_levels[style_id] = level
+            
+            if style.get(w_default) in on_values:
+                default_style_id = style_id
+        
+        style_table = {}
+        for style_id, name in names.items():
+            # 沿 basedOn 链查找最近的 w:outlineLvl（防止循环引用）
+            current = style_id
+            visited = set()
+            while current in names and current not in own_levels and current not in visited:
+                visited.add(current)
+                current = based_on.get(current)
+            if current in own_levels:
+                level = own_levels[current]
+            else:
+                level = self._outline_level_from_style_name(name)
+            style_table[style_id] = (name, level)
+        
+        default_style = style_table.get(default_style_id, (None, None))
+        return style_table, default_style
+    
+    @staticmethod
+    def _outline_level_of(pPr) -> Any:
+        """
+        读取 w:pPr/w:outlineLvl
+        
+        Returns:
+            大纲级别（w:val 0~8 对应 1~9 级）；w:val 为 9（正文文本）时为 None；
+            未设置或取值无效时为 _NO_OUTLINE_LEVEL
+        """
+        if pPr is None:
+            return _NO_OUTLINE_LEVEL
+        outline = pPr.find(_W_OUTLINE_LVL)
+        if outline is None:
+            return _NO_OUTLINE_LEVEL
         try:
-            if paragraph.style and hasattr(paragraph.style, 'base_style'):
-                style_name = paragraph.style.name
-                if 'Heading' in style_name:
-                    # 提取标题级别
-                    level_match = re.search(r'(\d+)', style_name)
-                    if level_match:
-                        return int(level_match.group(1))
-            return None
-        except:
-            return None
+            value = int(outline.get(_W_VAL))
+        except (TypeError, ValueError):
+            return _NO_OUTLINE_LEVEL
+        if 0 <= value <= 8:
+            return value + 1
+        return None
+    
+    def _resolve_paragraph_style(self, p, style_table: Dict[str, Tuple[Optional[str], Optional[int]]],
+                                 default_style: Tuple[Optional[str], Optional[int]]) -> Tuple[Optional[str], Optional[int]]:
+        """
+        获取段落的样式名和大纲级别
+        
+        与 Paragraph.style 的解析规则一致：未指定或找不到的styleId使用默认段落样式；
+        段落上直接设置的 w:outlineLvl 优先于样式中的大纲级别
+        
+        Returns:
+            (样式名, 大纲级别)
+        """
+        pPr = p.find(_W_PPR)
+        if pPr is None:
+            return default_style
+        
+        pStyle = pPr.find(_W_PSTYLE)
+        style_id = pStyle.get(_W_VAL) if pStyle is not None else None
+        style_name, level = style_table.get(style_id, default_style) if style_id else default_style
+        
+        direct_level = self._outline_level_of(pPr)
+        if direct_level is not _NO_OUTLINE_LEVEL:
+            level = direct_level
+        return style_name, level
+    
+    @staticmethod
+    def _stream_paragraph_text(p) -> str:
+        """计算段落文本（规则同 python-docx 的 Paragraph.text）"""
+        w_r, w_hyperlink = qn('w:r'), qn('w:hyperlink')
+        w_t, w_tab, w_ptab = qn('w:t'), qn('w:tab'), qn('w:ptab')
+        w_br, w_cr, w_nbh = qn('w:br'), qn('w:cr'), qn('w:noBreakHyphen')
+        w_type = qn('w:type')
+        
+        parts = []
+        for child in p:
+            if child.tag == w_r:
+                runs = (child,)
+            elif child.tag == w_hyperlink:
+                runs = [r for r in child if r.tag == w_r]
+            else:
+                continue
+            
+            for run in runs:
+                for e in run:
+                    tag = e.tag
+                    if tag == w_t:
+                        parts.append(e.text or '')
+                    elif tag == w_tab or tag == w_ptab:
+                        parts.append('\t')
+                    elif tag == w_cr:
+                        parts.append('\n')
+                    elif tag == w_br:
+                        if e.get(w_type, 'textWrapping') == 'textWrapping':
+                            parts.append('\n')
+                    elif tag == w_nbh:
+                        parts.append('-')
+        
+        return ''.join(parts)
+    
+    def _outline_level_from_style_name(self, style_name: Optional[str]) -> Optional[int]:
+        """根据样式名（如 "Heading 2"）获取大纲级别"""
+        if style_name and 'Heading' in style_name:
+            # 提取标题级别
+            level_match = re.search(r'(\d+)', style_name)
+            if level_match:
+                return int(level_match.group(1))
+        return None
     
     def _analyze_numbering_system(self, paragraphs: List[Dict]) -> str:
         """
@@ -144,27 +786,27 @@ class DocxOutlineExtractor:
             'numeric': 数字体系 (1, 1.1, 1.1.1)
             'mixed': 混合体系 (第一章, 一、, 1、, 1), (1), a))
         """
-        numeric_pattern = r'^\d+(?:\.\d+)+\s'  # 检查多级数字编号
-        single_numeric_pattern = r'^\d+\s+[^\d、)）]'  # 检查单级数字编号，如 "1 总论"
+        numeric_pattern = self.numbering_patterns['numeric']  # 检查多级数字编号
+        single_numeric_pattern = self.numbering_patterns['single_numeric']  # 检查单级数字编号，如 "1 总论"
         numeric_count = 0
         
-        chapter_pattern = r'^(?:第[一二三四五六七八九十\d]+章)'
-        chinese_item_pattern = r'^[一二三四五六七八九十]+、'
+        chapter_pattern = self.numbering_patterns['chapter']
+        chinese_item_pattern = self.numbering_patterns['chinese_item']
         mixed_indicators = 0
         
         for para in paragraphs[:50]:  # 只检查前50个段落
             text = para['text']
             
             # 检查多级数字编号
-            if re.match(numeric_pattern, text):
+            if numeric_pattern.match(text):
                 numeric_count += 1
             
             # 检查单级数字编号
-            if re.match(single_numeric_pattern, text):
+            elif single_numeric_pattern.match(text):
                 numeric_count += 1
             
             # 检查混合体系指示器
-            if re.match(chapter_pattern, text) or re.match(chinese_item_pattern, text):
+            if chapter_pattern.match(text) or chinese_item_pattern.match(text):
                 mixed_indicators += 1
         
         # 如果有较多的数字编号，认为是数字体系
@@ -178,138 +820,42 @@ class DocxOutlineExtractor:
         chapters = []
         
         for para in paragraphs:
-            text = para['text']
-            
-            # 过滤日期和非章节内容
-            if self._is_filtered_content(text):
-                continue
-            
-            # 尝试正则匹配
-            chapter_info = self._match_chapter_pattern(text, system_type)
-            
-            # 如果正则匹配失败，尝试使用大纲级别
-            if not chapter_info and para['level']:
-                chapter_info = self._extract_by_outline_level(text, para['level'])
-            
-            if chapter_info and chapter_info['level'] <= max_depth:
+            chapter_info = self._classify_paragraph(para, system_type, max_depth)
+            if chapter_info:
                 chapters.append(chapter_info)
         
         return self._filter_toc_content(chapters)
     
-    def _is_filtered_content(self, text: str) -> bool:
-        """过滤不需要的内容"""
-        # 过滤日期
-        if re.match(self.patterns['date'], text) or re.match(self.patterns['hash_date'], text):
-            return True
-        
-        # 过滤目录标识
-        if re.match(r'^目\s*录', text) or re.match(r'^contents?$', text.lower()):
-            return True
-        
-        # 过滤页码行
-        if re.match(r'^\d+\s*$', text):
-            return True
-        
-        # 过滤制表符行（目录中的页码对齐）
-        if '\t' in text and re.match(r'^.+\t+\d+\s*$', text):
-            return True
+    def _classify_paragraph(self, para: Dict, system_type: str, max_depth: int) -> Optional[Dict]:
+        """
+        判断单个段落是否为章节标题
         
-        # 过滤目录内容：章节标题后跟多个空格和页码
-        if re.match(r'^.+\s{3,}\d+\s*$', text):
-            return True
+        Returns:
+            章节信息（title, level, number），不是章节标题或超过最大深度时为 None
+        """
+        text = para['text']
         
-        # 过滤包含详细描述的工具列表项
-        if re.match(r'^\d+\s*、.*[:：]', text):
-            return True
+        # 过滤日期和非章节内容，并尝试正则匹配（单次匹配完成）
+        filtered, chapter_info = self.classifier.classify(text, system_type)
+        if filtered:
+            return None
         
-        # 过滤表格标题行
-        if re.match(r'.*表\s*$', text) and len(text) < 20:
-            return True
+        # 如果正则匹配失败，尝试使用大纲级别
+        if not chapter_info and para['level']:
+            chapter_info = self._extract_by_outline_level(text, para['level'])
         
-        return False
+        if chapter_info and chapter_info['level'] <= max_depth:
+            return chapter_info
+        return None
+    
+    def _is_filtered_content(self, text: str) -> bool:
+        """过滤不需要的内容"""
+        filtered, _ = self.classifier.classify(text, 'numeric')
+        return filtered
     
     def _match_chapter_pattern(self, text: str, system_type: str) -> Optional[Dict]:
-        """匹配章节模式"""
-        
-        if system_type == 'numeric':
-            # 数字体系：优先匹配多级数字编号
-            match = re.match(self.patterns['numeric'], text)
-            if match:
-                number = match.group(1)
-                title = match.group(2).strip()
-                level = len(number.split('.'))
-                return {'title': title, 'level': level, 'number': number}
-            
-            # 检查单级数字编号，如 "1 总论"
-            single_match = re.match(r'^(\d+)\s+([^\d、)）].*)$', text)
-            if single_match:
-                number = single_match.group(1)
-                title = single_match.group(2).strip()
-                # 过滤掉不是真正章节标题的内容
-                if self._is_valid_chapter_title(title):
-                    return {'title': title, 'level': 1, 'number': number}
-        
-        else:  # mixed system
-            # 混合体系：按级别顺序匹配
-            
-            # 第一级：第一章, 第1章
-            match = re.match(self.patterns['chapter'], text)
-            if match:
-                chinese_num = match.group(1)
-                arabic_num = match.group(2)
-                title = match.group(3).strip()
-                if chinese_num:
-                    number = chinese_num
-                else:
-                    number = arabic_num
-                return {'title': title, 'level': 1, 'number': f"第{number}章"}
-            
-            # 第二级：一、二、
-            match = re.match(self.patterns['chinese_item'], text)
-            if match:
-                chinese_num = match.group(1)
-                title = match.group(2).strip()
-                return {'title': title, 'level': 2, 'number': chinese_num}
-            
-            # 第三级：1、1.
-            match = re.match(self.patterns['numbered_item'], text)
-            if match:
-                number = match.group(1)
-                title = match.group(2).strip()
-                # 在混合体系中，检查是否为最高级别的数字
-                if self._is_top_level_number(text, number):
-                    return {'title': title, 'level': 1, 'number': number}
-                else:
-                    return {'title': title, 'level': 3, 'number': number}
-            
-            # 第四级：1) 1）
-            match = re.match(self.patterns['parenthesis'], text)
-            if match:
-                number = match.group(1)
-                title = match.group(2).strip()
-                return {'title': title, 'level': 4, 'number': f"{number})"}
-            
-            # 第五级：(1) （1）
-            match = re.match(self.patterns['bracket'], text)
-            if match:
-                number = match.group(1)
-                title = match.group(2).strip()
-                return {'title': title, 'level': 5, 'number': f"({number})"}
-            
-            # 第六级：a) (a)
-            match = re.match(self.patterns['letter'], text)
-            if match:
-                letter = match.group(1)
-                title = match.group(2).strip()
-                return {'title': title, 'level': 6, 'number': f"{letter})"}
-            
-            match = re.match(self.patterns['bracket_letter'], text)
-            if match:
-                letter = match.group(1)
-                title = match.group(2).strip()
-                return {'title': title, 'level': 6, 'number': f"({letter})"}
-        
-        return None
+        """匹配章节模式（不考虑过滤规则）"""
+        return self.classifier.match_heading(text, system_type)
     
     def _is_top_level_number(self, text: str, number: str) -> bool:
         """
@@ -403,9 +949,9 @@ class DocxOutlineExtractor:
         return '\n'.join(result)
 
 
-def extract_file_outline(file_path: str, max_depth: int = 6, show_details: bool = False):
+def extract_file_outline(file_path: str, max_depth: int = 6, show_details: bool = False, engine: str = 'docx'):
     """提取文件大纲"""
-    extractor = DocxOutlineExtractor()
+    extractor = DocxOutlineExtractor(engine=engine)
     
     if not os.path.exists(file_path):
         print(f"错误: 文件不存在: {file_path}")
@@ -439,6 +985,150 @@ def extract_file_outline(file_path: str, max_depth: int = 6, show_details: bool
         traceback.print_exc()
 
 
+def collect_docx_files(paths: List[str]) -> List[str]:
+    """
+    收集待处理的 .doc/.docx 文件
+    
+    Args:
+        paths: 文件、目录（递归查找）或通配符（支持 **）
+        
+    Returns:
+        去重后的文件路径列表（保持输入顺序）
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(str(p) for p in pathlib.Path(path).rglob('*') if p.is_file())
+        elif glob.has_magic(path):
+            candidates = sorted(glob.glob(path, recursive=True))
+        else:
+            candidates = [path]
+        
+        for candidate in candidates:
+            name = os.path.basename(candidate)
+            # 跳过 Word 打开文档时生成的 ~$ 临时文件
+            if pathlib.Path(candidate).suffix.lower() in ('.doc', '.docx') and not name.startswith('~$'):
+                files.append(candidate)
+    
+    return list(dict.fromkeys(files))
+
+
+def _extract_outline_job(file_path: str, max_depth: int, engine: str) -> Dict:
+    """批量模式的单个任务（在工作进程中执行）"""
+    start = time.perf_counter()
+    result = {'file': file_path, 'chapters': None, 'seconds': None, 'error': None}
+    try:
+        extractor = DocxOutlineExtractor(engine=engine)
+        result['chapters'] = extractor.extract_outline(file_path, max_depth=max_depth, use_cache=False)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _failed_job(file_path: str, error: Exception, prefix: str = '') -> Dict:
+    """构造未能取得结果的任务对应的 JSONL 错误行（字段与 _extract_outline_job 一致）"""
+    return {'file': file_path, 'chapters': None, 'seconds': None,
+            'error': f"{prefix}{type(error).__name__}: {error}"}
+
+
+def _run_isolated(files: List[str], max_depth: int, engine: str):
+    """
+    逐个在单进程池中重新处理文件，找出使工作进程崩溃的文件
+
+    Yields:
+        每个文件的结果；崩溃的文件输出错误行，并为其余文件换用新的进程池
+    """
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+    try:
+        for file_path in files:
+            future = executor.submit(_extract_outline_job, file_path, max_depth, engine)
+            try:
+                yield future.result()
+            except BrokenProcessPool as e:
+                executor.shutdown(wait=False)
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+                yield _failed_job(file_path, e, "工作进程异常退出: ")
+            except Exception as e:
+                yield _failed_job(file_path, e)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def extract_outlines_batch(paths: List[str], max_depth: int = 6, engine: str = 'docx',
+                           jobs: Optional[int] = None, output=None):
+    """
+    批量提取大纲：用进程池并行处理，每完成一个文件输出一行 JSON，最后在 stderr 输出吞吐量汇总
+    
+    某个工作进程异常退出（内存不足、lxml / soffice 崩溃）时进程池整体失效，未完成的文件
+    改为逐个在单独的进程池中重新处理：崩溃的文件输出错误行，其余文件照常输出
+    
+    Args:
+        paths: 文件、目录或通配符
+        max_depth: 最大级别深度
+        engine: 段落读取引擎
+        jobs: 并行进程数（默认为CPU核数，必须 >= 1）
+        output: JSONL 输出流（默认 stdout）
+    """
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"并行进程数必须 >= 1: {jobs}")
+    output = output or sys.stdout
+    files = collect_docx_files(paths)
+    if not files:
+        print("错误: 未找到任何 .doc/.docx 文件", file=sys.stderr)
+        return
+    
+    jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+    start = time.perf_counter()
+    succeeded, failed, chapter_count, busy_seconds = 0, 0, 0, 0.0
+    
+    def emit(result):
+        nonlocal succeeded, failed, chapter_count, busy_seconds
+        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+        output.flush()
+        
+        busy_seconds += result['seconds'] or 0.0
+        if result['error']:
+            failed += 1
+        else:
+            succeeded += 1
+            chapter_count += len(result['chapters'])
+    
+    unfinished = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(files))) as executor:
+        futures = {executor.submit(_extract_outline_job, f, max_depth, engine): f for f in files}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                unfinished.append(futures[future])
+                continue
+            except Exception as e:
+                result = _failed_job(futures[future], e)
+            emit(result)
+    
+    if unfinished:
+        print(f"工作进程异常退出，逐个重新处理 {len(unfinished)} 个未完成的文件", file=sys.stderr)
+        for result in _run_isolated(sorted(unfinished), max_depth, engine):
+            emit(result)
+    
+    elapsed = time.perf_counter() - start
+    print(
+        f"完成 {len(files)} 个文件（成功 {succeeded}，失败 {failed}），共 {chapter_count} 个章节；"
+        f"耗时 {elapsed:.2f}s，吞吐量 {len(files) / elapsed:.2f} 文件/秒，"
+        f"单文件平均 {busy_seconds / len(files):.3f}s，并行进程 {min(jobs, len(files))}",
+        file=sys.stderr
+    )
+
+
+def _positive_int(value: str) -> int:
+    """argparse 类型：正整数"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"必须是正整数: {value}")
+    return number
+
+
 def main():
     """主函数，处理命令行参数"""
     parser = argparse.ArgumentParser(
@@ -449,6 +1139,13 @@ def main():
   python from_server_docx_outline.py 我的模板.docx
   python from_server_docx_outline.py 报告.doc --max-depth 4
   python from_server_docx_outline.py 文档.docx --details
+  python from_server_docx_outline.py 大模板.docx --engine stream
+  python from_server_docx_outline.py uploads/template/ --jobs 8 > outlines.jsonl
+  python from_server_docx_outline.py "uploads/**/*.doc*" --jsonl
+
+批量模式:
+  传入多个文件、目录或通配符，或指定 --jobs / --jsonl 时，使用进程池并行处理，
+  每个文件输出一行 JSON（file, chapters, seconds, error），吞吐量汇总输出到 stderr
 
 依赖要求:
   - 处理 .doc 文件需要安装 LibreOffice:
@@ -459,7 +1156,8 @@ def main():
     
     parser.add_argument(
         'file_path', 
-        help='要分析的 DOC/DOCX 文件路径'
+        nargs='+',
+        help='要分析的 DOC/DOCX 文件路径（批量模式下可为多个文件、目录或通配符）'
     )
     
     parser.add_argument(
@@ -475,10 +1173,36 @@ def main():
         help='显示详细信息'
     )
     
+    parser.add_argument(
+        '--engine',
+        choices=DocxOutlineExtractor.ENGINES,
+        default='docx',
+        help='段落读取引擎: docx(python-docx) 或 stream(lxml流式解析，适合大文档) (默认: docx)'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        type=_positive_int,
+        help='批量模式并行进程数 (默认: CPU核数)'
+    )
+    
+    parser.add_argument(
+        '--jsonl',
+        action='store_true',
+        help='以批量模式输出 JSON Lines'
+    )
+    
     args = parser.parse_args()
     
-    # 执行大纲提取
-    extract_file_outline(args.file_path, args.max_depth, args.details)
+    paths = args.file_path
+    batch = (args.jsonl or args.jobs is not None or len(paths) > 1
+             or os.path.isdir(paths[0]) or glob.has_magic(paths[0]))
+    
+    if batch:
+        extract_outlines_batch(paths, args.max_depth, args.engine, args.jobs)
+    else:
+        # 执行大纲提取
+        extract_file_outline(paths[0], args.max_depth, args.details, args.engine)
 
 
 if __name__ == "__main__":
@@ -2,15 +2,136 @@
 # -*- coding: utf-8 -*-
 
 import re
+import bisect
+import difflib
 import pathlib
 import os
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Iterator, Iterable
 from docx import Document
-from docx.table import Table
-from docx.text.paragraph import Paragraph
+from docx.oxml.ns import qn
 import argparse
 
 from from_server_docx_outline import DocxOutlineExtractor
+from from_server_docx_cache import get_docx_parse_cache
+from from_server_docx_sidecar import get_docx_sidecar_store
+from from_server_docx_source import DocxSource, DocxInput
+
+# 表格读取用到的 WordprocessingML 标签和属性
+_TR = qn('w:tr')
+_TR_PR = qn('w:trPr')
+_GRID_BEFORE = qn('w:gridBefore')
+_TC = qn('w:tc')
+_TC_PR = qn('w:tcPr')
+_GRID_SPAN = qn('w:gridSpan')
+_V_MERGE = qn('w:vMerge')
+_P = qn('w:p')
+_R = qn('w:r')
+_HYPERLINK = qn('w:hyperlink')
+_T = qn('w:t')
+_VAL = qn('w:val')
+_TBL = qn('w:tbl')
+_TBL_GRID = qn('w:tblGrid')
+_GRID_COL = qn('w:gridCol')
+# 除 w:t 外计入文本的 run 子元素（与 python-docx 的 CT_R.text 一致，由元素的 __str__ 转换）
+_RUN_TEXT_TAGS = frozenset(qn(tag) for tag in ('w:br', 'w:cr', 'w:noBreakHyphen', 'w:ptab', 'w:tab'))
+
+# 章节索引边车文件的参数（大纲提取深度，变化时需要重建边车文件）
+SIDECAR_PARAMS = "max_depth=8"
+
+# 按 token 数限制篇幅时的换算比例（中文为主的文本，粗略估算每个 token 约 1.5 个字符）
+CHARS_PER_TOKEN = 1.5
+
+# 篇幅超出限制后插入的提示
+TRUNCATED_NOTICE = "[篇幅限制：以下内容已省略，仅保留章节标题结构]"
+
+
+class TableGrid:
+    """
+    表格的单元格网格（加载时一次读出，不引用 XML 元素）
+
+    Attributes:
+        rows: 非空行的单元格文本（见 DocxParser._read_table_grid）
+        row_count: 表格行数（w:tr 个数，含空行）
+        col_count: 网格列数（w:gridCol 个数）
+    """
+    __slots__ = ('rows', 'row_count', 'col_count')
+
+    def __init__(self, rows: Tuple[Tuple[str, ...], ...], row_count: int, col_count: int):
+        self.rows = rows
+        self.row_count = row_count
+        self.col_count = col_count
+
+
+class ParagraphRecord:
+    """
+    文档主体中的一个元素（段落或表格）
+
+    只保存提取章节内容需要的数据，不引用 python-docx 对象，
+    文档解析完成后整棵 lxml 树即可释放
+
+    Attributes:
+        kind: 'paragraph' 或 'table'
+        text: 段落文本（已去除首尾空白），表格为空字符串
+        style_id: 段落样式 ID（未指定时为 None），表格为 None
+        table: 表格网格，段落为 None
+    """
+    __slots__ = ('kind', 'text', 'style_id', 'table')
+
+    def __init__(self, kind: str, text: str = '', style_id: Optional[str] = None,
+                 table: Optional[TableGrid] = None):
+        self.kind = kind
+        self.text = text
+        self.style_id = style_id
+        self.table = table
+
+
+class ChapterSection:
+    """
+    章节索引项：章节及其在文档主体中的 [start, end) 范围
+
+    Attributes:
+        index: 章节在 DocxParser.chapters 中的下标
+        chapter: 章节信息（DocxOutlineExtractor 输出的章节字典）
+        key: 规范化章节编号
+        sort_key: 排序键
+        level: 按编号计算的章节级别
+        start: 标题段落位置（未找到为 None）
+        end: 结束位置（未找到为 None）
+    """
+    __slots__ = ('index', 'chapter', 'key', 'sort_key', 'level', 'start', 'end')
+
+    def __init__(self, index: int, chapter: Dict, key: Any, sort_key: Any, level: int,
+                 start: Optional[int], end: Optional[int]):
+        self.index = index
+        self.chapter = chapter
+        self.key = key
+        self.sort_key = sort_key
+        self.level = level
+        self.start = start
+        self.end = end
+
+
+def _run_text(r) -> str:
+    """w:r 的文本（等价于 python-docx 的 CT_R.text，用 iterchildren 代替逐次 xpath）"""
+    parts = []
+    for child in r.iterchildren():
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or "")
+        elif tag in _RUN_TEXT_TAGS:
+            parts.append(str(child))
+    return "".join(parts)
+
+
+def _paragraph_text(p) -> str:
+    """w:p 的文本（等价于 Paragraph.text，包含超链接中的文本）"""
+    parts = []
+    for child in p.iterchildren(_R, _HYPERLINK):
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        else:
+            parts.extend(_run_text(r) for r in child.iterchildren(_R))
+    return "".join(parts)
 
 
 class DocxParser:
@@ -19,351 +140,890 @@ class DocxParser:
     基于DocxOutlineExtractor的章节结构分析，提取指定章节的详细内容
     """
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: DocxInput, use_cache: bool = True):
         """
         初始化DocxParser
         
         Args:
-            file_path: doc/docx文件路径
+            file_path: doc/docx文件路径，或内存中的文件内容（bytes / 二进制流，如上传接口、WOPI GetFile 的数据）
+            use_cache: 是否使用进程级解析缓存（同一模板未变化时不再重复解析）
         """
-        self.file_path = file_path
+        self.source = DocxSource.of(file_path)
+        self.file_path = self.source.name
+        self.use_cache = use_cache
         self.outline_extractor = DocxOutlineExtractor()
         self.docx_path = None
-        self.doc = None
         self.chapters = []
         self.paragraphs = []
+        self._sections = []
+        self._section_index = {}
+        self._numeric_keys = []
+        self._text_keys = []
+        self._heading_positions = []
+        self._heading_position_levels = []
+        self._heading_position_chapters = []
+        self._heading_position_chapter_indices = []
+        self._boundary_positions = {}
+        self._body_length = 0
+        # 增量更新索引所需：各段落文本哈希、(标题, 编号) -> 匹配段落位置（从边车文件恢复时为 None）
+        self._paragraph_hashes = None
+        self._title_matches = None
         self._load_document()
     
     def _load_document(self):
-        """加载文档并提取章节结构"""
-        if not os.path.exists(self.file_path):
-            raise FileNotFoundError(f"文件不存在: {self.file_path}")
+        """加载文档并提取章节结构（优先使用缓存的解析结果）"""
+        if not self.use_cache:
+            self._parse_document()
+            return
+        
+        state = get_docx_parse_cache().get_or_create(
+            'parser', self.source, self._parse_document,
+            lambda state: len(state['chapters']) * 600 + len(state['_heading_positions']) * 100
+            + len(state['_paragraph_hashes'] or ()) * 50
+        )
+        # 章节索引在多个DocxParser实例间共享（内部只读）；
+        # 对外公开的章节列表每个实例各自复制一份，调用方修改不会影响缓存
+        self.__dict__.update(state)
+        self.chapters = [dict(chapter) for chapter in state['chapters']]
+    
+    def _parse_document(self) -> Dict[str, Any]:
+        """
+        提取章节结构并建立章节索引
         
-        # 确保是 .docx 格式（如果是 .doc 则自动转换）
-        self.docx_path = self.outline_extractor._ensure_docx(self.file_path)
+        使用缓存时优先读取边车文件：源文件哈希一致则直接恢复索引，不解析文档，
+        文档主体在第一次提取章节内容时才加载（见 _ensure_body）；
+        模板被修改后，以进程内缓存中上一版本的索引为基础增量更新（见 _build_section_index）
+        
+        Returns:
+            章节索引状态（用于写入缓存）
+        """
+        store = get_docx_sidecar_store() if self.use_cache else None
+        if store is not None:
+            digest = store.source_digest(self.source)
+            stored = store.load('parser', self.source, SIDECAR_PARAMS)
+            if stored and stored[0] == digest:
+                self._restore_index(stored[1])
+                return self._index_state()
         
-        # 加载文档
-        self.doc = Document(self.docx_path)
+        # 加载文档主体
+        self._ensure_body()
         
         # 获取章节结构 - 直接使用已转换的docx路径，避免重复转换
-        self.chapters = self.outline_extractor.extract_outline(self.docx_path, max_depth=8)
+        self.chapters = self.outline_extractor.extract_outline(self.docx_path, max_depth=8, use_cache=self.use_cache)
         
-        # 获取所有段落信息
-        self._extract_paragraphs()
+        # 建立章节索引（模板修改后基于上一版本增量更新）
+        previous = get_docx_parse_cache().find_latest('parser', self.source) if self.use_cache else None
+        self._build_section_index(previous)
+        
+        if store is not None:
+            store.save('parser', self.source, SIDECAR_PARAMS, digest, self._index_to_sidecar())
+        
+        return self._index_state()
     
-    def _extract_paragraphs(self):
-        """提取所有段落信息，包括文本和表格"""
-        self.paragraphs = []
+    def _index_state(self) -> Dict[str, Any]:
+        """章节索引相关的属性（不含文档主体）"""
+        return {
+            key: value for key, value in vars(self).items()
+            if key not in ('source', 'file_path', 'use_cache', 'outline_extractor', 'docx_path', 'paragraphs')
+        }
+    
+    def _ensure_body(self):
+        """
+        加载文档主体（self.docx_path、self.paragraphs），已加载时直接返回
         
-        # 使用更简单的方法：直接遍历段落和表格
-        # 为了保持顺序，我们需要通过document的body元素来获取
-        for element in self.doc.element.body:
-            if element.tag.endswith('p'):  # 段落
-                para = None
-                for p in self.doc.paragraphs:
-                    if p._element == element:
-                        para = p
-                        break
-                
-                if para:
-                    self.paragraphs.append({
-                        'type': 'paragraph',
-                        'element': para,
-                        'text': para.text.strip(),
-                        'style': para.style.name if para.style else None
-                    })
-            
-            elif element.tag.endswith('tbl'):  # 表格
-                table = None
-                for t in self.doc.tables:
-                    if t._element == element:
-                        table = t
-                        break
-                
-                if table:
-                    self.paragraphs.append({
-                        'type': 'table',
-                        'element': table,
-                        'text': '',
-                        'style': None
-                    })
+        使用缓存时文档主体单独缓存，从边车文件恢复索引的实例也只在需要章节内容时才加载
+        """
+        if self.docx_path is not None:
+            return
+        
+        if self.use_cache:
+            body = get_docx_parse_cache().get_or_create(
+                'body', self.source, self._parse_body, self._estimate_body_size
+            )
+        else:
+            body = self._parse_body()
+        
+        self.__dict__.update(body)
     
-    def get_chapter(self, chapter_number: str) -> str:
+    def _parse_body(self) -> Dict[str, Any]:
+        """
+        加载文档并提取所有段落信息
+        
+        段落记录不引用 python-docx 对象，提取完成后 Document 及其 lxml 树随即释放
+        
+        Returns:
+            {'docx_path', 'paragraphs'}
+        """
+        # 确保是 .docx 格式（如果是 .doc 则自动转换）
+        docx_path = self.outline_extractor._ensure_docx(self.source)
+        
+        # 获取所有段落信息（Document 只在提取期间存活）
+        self.paragraphs = self._extract_paragraphs(Document(docx_path.open()))
+        self.docx_path = docx_path
+        
+        return {'docx_path': self.docx_path, 'paragraphs': self.paragraphs}
+    
+    @staticmethod
+    def _extract_paragraphs(doc) -> List[ParagraphRecord]:
+        """
+        提取所有段落信息，包括文本和表格
+
+        按body子元素顺序单遍遍历，直接读取 XML 元素（避免为每个元素在doc.paragraphs/doc.tables中线性查找）；
+        表格在此时按网格读出单元格文本，之后不再需要文档对象
+        
+        Args:
+            doc: python-docx Document
+            
+        Returns:
+            段落记录列表
+        """
+        paragraphs = []
+
+        for element in doc.element.body.iterchildren():
+            if element.tag == _P:  # 段落
+                paragraphs.append(ParagraphRecord('paragraph', _paragraph_text(element).strip(), element.style))
+
+            elif element.tag == _TBL:  # 表格
+                paragraphs.append(ParagraphRecord('table', table=DocxParser._read_table(element)))
+
+        return paragraphs
+    
+    @staticmethod
+    def _read_table(tbl) -> TableGrid:
+        """读取表格网格（只保留非空行）和行列数"""
+        grid = tbl.find(_TBL_GRID)
+        return TableGrid(
+            tuple(tuple(row) for row in DocxParser._read_table_grid(tbl) if any(row)),
+            len(tbl.findall(_TR)),
+            len(grid.findall(_GRID_COL)) if grid is not None else 0,
+        )
+    
+    @staticmethod
+    def _estimate_body_size(body: Dict[str, Any]) -> int:
+        """估算文档主体（段落记录）的内存占用：每条记录约 150 字节，文本按每字符 2 字节计"""
+        size = 0
+        for record in body['paragraphs']:
+            size += 150 + 2 * len(record.text)
+            if record.table is not None:
+                size += sum(80 + sum(60 + 2 * len(cell) for cell in row) for row in record.table.rows)
+        return size
+
+    def _build_section_index(self, previous: Optional[Dict[str, Any]] = None):
+        """
+        建立章节索引（加载时执行一次）
+
+        - 定位每个章节标题在 self.paragraphs 中的位置
+        - 计算每个章节在文档中的 [start, end) 范围
+        - 按规范化章节编号（如 ('3', '2')）建立 编号 -> 章节/子章节 的映射，
+          并保存排序后的数字编号列表，用于按前缀（二分查找）获取子树
+
+        建立索引后，get_chapter 只需字典查找加切片，耗时与文档大小无关
+
+        Args:
+            previous: 同一模板上一版本的索引状态（_index_state 的结果）；其中有标题匹配结果时
+                只在变化的段落中重新定位标题（见 _update_title_matches），结果与完整建立相同
+        """
+        # 文本哈希只在进程内（缓存中的上一版本）比对，不写入边车文件，直接用内置 hash
+        self._paragraph_hashes = [hash(p.text) for p in self.paragraphs]
+        if previous is not None and previous.get('_title_matches') is not None:
+            heading_matches = self._update_title_matches(previous)
+        else:
+            heading_matches = self._locate_chapter_titles()
+        self._title_matches = heading_matches
+
+        self._build_heading_positions(heading_matches)
+
+        starts = []
+        ends = []
+        for chapter in self.chapters:
+            number = chapter.get('number', '')
+            level = len(number.split('.')) if number else 0
+            matches = heading_matches.get((chapter['title'], number), [])
+
+            start = matches[0] if matches else None
+            starts.append(start)
+            ends.append(self._find_next_sibling_chapter_in_doc(start, level) if start is not None else None)
+
+        self._body_length = len(self.paragraphs)
+        self._index_sections(starts, ends)
+
+    def _index_sections(self, starts: List[Optional[int]], ends: List[Optional[int]]):
+        """
+        由各章节的 [start, end) 范围建立 编号 -> 章节/子章节 的映射
+
+        Args:
+            starts: 每个章节标题的位置（未找到为 None）
+            ends: 每个章节的结束位置（未找到为 None）
+        """
+        self._sections = []
+        self._section_index = {}
+
+        for index, (chapter, start, end) in enumerate(zip(self.chapters, starts, ends)):
+            number = chapter.get('number', '')
+            level = len(number.split('.')) if number else 0
+
+            key = self._normalize_chapter_number(number)
+            section = ChapterSection(index, chapter, key, self._get_sort_key(key), level, start, end)
+            self._sections.append(section)
+
+            entry = self._section_index.setdefault(key, {'sections': [], 'children': []})
+            entry['sections'].append(section)
+
+        # 数字编号按元组排序，同一前缀的编号在列表中连续
+        self._numeric_keys = sorted(key for key in self._section_index if isinstance(key, tuple))
+        self._text_keys = [key for key in self._section_index if not isinstance(key, tuple)]
+
+        # 子章节列表：规范化编号恰好多一级的章节编号
+        for key in self._numeric_keys:
+            parent_key = key[:-1]
+            if parent_key in self._section_index:
+                self._section_index[parent_key]['children'].append(key)
+
+    def _build_heading_positions(self, heading_matches: Dict[Tuple[str, str], List[int]]):
+        """
+        记录章节标题在 self.paragraphs 中的位置和级别（加载时执行一次）
+
+        - self._heading_positions / self._heading_position_levels / self._heading_position_chapters：
+          按位置升序排列的标题位置及其级别、章节信息
+          （同一段落匹配多个章节时取最小级别；与原逻辑一致，只有编号非空的章节标题才能作为边界）
+        - self._boundary_positions[level]：级别 <= level 的标题位置（升序），
+          查找章节结束位置时只需在对应列表中二分查找
+
+        Args:
+            heading_matches: (标题, 编号) -> 匹配段落位置列表
+        """
+        levels = {}
+        chapter_indices = {}
+        for index, chapter in enumerate(self.chapters):
+            number = chapter.get('number', '')
+            if not number:
+                continue
+            level = len(number.split('.'))
+            for pos in heading_matches.get((chapter['title'], number), []):
+                if level < levels.get(pos, level + 1):
+                    levels[pos] = level
+                    chapter_indices[pos] = index
+
+        positions = sorted(levels)
+        self._set_heading_positions(positions, [levels[pos] for pos in positions],
+                                    [chapter_indices[pos] for pos in positions])
+
+    def _set_heading_positions(self, positions: List[int], levels: List[int], chapter_indices: List[int]):
+        """
+        设置标题位置表并建立各级别的边界位置列表
+
+        Args:
+            positions: 标题位置（升序）
+            levels: 各标题的级别
+            chapter_indices: 各标题对应的章节在 self.chapters 中的下标
+        """
+        self._heading_positions = positions
+        self._heading_position_levels = levels
+        self._heading_position_chapter_indices = chapter_indices
+        self._heading_position_chapters = [self.chapters[i] for i in chapter_indices]
+
+        self._boundary_positions = {}
+        for level in sorted(set(self._heading_position_levels)):
+            self._boundary_positions[level] = [
+                pos for pos, pos_level in zip(self._heading_positions, self._heading_position_levels)
+                if pos_level <= level
+            ]
+
+    def _index_to_sidecar(self) -> Dict[str, Any]:
+        """章节索引 -> 边车文件字段"""
+        return {
+            'body_length': [self._body_length],
+            'levels': [chapter['level'] for chapter in self.chapters],
+            'numbers': [chapter['number'] for chapter in self.chapters],
+            'titles': [chapter['title'] for chapter in self.chapters],
+            'starts': [-1 if s.start is None else s.start for s in self._sections],
+            'ends': [-1 if s.end is None else s.end for s in self._sections],
+            'heading_positions': self._heading_positions,
+            'heading_levels': self._heading_position_levels,
+            'heading_chapters': self._heading_position_chapter_indices,
+        }
+
+    def _restore_index(self, fields: Dict[str, Any]):
+        """
+        由边车文件字段恢复章节列表和章节索引（不加载文档）
+
+        Args:
+            fields: 边车文件字段
+        """
+        self.chapters = [
+            {'title': title, 'level': level, 'number': number}
+            for title, level, number in zip(fields['titles'], fields['levels'], fields['numbers'])
+        ]
+        self._body_length = fields['body_length'][0]
+        self._set_heading_positions(fields['heading_positions'], fields['heading_levels'], fields['heading_chapters'])
+        self._index_sections([None if start < 0 else start for start in fields['starts']],
+                             [None if end < 0 else end for end in fields['ends']])
+
+    def _locate_chapter_titles(self, keys: Optional[Iterable[Tuple[str, str]]] = None,
+                               positions: Optional[List[int]] = None) -> Dict[Tuple[str, str], List[int]]:
+        """
+        查找每个章节标题匹配的全部段落位置
+
+        匹配规则仍由 _is_chapter_title_match 决定；由于匹配要求段落包含"编号+分隔符+标题"，
+        先在拼接后的全文中用 str.find 找出包含这些模式的段落作为候选，
+        避免对每个（段落, 章节）组合都调用匹配函数
+
+        Args:
+            keys: 要查找的 (标题, 编号)，默认为全部章节
+            positions: 只在这些段落位置（升序）中查找，默认为全部段落
+
+        Returns:
+            (标题, 编号) -> 匹配段落位置列表（升序）
+        """
+        if keys is None:
+            keys = [(chapter['title'], chapter.get('number', '')) for chapter in self.chapters]
+        if positions is None:
+            positions = range(len(self.paragraphs))
+
+        texts = [self.paragraphs[i].text for i in positions]
+        # 段落文本中不会出现 \x00，可安全用作分隔符
+        full_text = '\x00'.join(texts)
+        offsets = []
+        offset = 0
+        for text in texts:
+            offsets.append(offset)
+            offset += len(text) + 1
+
+        matches = {}
+        for key in keys:
+            title, number = key
+            if key in matches:
+                continue
+
+            # 编号为空时 _is_chapter_title_match 不会匹配任何段落
+            candidates = set()
+            if number:
+                for pattern in (f"{number} {title}", f"{number}{title}", f"{number}、{title}", f"{number}．{title}"):
+                    found = full_text.find(pattern)
+                    while found != -1:
+                        i = bisect.bisect_right(offsets, found) - 1
+                        candidates.add(i)
+                        found = full_text.find(pattern, offsets[i] + len(texts[i]) + 1)
+
+            matches[key] = [
+                positions[i] for i in sorted(candidates)
+                if self._is_chapter_title_match(texts[i], title, number)
+            ]
+
+        return matches
+
+    def _update_title_matches(self, previous: Dict[str, Any]) -> Dict[Tuple[str, str], List[int]]:
+        """
+        以上一版本的标题匹配结果为基础，增量定位章节标题
+
+        标题匹配只取决于段落文本：按文本哈希比对新旧两版段落，未变化段落的匹配结果平移到新位置沿用，
+        已有章节只在变化的段落中查找，新出现的 (标题, 编号) 才在全文中查找
+
+        Args:
+            previous: 上一版本的索引状态
+
+        Returns:
+            (标题, 编号) -> 匹配段落位置列表（升序），与 _locate_chapter_titles() 的结果相同
+        """
+        blocks, changed = self._diff_paragraphs(previous['_paragraph_hashes'], self._paragraph_hashes)
+        block_starts = [old_start for old_start, _, _ in blocks]
+
+        def shift(pos):
+            k = bisect.bisect_right(block_starts, pos) - 1
+            if k >= 0:
+                old_start, new_start, length = blocks[k]
+                if pos < old_start + length:
+                    return new_start + pos - old_start
+            return None
+
+        old_matches = previous['_title_matches']
+        keys = dict.fromkeys((chapter['title'], chapter.get('number', '')) for chapter in self.chapters)
+        known = [key for key in keys if key in old_matches]
+
+        new_keys = [key for key in keys if key not in old_matches]
+        matches = self._locate_chapter_titles(new_keys) if new_keys else {}
+        found = self._locate_chapter_titles(known, changed)
+        for key in known:
+            kept = [new_pos for new_pos in map(shift, old_matches[key]) if new_pos is not None]
+            matches[key] = sorted(kept + found[key]) if found[key] else kept
+
+        return matches
+
+    @staticmethod
+    def _diff_paragraphs(old_hashes: List[int], hashes: List[int]) -> Tuple[List[Tuple[int, int, int]], List[int]]:
+        """
+        比对新旧两版段落的文本哈希
+
+        Args:
+            old_hashes: 上一版本各段落的文本哈希
+            hashes: 新版本各段落的文本哈希
+
+        Returns:
+            (未变化的段落块列表 [(旧起始位置, 新起始位置, 长度)]（按位置升序）, 新版本中变化的段落位置列表)
+        """
+        # 公共前缀、后缀之外的部分才可能有变化
+        limit = min(len(old_hashes), len(hashes))
+        prefix = 0
+        while prefix < limit and old_hashes[prefix] == hashes[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_hashes[-1 - suffix] == hashes[-1 - suffix]:
+            suffix += 1
+
+        old_end = len(old_hashes) - suffix
+        new_end = len(hashes) - suffix
+        blocks = [(0, 0, prefix)]
+        changed = []
+
+        matcher = difflib.SequenceMatcher(None, old_hashes[prefix:old_end], hashes[prefix:new_end], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                blocks.append((prefix + i1, prefix + j1, i2 - i1))
+            else:
+                changed.extend(range(prefix + j1, prefix + j2))
+
+        blocks.append((old_end, new_end, suffix))
+        return [block for block in blocks if block[2]], changed
+
+
+    def get_chapter(self, chapter_number: str, max_chars: Optional[int] = None,
+                    max_tokens: Optional[int] = None) -> str:
         """
         获取指定章节的内容
         
         Args:
             chapter_number: 章节编号，如 "3.2"
+            max_chars: 内容最大字符数（None 表示不限制）
+            max_tokens: 内容最大 token 数（近似，按 CHARS_PER_TOKEN 换算为字符数）
             
         Returns:
-            章节内容字符串
+            章节内容字符串；超出篇幅时其余正文被省略，
+            只保留后续章节标题，被省略的表格以"N 行 × M 列"概括
         """
         if not self.chapters:
             return "未找到任何章节结构"
         
         # 查找目标章节及其子章节
-        target_chapters = self._find_target_chapters(chapter_number)
+        target_sections = self._find_target_chapters(chapter_number)
         
-        if not target_chapters:
+        if not target_sections:
             return f"未找到章节 {chapter_number}"
         
-        # 提取章节内容
-        content = self._extract_chapter_content(target_chapters)
+        # 章节标题位置已在加载时确定，如果没有找到任何章节位置，返回提示
+        if not any(s.start is not None for s in target_sections):
+            return "未找到指定章节的内容"
         
-        return content
+        self._ensure_body()
+        budget = self._make_budget(max_chars, max_tokens)
+        return self.render_blocks(self._iter_section_blocks(target_sections, budget))
     
-    def _find_target_chapters(self, chapter_number: str) -> List[Dict]:
+    def iter_chapter(self, chapter_number: str, max_chars: Optional[int] = None,
+                     max_tokens: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         """
-        查找目标章节及其所有子章节
+        按文档顺序逐块生成指定章节的内容（惰性生成，调用方可随时停止）
+        
+        块类型：
+        - {'type': 'heading', 'text', 'number', 'title', 'level'}：章节标题
+        - {'type': 'paragraph', 'text'}：正文段落（不含空段落）
+        - {'type': 'table_start', 'rows', 'cols'} / {'type': 'table_row', 'cells'} / {'type': 'table_end'}：
+          表格，rows/cols 为表格的行数、网格列数，table_row 只包含非空行
+        
+        设置篇幅限制时，超出部分不再读取：先生成一个 {'type': 'truncated', 'text'} 提示块，
+        之后只生成章节标题（'omitted': True）和被省略表格的 {'type': 'table_summary', 'rows', 'cols'}；
+        表格写到一半超出时，table_end 带有 'omitted_rows'
         
         Args:
             chapter_number: 章节编号，如 "3.2"
+            max_chars: 内容最大字符数（None 表示不限制）
+            max_tokens: 内容最大 token 数（近似）
             
-        Returns:
-            包含目标章节及其子章节的列表
+        Yields:
+            内容块字典；未找到章节时不生成任何块
         """
-        target_chapters = []
+        if not self.chapters:
+            return
         
-        # 检查是否是精确的章节编号匹配
-        exact_match_found = False
+        self._ensure_body()
+        budget = self._make_budget(max_chars, max_tokens)
+        yield from self._iter_section_blocks(self._find_target_chapters(chapter_number), budget)
+    
+    def get_chapters(self, chapter_numbers: Iterable[str], max_chars: Optional[int] = None,
+                     max_tokens: Optional[int] = None) -> Dict[str, str]:
+        """
+        批量获取多个章节的内容（结果与逐个调用 get_chapter 相同）
         
-        for chapter in self.chapters:
-            number = chapter.get('number', '')
+        先计算所有请求章节的 [start, end) 范围，再对文档主体做一次扫描，
+        每个位置的内容块只生成一次，同时追加到所有覆盖该位置的范围中；
+        父章节与子章节范围重叠时，表格只读取、格式化一次
+        
+        设置篇幅限制时每个章节各自计算预算，逐个调用 get_chapter（超出篇幅的正文不再读取，
+        共享扫描反而要读完所有范围）
+        
+        Args:
+            chapter_numbers: 章节编号列表，如 ["1.1", "1.2", "2.1"]
+            max_chars: 每个章节内容的最大字符数（None 表示不限制）
+            max_tokens: 每个章节内容的最大 token 数（近似）
             
-            # 精确匹配目标章节
-            if self._match_chapter_number(number, chapter_number):
-                target_chapters.append(chapter)
-                exact_match_found = True
+        Returns:
+            章节编号 -> 章节内容字符串
+        """
+        if max_chars is not None or max_tokens is not None:
+            return {
+                chapter_number: self.get_chapter(chapter_number, max_chars=max_chars, max_tokens=max_tokens)
+                for chapter_number in dict.fromkeys(chapter_numbers)
+            }
         
-        # 如果找到精确匹配，且是主章节（如"1"），则只返回主章节
-        # 主章节的内容范围会自动包含所有子章节内容
-        if exact_match_found:
-            # 检查查找的是否是主章节（不包含小数点，如"1", "2", "7"）
-            if '.' not in chapter_number:
-                # 对于主章节，只返回主章节，不返回子章节
-                # 这样可以避免重复内容
-                main_chapters = [ch for ch in target_chapters if ch.get('number', '') == chapter_number]
-                if main_chapters:
-                    return main_chapters
-        
-        # 如果没有找到精确匹配，或者是子章节查找，则包含子章节
-        if not exact_match_found:
-            for chapter in self.chapters:
-                number = chapter.get('number', '')
-                
-                # 匹配子章节
-                if self._is_sub_chapter(number, chapter_number):
-                    target_chapters.append(chapter)
+        results = {}
+        ranges = []
         
-        # 按章节号排序
-        target_chapters.sort(key=lambda x: self._get_sort_key(x.get('number', '')))
+        for chapter_number in chapter_numbers:
+            if chapter_number in results:
+                continue
+            
+            if not self.chapters:
+                results[chapter_number] = "未找到任何章节结构"
+                continue
+            
+            target_sections = self._find_target_chapters(chapter_number)
+            if not target_sections:
+                results[chapter_number] = f"未找到章节 {chapter_number}"
+                continue
+            
+            chapter_positions = sorted(
+                (s for s in target_sections if s.start is not None),
+                key=lambda s: s.start
+            )
+            if not chapter_positions:
+                results[chapter_number] = "未找到指定章节的内容"
+                continue
+            
+            results[chapter_number] = []
+            for section in chapter_positions:
+                end_pos = self._find_chapter_end_position(section, chapter_positions)
+                ranges.append({
+                    'section': section,
+                    'start': section.start,
+                    'end': min(end_pos, self._body_length),
+                    'blocks': [],
+                })
+                # 同一章节的多个范围按位置顺序拼接
+                results[chapter_number].append(ranges[-1])
+        
+        if ranges:
+            self._ensure_body()
+        self._sweep_ranges(ranges)
+        
+        for chapter_number, value in results.items():
+            if isinstance(value, list):
+                results[chapter_number] = self.render_blocks(
+                    block for chapter_range in value for block in chapter_range['blocks']
+                )
+        
+        return results
+    
+    def _sweep_ranges(self, ranges: List[Dict[str, Any]]):
+        """
+        一次扫描文档主体，为每个范围填充内容块
         
-        return target_chapters
+        Args:
+            ranges: 范围列表，每项为 {'section', 'start', 'end', 'blocks'}，结果写入 'blocks'
+        """
+        if not ranges:
+            return
+        
+        heading_index = {pos: k for k, pos in enumerate(self._heading_positions)}
+        pending = sorted(ranges, key=lambda r: r['start'])
+        active = []
+        k = 0
+        i = pending[0]['start']
+        
+        while k < len(pending) or active:
+            active = [r for r in active if r['end'] > i]
+            if not active:
+                if k == len(pending):
+                    break
+                i = max(i, pending[k]['start'])
+            
+            # 当前位置的内容块只生成一次，由所有覆盖该位置的范围共享
+            if active:
+                shared_blocks = self._position_blocks(i, heading_index)
+                for chapter_range in active:
+                    chapter_range['blocks'].extend(shared_blocks)
+            
+            # 从当前位置开始的范围：先写入章节标题，从下一个位置开始接收内容
+            while k < len(pending) and pending[k]['start'] == i:
+                chapter_range = pending[k]
+                section = chapter_range['section']
+                chapter_range['blocks'].append(self._heading_block(i, section.chapter, section.level))
+                active.append(chapter_range)
+                k += 1
+            
+            i += 1
     
-    def _match_chapter_number(self, chapter_num: str, target_num: str) -> bool:
+    def _position_blocks(self, pos: int, heading_index: Dict[int, int]) -> List[Dict[str, Any]]:
         """
-        匹配章节编号
+        生成文档主体中一个位置（章节范围内部）的内容块
         
         Args:
-            chapter_num: 章节编号
-            target_num: 目标编号
+            pos: self.paragraphs 中的位置
+            heading_index: 标题位置 -> 在 self._heading_positions 中的下标
             
         Returns:
-            是否匹配
+            内容块列表
         """
-        # 提取数字部分进行比较
-        chapter_digits = self._extract_number_part(chapter_num)
-        target_digits = self._extract_number_part(target_num)
+        para_info = self.paragraphs[pos]
         
-        return chapter_digits == target_digits
+        if para_info.table is not None:
+            return list(self._iter_table_blocks(para_info.table))
+        
+        if not para_info.text:
+            return []
+        
+        k = heading_index.get(pos)
+        if k is not None:
+            return [self._heading_block(pos, self._heading_position_chapters[k], self._heading_position_levels[k])]
+        
+        return [{'type': 'paragraph', 'text': para_info.text}]
     
-    def _is_sub_chapter(self, chapter_num: str, parent_num: str) -> bool:
+    @staticmethod
+    def _make_budget(max_chars: Optional[int], max_tokens: Optional[int]) -> Optional[Dict[str, Any]]:
         """
-        判断是否为子章节
+        生成篇幅预算状态（在同一次提取的各章节间共享）
         
         Args:
-            chapter_num: 章节编号
-            parent_num: 父章节编号
+            max_chars: 最大字符数
+            max_tokens: 最大 token 数
             
         Returns:
-            是否为子章节
+            {'remaining': 剩余字符数, 'exhausted': 是否已超出}，不限制时为 None
         """
-        chapter_digits = self._extract_number_part(chapter_num)
-        parent_digits = self._extract_number_part(parent_num)
-        
-        # 检查是否以父章节编号开头且有更多层级
-        if chapter_digits.startswith(parent_digits + '.'):
-            return True
-        
-        return False
+        limits = []
+        if max_chars is not None:
+            limits.append(max_chars)
+        if max_tokens is not None:
+            limits.append(int(max_tokens * CHARS_PER_TOKEN))
+        if not limits:
+            return None
+        
+        return {'remaining': min(limits), 'exhausted': False}
     
-    def _extract_number_part(self, chapter_num: str) -> str:
+    @staticmethod
+    def render_blocks(blocks: Iterable[Dict[str, Any]]) -> str:
         """
-        提取章节编号的数字部分
+        将 iter_chapter 生成的内容块拼接为章节内容字符串（与 get_chapter 的格式一致）
         
         Args:
-            chapter_num: 章节编号字符串
+            blocks: 内容块
             
         Returns:
-            数字部分，如 "3.2"
+            章节内容字符串
         """
-        # 匹配数字编号模式
-        match = re.search(r'(\d+(?:\.\d+)*)', chapter_num)
-        if match:
-            return match.group(1)
+        content_parts = []
+        table_lines = None
+        
+        for block in blocks:
+            block_type = block['type']
+            if block_type == 'table_start':
+                table_lines = ["--- 表格内容 ---"]
+            elif block_type == 'table_row':
+                table_lines.append(" | ".join(block['cells']))
+            elif block_type == 'table_end':
+                if block.get('omitted_rows'):
+                    table_lines.append(f"--- 表格结束（省略 {block['omitted_rows']} 行）---")
+                else:
+                    table_lines.append("--- 表格结束 ---")
+                content_parts.append('\n'.join(table_lines))
+                table_lines = None
+            elif block_type == 'table_summary':
+                content_parts.append(f"[表格已省略：{block['rows']} 行 × {block['cols']} 列]")
+            else:
+                content_parts.append(block['text'])
         
-        # 如果没有数字，返回原字符串
-        return chapter_num
+        return '\n\n'.join(content_parts)
     
-    def _get_sort_key(self, chapter_num: str) -> Tuple:
+    def _find_target_chapters(self, chapter_number: str) -> List[Dict]:
         """
-        获取章节编号的排序键
+        查找目标章节及其所有子章节（基于章节索引）
         
         Args:
-            chapter_num: 章节编号
+            chapter_number: 章节编号，如 "3.2"
             
         Returns:
-            排序键元组
+            包含目标章节及其子章节的索引项列表
         """
-        digits = self._extract_number_part(chapter_num)
-        if digits:
-            try:
-                return tuple(int(x) for x in digits.split('.'))
-            except:
-                pass
+        key = self._normalize_chapter_number(chapter_number)
+        entry = self._section_index.get(key)
+
+        # 精确匹配目标章节
+        if entry:
+            target_sections = entry['sections']
+
+            # 如果查找的是主章节（不包含小数点，如"1", "2", "7"），只返回编号完全一致的主章节
+            # 主章节的内容范围会自动包含所有子章节内容，这样可以避免重复内容
+            if '.' not in chapter_number:
+                main_sections = [s for s in target_sections if s.chapter.get('number', '') == chapter_number]
+                if main_sections:
+                    return main_sections
+
+            # 精确匹配的章节规范化编号相同，排序键也相同，保持文档顺序即可
+            return list(target_sections)
+
+        # 如果没有找到精确匹配，则返回所有子章节
+        target_sections = []
+        for sub_key in self._find_sub_keys(key):
+            target_sections.extend(self._section_index[sub_key]['sections'])
+
+        # 按章节号排序（章节号相同时保持文档顺序）
+        target_sections.sort(key=lambda s: (s.sort_key, s.index))
+
+        return target_sections
+
+    def _find_sub_keys(self, key) -> List:
+        """
+        查找以 key 为前缀的所有下级章节编号
         
-        return (0,)
+        Args:
+            key: 规范化章节编号
+            
+        Returns:
+            下级章节编号列表
+        """
+        if isinstance(key, tuple):
+            # 同一前缀的编号在排序列表中连续，二分查找起点后顺序读取
+            depth = len(key)
+            sub_keys = []
+            for i in range(bisect.bisect_right(self._numeric_keys, key), len(self._numeric_keys)):
+                sub_key = self._numeric_keys[i]
+                if sub_key[:depth] != key:
+                    break
+                sub_keys.append(sub_key)
+            return sub_keys
+
+        # 不含数字的编号（如"一"）按字符串前缀匹配
+        prefix = key + '.'
+        return [sub_key for sub_key in self._text_keys if sub_key.startswith(prefix)]
     
-    def _extract_chapter_content(self, target_chapters: List[Dict]) -> str:
+    @staticmethod
+    def _normalize_chapter_number(chapter_num: str):
         """
-        提取章节内容
+        规范化章节编号（不使用正则）
+        
+        取编号中第一段"数字(.数字)*"并拆分为元组，与 re.search(r'(\d+(?:\.\d+)*)') 的结果一致，
+        如 "3.2" -> ('3', '2')、"第1章" -> ('1',)；不含数字的编号（如 "一"）原样返回字符串
         
         Args:
-            target_chapters: 目标章节列表
+            chapter_num: 章节编号字符串
             
         Returns:
-            格式化的章节内容
+            数字编号元组，或原字符串
         """
-        if not target_chapters:
-            return ""
+        n = len(chapter_num)
+        i = 0
+        while i < n and not chapter_num[i].isdecimal():
+            i += 1
+        if i == n:
+            return chapter_num
+        
+        parts = []
+        while True:
+            j = i
+            while j < n and chapter_num[j].isdecimal():
+                j += 1
+            parts.append(chapter_num[i:j])
+            if j + 1 < n and chapter_num[j] == '.' and chapter_num[j + 1].isdecimal():
+                i = j + 1
+            else:
+                return tuple(parts)
+    
+    @staticmethod
+    def _get_sort_key(key) -> Tuple:
+        """
+        获取章节编号的排序键
         
-        # 找到每个章节标题在文档中的位置
-        chapter_positions = []
-        for chapter in target_chapters:
-            title = chapter['title']
-            number = chapter.get('number', '')
+        Args:
+            key: 规范化章节编号
             
-            # 查找章节标题在段落中的位置
-            found = False
-            for i, para_info in enumerate(self.paragraphs):
-                if para_info['type'] == 'paragraph':
-                    para_text = para_info['text']
-                    
-                    # 尝试匹配章节标题
-                    if self._is_chapter_title_match(para_text, title, number):
-                        chapter_positions.append({
-                            'chapter': chapter,
-                            'start_pos': i,
-                            'title_text': para_text
-                        })
-                        found = True
-                        break
-            
-            # 如果没有找到，可以考虑其他匹配策略
-            if not found:
-                pass  # 暂时跳过
-        
-        # 如果没有找到任何章节位置，返回提示
-        if not chapter_positions:
-            return "未找到指定章节的内容"
-        
-        # 按位置排序
-        chapter_positions.sort(key=lambda x: x['start_pos'])
+        Returns:
+            排序键元组
+        """
+        if isinstance(key, tuple):
+            return tuple(int(x) for x in key)
         
-        # 提取内容
-        content_parts = []
+        return (0,)
+    
+    def _iter_section_blocks(self, target_sections: List[Dict],
+                             budget: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按文档顺序生成目标章节的内容块
         
-        for i, pos_info in enumerate(chapter_positions):
-            chapter = pos_info['chapter']
-            start_pos = pos_info['start_pos']
+        Args:
+            target_sections: 目标章节索引项列表
+            budget: 篇幅预算状态（见 _make_budget），None 表示不限制
             
+        Yields:
+            内容块字典
+        """
+        # 章节标题位置已在加载时确定，按位置排序
+        chapter_positions = sorted(
+            (s for s in target_sections if s.start is not None),
+            key=lambda s: s.start
+        )
+        
+        for section in chapter_positions:
             # 确定结束位置 - 需要找到下一个非子章节的位置
-            end_pos = self._find_chapter_end_position(start_pos, chapter, chapter_positions)
-            
-            # 提取章节内容
-            section_content = self._extract_section_content(
-                start_pos, end_pos, chapter, pos_info['title_text']
-            )
+            end_pos = self._find_chapter_end_position(section, chapter_positions)
             
-            if section_content:
-                content_parts.append(section_content)
-        
-        return '\n\n'.join(content_parts)
+            yield from self._iter_range_blocks(section, section.start, end_pos, budget)
     
-    def _find_chapter_end_position(self, start_pos: int, current_chapter: Dict, all_positions: List[Dict]) -> int:
+    def _find_chapter_end_position(self, section: ChapterSection, all_positions: List[ChapterSection]) -> int:
         """
         查找章节的结束位置
         
         Args:
-            start_pos: 当前章节开始位置
-            current_chapter: 当前章节信息
-            all_positions: 所有章节位置列表
+            section: 当前章节索引项
+            all_positions: 所有目标章节索引项（按位置排序）
             
         Returns:
             章节结束位置
         """
-        current_number = current_chapter.get('number', '')
-        current_level = len(current_number.split('.')) if current_number else 0
+        start_pos = section.start
+        current_level = section.level
         
-        # 查找所有章节中下一个同级或上级章节的位置
-        for pos_info in all_positions:
-            other_pos = pos_info['start_pos']
-            other_chapter = pos_info['chapter']
-            other_number = other_chapter.get('number', '')
+        # 查找所有目标章节中下一个同级或上级章节的位置
+        for other in all_positions:
+            other_pos = other.start
             
             # 跳过当前章节
             if other_pos <= start_pos:
                 continue
                 
             # 检查是否是同级或上级章节
-            if other_number:
-                other_level = len(other_number.split('.'))
-                
+            if other.chapter.get('number', ''):
                 # 如果是同级或上级章节，这里就是结束位置
-                if other_level <= current_level:
+                if other.level <= current_level:
                     return other_pos
         
-        # 如果没有找到同级或上级章节，在整个文档中查找
-        return self._find_next_sibling_chapter_in_doc(start_pos, current_chapter)
+        # 如果没有找到同级或上级章节，使用索引中记录的文档内结束位置
+        return section.end
     
-    def _find_next_sibling_chapter_in_doc(self, start_pos: int, current_chapter: Dict) -> int:
+    def _find_next_sibling_chapter_in_doc(self, start_pos: int, current_level: int) -> int:
         """
-        在整个文档中查找下一个同级章节的位置
+        在整个文档中查找下一个同级或上级章节的位置
+
+        Args:
+            start_pos: 当前章节开始位置
+            current_level: 当前章节级别
+
+        Returns:
+            下一个同级或上级章节标题的位置，没有则为文档结尾
         """
-        current_number = current_chapter.get('number', '')
-        current_level = len(current_number.split('.')) if current_number else 0
-        
-        # 从当前位置开始查找
-        for i in range(start_pos + 1, len(self.paragraphs)):
-            para_info = self.paragraphs[i]
-            if para_info['type'] != 'paragraph':
-                continue
-                
-            para_text = para_info['text'].strip()
-            if not para_text:
-                continue
-            
-            # 检查是否匹配章节模式
-            for chapter in self.chapters:
-                ch_number = chapter.get('number', '')
-                ch_title = chapter.get('title', '')
-                
-                if self._is_chapter_title_match(para_text, ch_title, ch_number):
-                    # 检查级别
-                    if ch_number:
-                        ch_level = len(ch_number.split('.'))
-                        if ch_level <= current_level:
-                            return i
+        # 取不超过当前级别的最大已记录级别，其边界列表即为所有同级或上级标题的位置
+        levels = [level for level in self._boundary_positions if level <= current_level]
+        if levels:
+            positions = self._boundary_positions[max(levels)]
+            i = bisect.bisect_right(positions, start_pos)
+            if i < len(positions):
+                return positions[i]
         
         # 如果没有找到，返回文档结尾
         return len(self.paragraphs)
@@ -469,107 +1129,205 @@ class DocxParser:
         
         return False
     
-    def _extract_section_content(self, start_pos: int, end_pos: int, 
-                                chapter: Dict, title_text: str) -> str:
+    def _iter_range_blocks(self, section: Dict, start_pos: int, end_pos: int,
+                           budget: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
         """
-        提取章节内容
+        生成一个章节范围内的内容块
         
         Args:
-            start_pos: 开始位置
+            section: 章节索引项
+            start_pos: 开始位置（章节标题）
             end_pos: 结束位置
-            chapter: 章节信息
-            title_text: 标题文本
+            budget: 篇幅预算状态，None 表示不限制
             
-        Returns:
-            章节内容字符串
+        Yields:
+            内容块字典
         """
-        content_parts = []
+        # 章节标题（超出篇幅后仍保留，作为被省略内容的结构提示）
+        yield self._heading_block(start_pos, section.chapter, section.level, budget)
         
-        # 添加章节标题
-        content_parts.append(title_text)
+        # 范围内的下级章节标题位置（主章节的范围包含全部子章节）
+        lo = bisect.bisect_right(self._heading_positions, start_pos)
+        hi = bisect.bisect_left(self._heading_positions, end_pos)
+        sub_headings = {self._heading_positions[k]: k for k in range(lo, hi)}
         
-        # 提取内容
-        for i in range(start_pos + 1, end_pos):
-            if i >= len(self.paragraphs):
-                break
-                
+        for i in range(start_pos + 1, min(end_pos, len(self.paragraphs))):
             para_info = self.paragraphs[i]
             
-            if para_info['type'] == 'paragraph':
-                text = para_info['text']
-                if text:
-                    content_parts.append(text)
+            if para_info.table is None:
+                text = para_info.text
+                if not text:
+                    continue
+                
+                k = sub_headings.get(i)
+                if k is not None:
+                    yield self._heading_block(i, self._heading_position_chapters[k],
+                                              self._heading_position_levels[k], budget)
+                    continue
+                
+                if budget is not None and not self._spend_budget(budget, len(text) + 2):
+                    yield from self._truncate(budget)
+                    continue
+                yield {'type': 'paragraph', 'text': text}
             
-            elif para_info['type'] == 'table':
-                table_content = self._format_table(para_info['element'])
-                if table_content:
-                    content_parts.append(table_content)
-        
-        return '\n\n'.join(content_parts)
+            else:
+                yield from self._iter_table_blocks(para_info.table, budget)
     
-    def _format_table(self, table: Table) -> str:
+    def _heading_block(self, pos: int, chapter: Dict, level: int,
+                       budget: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        格式化表格内容
+        生成章节标题块（标题总是保留，超出篇幅后标记为 omitted）
         
         Args:
-            table: 表格对象
+            pos: 标题段落位置
+            chapter: 章节信息
+            level: 章节级别
+            budget: 篇幅预算状态，None 表示不限制
             
         Returns:
-            格式化的表格字符串
+            标题块字典
+        """
+        heading = {
+            'type': 'heading',
+            'text': self.paragraphs[pos].text,
+            'number': chapter.get('number', ''),
+            'title': chapter.get('title', ''),
+            'level': level,
+        }
+        if budget is not None:
+            if budget['exhausted']:
+                heading['omitted'] = True
+            budget['remaining'] -= len(heading['text']) + 2
+        
+        return heading
+    
+    @staticmethod
+    def _spend_budget(budget: Dict[str, Any], cost: int) -> bool:
         """
-        if not table.rows:
-            return ""
+        从篇幅预算中扣除 cost 个字符
         
-        content_parts = []
-        content_parts.append("--- 表格内容 ---")
-        
-        # 提取表格数据
-        table_data = []
-        for row in table.rows:
-            row_data = []
-            for cell in row.cells:
-                cell_text = cell.text.strip()
-                row_data.append(cell_text)
-            if any(row_data):  # 只添加非空行
-                table_data.append(row_data)
+        Returns:
+            预算足够时返回 True；已超出或不足时返回 False（不扣除）
+        """
+        if budget['exhausted'] or cost > budget['remaining']:
+            return False
+        budget['remaining'] -= cost
+        return True
+    
+    @staticmethod
+    def _truncate(budget: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """首次超出篇幅时生成提示块，并将预算标记为已超出"""
+        if not budget['exhausted']:
+            budget['exhausted'] = True
+            yield {'type': 'truncated', 'text': TRUNCATED_NOTICE}
+    
+    def _iter_table_blocks(self, table: TableGrid,
+                           budget: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        生成表格内容块
+        
+        单元格文本已在加载时由 _read_table_grid 按网格读出（合并单元格的文本只出现一次），
+        各行按最大列数补齐；超出篇幅后只根据表格结构（行数、网格列数）生成概括块
+        
+        Args:
+            table: 表格网格
+            budget: 篇幅预算状态，None 表示不限制
+            
+        Yields:
+            内容块字典，空表格不生成任何块
+        """
+        if not table.row_count:
+            return
+        
+        rows = table.row_count
+        cols = table.col_count
+        
+        # 表格框架（开始、结束标记）也计入篇幅
+        frame_cost = len("--- 表格内容 ---") + len("\n--- 表格结束 ---") + 2
+        if budget is not None and not self._spend_budget(budget, frame_cost):
+            yield from self._truncate(budget)
+            yield {'type': 'table_summary', 'rows': rows, 'cols': cols}
+            return
+        
+        table_data = table.rows
+        
+        max_cols = max((len(row) for row in table_data), default=0)
+        for index, row in enumerate(table_data):
+            cells = list(row) + [""] * (max_cols - len(row))
+            if budget is not None and not self._spend_budget(budget, len(" | ".join(cells)) + 1):
+                # 一行都放不下时整张表格以概括块代替，否则保留已写出的行
+                if index:
+                    yield {'type': 'table_end', 'omitted_rows': len(table_data) - index}
+                yield from self._truncate(budget)
+                if not index:
+                    yield {'type': 'table_summary', 'rows': rows, 'cols': cols}
+                return
+            if not index:
+                yield {'type': 'table_start', 'rows': rows, 'cols': cols}
+            yield {'type': 'table_row', 'cells': cells}
         
         if not table_data:
-            content_parts.append("--- 表格结束 ---")
-            return '\n'.join(content_parts)
-        
-        # 计算列宽
-        max_cols = max(len(row) for row in table_data)
-        col_widths = [0] * max_cols
-        
-        for row in table_data:
-            for i, cell in enumerate(row):
-                if i < len(col_widths):
-                    col_widths[i] = max(col_widths[i], len(cell))
-        
-        # 格式化表格行
-        for row in table_data:
-            formatted_row = []
-            for i in range(max_cols):
-                if i < len(row):
-                    cell = row[i]
+            yield {'type': 'table_start', 'rows': rows, 'cols': cols}
+        yield {'type': 'table_end'}
+    
+    @staticmethod
+    def _read_table_grid(tbl) -> List[List[str]]:
+        """
+        按布局网格读取表格单元格文本（逐行，行优先）
+        
+        直接遍历 w:tr/w:tc，不经过 python-docx 的 table.rows/row.cells（后者每行都要重建网格，
+        且对合并单元格重复返回同一单元格）：
+        - w:gridBefore：行首跳过的网格列补空字符串
+        - w:gridSpan：横向合并的单元格文本只写在第一列，其余被合并的列为空字符串
+        - w:vMerge：纵向合并的后续单元格（continue）为空字符串，文本只保留在起始单元格
+        
+        Args:
+            tbl: w:tbl 元素
+            
+        Returns:
+            行列表，每行为各网格列的单元格文本（已去除首尾空白）
+        """
+        grid_rows = []
+        for tr in tbl.iterchildren(_TR):
+            row = []
+            
+            tr_pr = tr.find(_TR_PR)
+            if tr_pr is not None:
+                grid_before = tr_pr.find(_GRID_BEFORE)
+                if grid_before is not None:
+                    row.extend([""] * int(grid_before.get(_VAL, 0)))
+            
+            for tc in tr.iterchildren(_TC):
+                span = 1
+                merged = False
+                tc_pr = tc.find(_TC_PR)
+                if tc_pr is not None:
+                    grid_span = tc_pr.find(_GRID_SPAN)
+                    if grid_span is not None:
+                        span = int(grid_span.get(_VAL, 1))
+                    v_merge = tc_pr.find(_V_MERGE)
+                    # w:vMerge 缺省 val 即为 continue
+                    merged = v_merge is not None and v_merge.get(_VAL, 'continue') == 'continue'
+                
+                if merged:
+                    row.append("")
                 else:
-                    cell = ""
-                formatted_row.append(cell)
+                    row.append('\n'.join(_paragraph_text(p) for p in tc.iterchildren(_P)).strip())
+                if span > 1:
+                    row.extend([""] * (span - 1))
             
-            content_parts.append(" | ".join(formatted_row))
+            grid_rows.append(row)
         
-        content_parts.append("--- 表格结束 ---")
-        
-        return '\n'.join(content_parts)
+        return grid_rows
     
     def get_all_chapters(self) -> List[Dict]:
         """
         获取所有章节信息
         
         Returns:
-            章节列表
+            章节列表（副本，修改不影响解析器和缓存）
         """
-        return self.chapters
+        return [dict(chapter) for chapter in self.chapters]
     
     def get_chapter_tree(self) -> str:
         """
@@ -589,6 +1347,8 @@ def main():
         epilog="""
 使用示例:
   python from_server_docx_para.py 我的模板.docx --chapter 3.2
+  python from_server_docx_para.py 我的模板.docx --chapter 3 --max-tokens 4000
+  python from_server_docx_para.py 我的模板.docx --chapter 1.1 1.2 2.1
   python from_server_docx_para.py 报告.doc --chapter "第一章"
   python from_server_docx_para.py 文档.docx --tree
 
@@ -606,7 +1366,20 @@ def main():
     parser.add_argument(
         '--chapter', 
         type=str,
-        help='要提取的章节编号，如 "3.2"'
+        nargs='+',
+        help='要提取的章节编号，如 "3.2"；可指定多个'
+    )
+    
+    parser.add_argument(
+        '--max-chars',
+        type=int,
+        help='每个章节内容的最大字符数，超出部分只保留标题结构'
+    )
+    
+    parser.add_argument(
+        '--max-tokens',
+        type=int,
+        help='每个章节内容的最大 token 数（近似）'
     )
     
     parser.add_argument(
@@ -629,10 +1402,17 @@ def main():
             
         elif args.chapter:
             # 2. 调用 get_chapter 方法来获取内容
-            content = doc_parser.get_chapter(args.chapter)
-            print(f"章节 {args.chapter} 内容:")
-            print("=" * 50)
-            print(content)
+            if len(args.chapter) == 1:
+                contents = {args.chapter[0]: doc_parser.get_chapter(
+                    args.chapter[0], max_chars=args.max_chars, max_tokens=args.max_tokens)}
+            else:
+                contents = doc_parser.get_chapters(
+                    args.chapter, max_chars=args.max_chars, max_tokens=args.max_tokens)
+            
+            for chapter_number, content in contents.items():
+                print(f"章节 {chapter_number} 内容:")
+                print("=" * 50)
+                print(content)
             
         else:
             print("请指定 --chapter 参数来提取章节内容，或使用 --tree 查看章节结构")
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模板大纲/章节索引的磁盘边车文件（sidecar）
+
+进程内缓存（from_server_docx_cache）在服务重启后就丢失了，每次重启都要重新解析全部模板。
+这里把解析结果（章节列表、章节在文档主体中的位置、段落哈希等）写入缓存目录下的二进制文件，
+文件头记录格式版本和源文件内容的 SHA-256：
+- 源文件哈希一致时直接读取，毫秒级完成，不再解析文档
+- 源文件被修改后哈希不一致，调用方重新解析并覆盖写入（旧内容仍可作为增量更新的依据）
+
+文件格式（小端）：
+    头部: magic(4s) + 版本(H) + 保留(H) + 源文件SHA-256(32s)
+    字段: 参数字符串 + 按 SIDECAR_SCHEMAS 中的顺序依次写入的字段
+        str   -> u32 字节数 + UTF-8
+        bytes -> u32 字节数 + 原始字节
+        ints  -> u32 个数 + int32 数组
+        strs  -> u32 个数 + u32 各字符串字节数数组 + UTF-8 拼接
+字段布局变化时递增 SIDECAR_VERSION，旧版本文件会被视为失效并重建。
+"""
+
+import os
+import sys
+import array
+import struct
+import hashlib
+import pathlib
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+from from_server_docx_source import DocxSource
+
+SIDECAR_MAGIC = b'DXSC'
+SIDECAR_VERSION = 2
+
+# 各类边车文件的字段（名称, 类型）
+SIDECAR_SCHEMAS = {
+    # DocxOutlineExtractor 的提取状态：每个非空段落的哈希，以及被识别为章节标题的段落
+    'outline': (
+        ('system_type', 'str'),
+        ('hashes', 'bytes'),
+        ('positions', 'ints'),
+        ('levels', 'ints'),
+        ('numbers', 'strs'),
+        ('titles', 'strs'),
+    ),
+    # DocxParser 的章节索引：章节列表、章节在文档主体中的 [start, end)、标题位置表
+    'parser': (
+        ('body_length', 'ints'),
+        ('levels', 'ints'),
+        ('numbers', 'strs'),
+        ('titles', 'strs'),
+        ('starts', 'ints'),
+        ('ends', 'ints'),
+        ('heading_positions', 'ints'),
+        ('heading_levels', 'ints'),
+        ('heading_chapters', 'ints'),
+    ),
+}
+
+_HEADER = struct.Struct('<4sHH32s')
+_U32 = struct.Struct('<I')
+
+# 边车文件目录及容量上限
+DEFAULT_SIDECAR_DIR = os.path.join(tempfile.gettempdir(), "docx_sidecar")
+DEFAULT_SIDECAR_MAX_BYTES = 64 * 1024 * 1024
+
+
+class SidecarFormatError(ValueError):
+    """边车文件损坏或格式不符"""
+
+
+def _int_array(values) -> array.array:
+    """转换为小端 int32 数组"""
+    arr = array.array('i', values)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr
+
+
+def _encode_fields(kind: str, params: str, source_digest: str, fields: Dict[str, Any]) -> bytes:
+    """按 SIDECAR_SCHEMAS 编码边车文件内容"""
+    parts = [_HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, 0, bytes.fromhex(source_digest))]
+
+    def put_bytes(data: bytes):
+        parts.append(_U32.pack(len(data)))
+        parts.append(data)
+
+    put_bytes(params.encode('utf-8'))
+
+    for name, field_type in SIDECAR_SCHEMAS[kind]:
+        value = fields[name]
+        if field_type == 'str':
+            put_bytes(value.encode('utf-8'))
+        elif field_type == 'bytes':
+            put_bytes(bytes(value))
+        elif field_type == 'ints':
+            parts.append(_U32.pack(len(value)))
+            parts.append(_int_array(value).tobytes())
+        else:  # strs
+            encoded = [s.encode('utf-8') for s in value]
+            lengths = array.array('I', [len(b) for b in encoded])
+            if sys.byteorder != 'little':
+                lengths.byteswap()
+            parts.append(_U32.pack(len(encoded)))
+            parts.append(lengths.tobytes())
+            parts.append(b''.join(encoded))
+
+    return b''.join(parts)
+
+
+def _decode_fields(kind: str, data: bytes) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    解码边车文件内容
+
+    Returns:
+        (源文件SHA-256, 参数字符串, 字段字典)
+    """
+    if len(data) < _HEADER.size:
+        raise SidecarFormatError("文件过短")
+    magic, version, _, digest = _HEADER.unpack_from(data, 0)
+    if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+        raise SidecarFormatError(f"格式版本不符: {magic!r} v{version}")
+    offset = _HEADER.size
+
+    def take(size: int) -> bytes:
+        nonlocal offset
+        if offset + size > len(data):
+            raise SidecarFormatError("文件被截断")
+        chunk = data[offset:offset + size]
+        offset += size
+        return chunk
+
+    def take_u32() -> int:
+        return _U32.unpack(take(_U32.size))[0]
+
+    def take_ints(count: int) -> array.array:
+        arr = array.array('i')
+        arr.frombytes(take(count * arr.itemsize))
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        return arr
+
+    params = take(take_u32()).decode('utf-8')
+    fields = {}
+    for name, field_type in SIDECAR_SCHEMAS[kind]:
+        if field_type == 'str':
+            fields[name] = take(take_u32()).decode('utf-8')
+        elif field_type == 'bytes':
+            fields[name] = take(take_u32())
+        elif field_type == 'ints':
+            fields[name] = take_ints(take_u32()).tolist()
+        else:  # strs
+            count = take_u32()
+            lengths = array.array('I')
+            lengths.frombytes(take(count * lengths.itemsize))
+            if sys.byteorder != 'little':
+                lengths.byteswap()
+            blob = take(sum(lengths))
+            values = []
+            pos = 0
+            for length in lengths:
+                values.append(blob[pos:pos + length].decode('utf-8'))
+                pos += length
+            fields[name] = values
+
+    if offset != len(data):
+        raise SidecarFormatError("文件末尾有多余数据")
+
+    return digest.hex(), params, fields
+
+
+class DocxSidecarStore:
+    """
+    边车文件存储
+
+    文件名由 (源文件真实路径, 类型, 参数) 决定，同一模板重新上传后仍对应同一文件，
+    读取时通过头部的源文件哈希判断是否失效；内存中的模板以内容哈希代替路径
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_SIDECAR_DIR, max_bytes: int = DEFAULT_SIDECAR_MAX_BYTES):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def source_digest(file_path: Union[str, DocxSource]) -> str:
+        """源文件内容的 SHA-256"""
+        return DocxSource.of(file_path).digest()
+
+    def path_for(self, kind: str, file_path: Union[str, DocxSource], params: str) -> pathlib.Path:
+        """边车文件路径"""
+        key = f"{DocxSource.of(file_path).identity}\x00{kind}\x00{params}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.{kind}.dxsc"
+
+    def load(self, kind: str, file_path: Union[str, DocxSource], params: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        读取边车文件（不校验源文件哈希，由调用方与当前文件比较）
+
+        Args:
+            kind: 类型，SIDECAR_SCHEMAS 的键
+            file_path: 源文件路径或模板来源
+            params: 解析参数（如 max_depth、engine），参数不同视为不同文件
+
+        Returns:
+            (写入时的源文件SHA-256, 字段字典)；文件不存在、损坏或版本不符时返回 None
+        """
+        path = self.path_for(kind, file_path, params)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"读取边车文件失败: {path}: {e}")
+            return None
+
+        try:
+            digest, stored_params, fields = _decode_fields(kind, data)
+        except (SidecarFormatError, UnicodeDecodeError) as e:
+            print(f"边车文件无效，将重新生成: {path}: {e}")
+            return None
+
+        if stored_params != params:
+            return None
+
+        return digest, fields
+
+    def save(self, kind: str, file_path: Union[str, DocxSource], params: str, source_digest: str, fields: Dict[str, Any]):
+        """
+        写入边车文件（先写临时文件再 rename，不会留下不完整的文件）；写入失败只打印提示
+
+        Args:
+            kind: 类型
+            file_path: 源文件路径或模板来源
+            params: 解析参数
+            source_digest: 源文件 SHA-256
+            fields: 字段字典
+        """
+        path = self.path_for(kind, file_path, params)
+        data = _encode_fields(kind, params, source_digest, fields)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{path.name}_")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"写入边车文件失败: {path}: {e}")
+            return
+
+        self._evict()
+
+    def _evict(self):
+        """总大小超过上限时，删除最久未写入的边车文件"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.dxsc"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+_sidecar_store = None
+_sidecar_store_lock = threading.Lock()
+
+
+def get_docx_sidecar_store() -> DocxSidecarStore:
+    """获取全局边车文件存储"""
+    global _sidecar_store
+    if _sidecar_store is None:
+        with _sidecar_store_lock:
+            if _sidecar_store is None:
+                _sidecar_store = DocxSidecarStore()
+    return _sidecar_store
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模板来源：文件路径，或内存中的 doc/docx 文件内容
+
+上传接口、WOPI GetFile 拿到的模板是内存中的字节流，DocxOutlineExtractor / DocxParser
+可以直接从内存解析，不必先写入磁盘：
+- .docx 内容直接用 BytesIO 交给 python-docx / zipfile 读取
+- .doc 内容（OLE2 复合文档）仍需 LibreOffice 转换，写入临时文件后走转换缓存（按内容哈希缓存）
+
+进程内缓存和边车文件对内存来源按内容的 SHA-256 标识，同一份内容重复上传仍能命中缓存。
+"""
+
+import io
+import os
+import pathlib
+import hashlib
+from typing import BinaryIO, Optional, Union
+
+from from_server_docx_convert import ConversionCache
+
+# 文件头：.docx 为 zip 包，.doc 为 OLE2 复合文档
+ZIP_MAGIC = b'PK\x03\x04'
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+DocxInput = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, 'DocxSource']
+
+
+class DocxSource:
+    """
+    模板来源
+
+    Attributes:
+        path: 文件路径（内存来源为 None）
+        data: 文件内容（文件来源为 None）
+        name: 用于提示信息的名称
+    """
+
+    def __init__(self, path: Optional[str] = None, data: Optional[bytes] = None, name: Optional[str] = None):
+        self.path = path
+        self.data = data
+        self._digest = None
+        if name is None:
+            name = path if path is not None else f"<内存文档 {len(data)} 字节>"
+        self.name = name
+
+    @classmethod
+    def of(cls, source: DocxInput) -> 'DocxSource':
+        """
+        由文件路径、bytes 或二进制流构造模板来源
+
+        Args:
+            source: 文件路径、文件内容（bytes / bytearray / memoryview）或二进制流（读取全部内容）
+
+        Returns:
+            模板来源
+
+        Raises:
+            FileNotFoundError: 文件路径不存在
+            TypeError: 不支持的输入类型（如文本流）
+        """
+        if isinstance(source, DocxSource):
+            return source
+
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"文件不存在: {path}")
+            return cls(path=path)
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls(data=bytes(source))
+
+        if hasattr(source, 'read'):
+            data = source.read()
+            if not isinstance(data, (bytes, bytearray)):
+                raise TypeError("模板流必须以二进制模式打开")
+            name = getattr(source, 'name', None)
+            return cls(data=bytes(data), name=name if isinstance(name, str) else None)
+
+        raise TypeError(f"不支持的模板输入类型: {type(source).__name__}")
+
+    @property
+    def in_memory(self) -> bool:
+        """是否为内存来源"""
+        return self.data is not None
+
+    @property
+    def suffix(self) -> str:
+        """
+        文件类型（'.doc' / '.docx'）
+
+        文件来源取扩展名；内存来源按文件头判断，无法识别时返回空字符串
+        """
+        if not self.in_memory:
+            return pathlib.Path(self.path).suffix.lower()
+        if self.data.startswith(ZIP_MAGIC):
+            return '.docx'
+        if self.data.startswith(OLE_MAGIC):
+            return '.doc'
+        return ''
+
+    def digest(self) -> str:
+        """内容的 SHA-256（内存来源只计算一次；文件来源每次重新读取文件）"""
+        if not self.in_memory:
+            return ConversionCache.file_digest(pathlib.Path(self.path))
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.data).hexdigest()
+        return self._digest
+
+    @property
+    def identity(self) -> str:
+        """缓存和边车文件使用的来源标识：文件为真实路径，内存来源为内容哈希"""
+        if not self.in_memory:
+            return os.path.realpath(self.path)
+        return f"memory:{self.digest()}"
+
+    def open(self) -> Union[str, BinaryIO]:
+        """供 python-docx / zipfile 读取的对象：文件路径，或新的 BytesIO"""
+        if not self.in_memory:
+            return self.path
+        return io.BytesIO(self.data)
+
+    def __repr__(self) -> str:
+        return f"DocxSource({self.name!r})"
@@ -19,6 +19,9 @@ from llm_protocol import LLM_Query_Paras
 
 from pydantic import BaseModel
 
+# 注入prompt的章节模板内容上限（近似token数），超出部分只保留标题结构
+g_chapter_template_max_tokens = 6000
+
 class Prompt_Write_Chapter_Text(BaseModel):
     project_name            :str =''  # 项目名称
     project_key_demand      :str =''  # 项目核心需求
@@ -334,17 +337,16 @@ class Write_Chapter_Tool(Base_Tool):
                         template_file_path = config.Uploads.template_path + template_filename
                         print(f'【Write_Chapter_Tool】template_file_path: {template_file_path!r}')
 
-                        # 报告完整提纲
+                        # 报告完整提纲（模板解析结果有进程级缓存，同一模板只解析一次）
                         extractor = DocxOutlineExtractor()
-                        chapters = extractor.extract_outline(template_file_path, max_depth=5)
-                        prompt.project_outline = extractor.format_outline(chapters)
+                        prompt.project_outline = extractor.extract_outline_text(template_file_path, max_depth=5)
 
                         print(f'【Write_Chapter_Tool】tree_string: {prompt.project_outline!r}')
 
                         # 需编制章节的对应模板内容
                         doc_parser = DocxParser(template_file_path)
                         title_no = extract_chapter_no(title)
-                        prompt.chapter_template = doc_parser.get_chapter(title_no)
+                        prompt.chapter_template = doc_parser.get_chapter(title_no, max_tokens=g_chapter_template_max_tokens)
                         print(f'【Write_Chapter_Tool】para_content({title_no}): {prompt.chapter_template!r}')
                     except Exception as e:
                         dred(f'【Write_Chapter_Tool】处理template_filename报错：{e!r}')
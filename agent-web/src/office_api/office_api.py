@@ -8,20 +8,197 @@ Office API for Collabora CODE
 import uno
 import datetime
 import os
+import time
+import atexit
+import threading
+import re
 import traceback
+from collections import deque
 
 # 日志文件路径
 LOG_FILE = "/tmp/office_api.log"
 
-def write_log(message):
-    """写入日志文件"""
-    try:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
-            f.flush()
-    except:
-        pass  # 忽略日志写入错误
+# 日志级别
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+LOG_LEVEL_NAMES = {LOG_DEBUG: "DEBUG", LOG_INFO: "INFO", LOG_WARNING: "WARNING", LOG_ERROR: "ERROR"}
+
+# 写入文件的最低级别（环境变量 OFFICE_API_LOG_LEVEL: DEBUG / INFO / WARNING / ERROR）
+LOG_LEVEL = {name: level for level, name in LOG_LEVEL_NAMES.items()}.get(
+    os.environ.get("OFFICE_API_LOG_LEVEL", "INFO").upper(), LOG_INFO)
+
+# 逐单元格 / 逐匹配项的跟踪日志是否写入文件（环境变量 OFFICE_API_LOG_TRACE=1 开启，默认关闭）
+LOG_TRACE = os.environ.get("OFFICE_API_LOG_TRACE", "").lower() in ("1", "true", "yes", "on")
+
+# 批量写入：待写入行数达到上限或距上次写入超过间隔（秒）时写入文件
+LOG_FLUSH_LINES = 64
+LOG_FLUSH_INTERVAL = 1.0
+
+# 内存环形缓冲区保留的最近日志条数（出错时转储到文件）
+LOG_RING_SIZE = 500
+
+
+class OfficeApiLog:
+    """
+    宏日志：按级别过滤，批量写入文件，并在内存中保留最近的日志条目
+
+    宏运行在 CODE 的文档线程上，每条日志都打开/写入/关闭文件会明显拖慢逐单元格、
+    逐段落的处理。这里把日志先放入待写入列表，满 LOG_FLUSH_LINES 行、超过
+    LOG_FLUSH_INTERVAL 秒、出现 ERROR 或进程退出时一次写入。
+
+    环形缓冲区保存所有级别的最近条目（包括未写入文件的 DEBUG / 跟踪日志），条目保存
+    格式模板和参数，只在写入或转储时才格式化。出错时只转储上次转储之后、没有写入文件的条目，
+    重复出错不会反复写入相同的内容。
+    """
+
+    def __init__(self, path, level=LOG_INFO, trace=False,
+                 flush_lines=LOG_FLUSH_LINES, flush_interval=LOG_FLUSH_INTERVAL, ring_size=LOG_RING_SIZE):
+        self.path = path
+        self.level = level
+        self.trace = trace
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self.recent = deque(maxlen=ring_size)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._seq = 0
+        self._dumped_seq = 0
+
+    @staticmethod
+    def _format(entry):
+        """格式化一条日志：(序号, 时间戳, 级别, 消息模板, 参数, 是否写入文件)"""
+        _, created, level, message, args, _ = entry
+        if args:
+            try:
+                message = message % args
+            except Exception:
+                message = f"{message} {args!r}"
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+        if level == LOG_INFO:
+            return f"[{timestamp}] {message}\n"
+        return f"[{timestamp}] [{LOG_LEVEL_NAMES.get(level, level)}] {message}\n"
+
+    def log(self, level, message, args=(), to_file=True):
+        """
+        记录一条日志
+
+        Args:
+            level: 日志级别
+            message: 日志消息（有 args 时为 % 格式模板）
+            args: 格式化参数，写入或转储时才格式化
+            to_file: 是否写入文件（False 时只进入环形缓冲区）
+        """
+        written = to_file and level >= self.level
+        with self._lock:
+            self._seq += 1
+            entry = (self._seq, time.time(), level, message, args, written)
+            self.recent.append(entry)
+            if not written:
+                return
+            self._pending.append(entry)
+            flush_now = level >= LOG_ERROR or len(self._pending) >= self.flush_lines
+            if not flush_now and self._timer is None:
+                # 定时写入，保证宏结束后剩余的日志也能按时落盘
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+            if level >= LOG_ERROR:
+                self.dump_recent()
+
+    def flush(self):
+        """把待写入的日志一次写入文件"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(self._format(entry) for entry in pending))
+        except Exception:
+            pass  # 忽略日志写入错误
+
+    def dump_recent(self, limit=None):
+        """
+        把环形缓冲区中未写入文件的最近日志（调试/跟踪日志）转储到文件，用于出错时查看上下文
+
+        已写入文件的条目和上次转储过的条目不再重复写入
+
+        Args:
+            limit: 最多转储的条数（默认全部）
+        """
+        with self._lock:
+            entries = [entry for entry in self.recent if entry[0] > self._dumped_seq and not entry[5]]
+            self._dumped_seq = self._seq
+        if limit is not None:
+            entries = entries[-limit:]
+        if not entries:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"----- 最近 {len(entries)} 条未写入文件的调试/跟踪日志 -----\n")
+                f.write("".join(self._format(entry) for entry in entries))
+                f.write("----- 最近日志结束 -----\n")
+        except Exception:
+            pass
+
+
+_log = OfficeApiLog(LOG_FILE, level=LOG_LEVEL, trace=LOG_TRACE)
+atexit.register(_log.flush)
+
+
+def _infer_log_level(message):
+    """按消息前缀推断日志级别（兼容原有的 write_log 调用）"""
+    if message.startswith("ERROR"):
+        return LOG_ERROR
+    if message.startswith(("❌", "⚠", "WARNING")):
+        return LOG_WARNING
+    return LOG_INFO
+
+
+def write_log(message, level=None):
+    """
+    写入日志
+
+    Args:
+        message: 日志消息
+        level: 日志级别（默认按消息前缀推断：ERROR 为错误，❌ / ⚠️ 为警告，其余为信息）
+    """
+    message = str(message)
+    _log.log(level if level is not None else _infer_log_level(message), message)
+
+
+def log_debug(message, *args):
+    """调试日志（OFFICE_API_LOG_LEVEL=DEBUG 时写入文件）"""
+    _log.log(LOG_DEBUG, message, args)
+
+
+def log_trace(message, *args):
+    """
+    逐单元格 / 逐匹配项的跟踪日志
+
+    默认只进入内存环形缓冲区（出错时随最近日志转储），OFFICE_API_LOG_TRACE=1 时才写入文件。
+    消息按 % 格式延迟格式化，调用方不要预先拼接字符串。
+    """
+    _log.log(LOG_DEBUG, message, args, to_file=_log.trace)
+
+
+def flush_log():
+    """立即把缓冲的日志写入文件"""
+    _log.flush()
+
+
+def dump_recent_logs(limit=None):
+    """把最近未写入文件的调试/跟踪日志转储到日志文件"""
+    _log.flush()
+    _log.dump_recent(limit)
 
 def hello():
     """测试函数：在文档中插入Hello消息并记录日志"""
@@ -83,6 +260,201 @@ def hello():
             
         return error_msg
 
+def _parse_cell_position(cell_name):
+    """
+    解析单元格名称对应的行列位置（分割单元格忽略 .1.1 部分）
+
+    Args:
+        cell_name: 单元格名称，如 "B3"、"A2.1.1"
+
+    Returns:
+        (行索引, 列索引)，均从0开始
+
+    Raises:
+        ValueError: 名称中没有列字母或行号
+    """
+    base_name = cell_name.split('.')[0]
+    col_letters = base_name.rstrip("0123456789")
+    row_digits = base_name[len(col_letters):]
+    if not col_letters or not row_digits:
+        raise ValueError(f"无法识别的单元格名称: {cell_name}")
+
+    # 将列字母转换为数字（A=0, B=1, ...）
+    col_num = 0
+    for i, char in enumerate(reversed(col_letters.upper())):
+        col_num += (ord(char) - ord('A') + 1) * (26 ** i)
+    return int(row_digits) - 1, col_num - 1
+
+
+def _cell_info(cell_name, cell_text):
+    """单元格信息字典"""
+    return {
+        'position': cell_name,
+        'content': cell_text,
+        'is_merged': False,
+        'length': len(cell_text),
+        'is_split': '.' in cell_name,
+    }
+
+
+def _read_cell(table, cell_name):
+    """逐个读取单元格（分割单元格或批量读取失败时使用）"""
+    try:
+        cell = table.getCellByName(cell_name)
+        cell_info = _cell_info(cell_name, cell.getString())
+
+        # 检查是否为合并/分割单元格
+        try:
+            if cell_info['is_split']:
+                cell_info['parent_cell'] = cell_name.split('.')[0]
+
+            if hasattr(cell, 'getColumnSpan') and hasattr(cell, 'getRowSpan'):
+                col_span = cell.getColumnSpan()
+                row_span = cell.getRowSpan()
+                if col_span > 1 or row_span > 1:
+                    cell_info['is_merged'] = True
+                    cell_info['col_span'] = col_span
+                    cell_info['row_span'] = row_span
+        except Exception as merge_error:
+            log_trace("   检测合并信息时出错 %s: %s", cell_name, merge_error)
+
+        log_trace("     单元格 %s: '%.30s'", cell_name, cell_info['content'])
+        return cell_info
+    except Exception as cell_error:
+        write_log(f"❌ 读取单元格 {cell_name} 时出错: {str(cell_error)}")
+        return {
+            'position': cell_name,
+            'content': '',
+            'error': str(cell_error)
+        }
+
+
+def _simple_row_blocks(cell_names):
+    """
+    把没有分割单元格、列名完全相同的相邻行合并为矩形区域
+
+    Args:
+        cell_names: table.getCellNames() 的结果
+
+    Returns:
+        (区域单元格名称的二维列表, 需要逐个读取的单元格名称列表)
+    """
+    rows = {}
+    for cell_name in cell_names:
+        base_name = cell_name.split('.')[0]
+        row_digits = base_name[len(base_name.rstrip("0123456789")):]
+        rows.setdefault(int(row_digits) if row_digits else -1, []).append(cell_name)
+
+    blocks = []
+    single_cells = []
+    current = []
+    previous_row = None
+    for row_num in sorted(rows):
+        names = rows[row_num]
+        if row_num < 0 or any('.' in name for name in names):
+            single_cells.extend(names)
+            previous_row = None
+            continue
+        columns = [name[:len(name.rstrip("0123456789"))] for name in names]
+        if current and previous_row == row_num - 1 and columns == current[-1][1]:
+            current.append((names, columns))
+        else:
+            if current:
+                blocks.append([row[0] for row in current])
+            current = [(names, columns)]
+        previous_row = row_num
+    if current:
+        blocks.append([row[0] for row in current])
+    return blocks, single_cells
+
+
+def _read_table_cells(table, cell_names):
+    """
+    读取表格所有单元格的内容
+
+    无分割单元格的相邻行组成矩形区域，用 getCellRangeByName().getDataArray() 一次读取；
+    分割单元格（名称含 "."）、非文本值和读取失败的区域才逐个单元格读取。
+
+    Args:
+        table: 文本表格
+        cell_names: table.getCellNames() 的结果
+
+    Returns:
+        单元格名称 -> 单元格信息
+    """
+    cell_data_dict = {}
+    blocks, single_cells = _simple_row_blocks(cell_names)
+
+    for block_idx, block in enumerate(blocks):
+        range_name = f"{block[0][0]}:{block[-1][-1]}"
+        try:
+            data = table.getCellRangeByName(range_name).getDataArray()
+            if len(data) != len(block) or any(len(values) != len(names) for values, names in zip(data, block)):
+                raise ValueError(f"区域 {range_name} 的数据与单元格名称不匹配")
+        except Exception as range_error:
+            # 复杂表格（如纵向合并）不支持区域读取，剩余区域都改为逐个单元格读取
+            write_log(f"⚠️ 批量读取区域 {range_name} 失败，逐个单元格读取: {str(range_error)}")
+            single_cells.extend(name for rest in blocks[block_idx:] for names in rest for name in names)
+            break
+
+        for names, values in zip(block, data):
+            for cell_name, value in zip(names, values):
+                if isinstance(value, str):
+                    cell_data_dict[cell_name] = _cell_info(cell_name, value)
+                    log_trace("     单元格 %s: '%.30s'", cell_name, value)
+                else:
+                    # 数值单元格按显示文本读取
+                    cell_data_dict[cell_name] = _read_cell(table, cell_name)
+
+    for cell_name in single_cells:
+        cell_data_dict[cell_name] = _read_cell(table, cell_name)
+
+    log_trace("   批量读取 %d 个区域，逐个读取 %d 个单元格", len(blocks), len(single_cells))
+    return cell_data_dict
+
+
+def _organize_table_cells(cell_data_dict):
+    """
+    按单元格名称把单元格信息重新组织为行列结构
+
+    Args:
+        cell_data_dict: 单元格名称 -> 单元格信息
+
+    Returns:
+        (行列结构的单元格信息, 行数, 列数)；被合并或不存在的位置用 is_merged_target 占位
+    """
+    # 按 (行, 列) 建立索引（分割单元格取第一个子单元格）
+    cells_by_position = {}
+    max_row = 0
+    max_col = 0
+    for cell_name, cell_info in cell_data_dict.items():
+        try:
+            row_num, col_num = _parse_cell_position(cell_name)
+        except ValueError as parse_error:
+            log_trace("   解析单元格位置失败 %s: %s", cell_name, parse_error)
+            continue
+        cells_by_position.setdefault((row_num, col_num), cell_info)
+        max_row = max(max_row, row_num)
+        max_col = max(max_col, col_num)
+
+    organized_data = []
+    for row_idx in range(max_row + 1):
+        row_data = []
+        for col_idx in range(max_col + 1):
+            found_cell = cells_by_position.get((row_idx, col_idx))
+            if found_cell:
+                row_data.append(found_cell)
+            else:
+                # 该位置可能被合并或不存在
+                row_data.append({
+                    'position': f"{chr(65 + col_idx)}{row_idx + 1}",
+                    'content': '[合并或空]',
+                    'is_merged_target': True
+                })
+        organized_data.append(row_data)
+    return organized_data, max_row + 1, max_col + 1
+
+
 def get_document_content():
     """获取文档的所有内容，包括表格结构化数据"""
     write_log("📄📄📄 get_document_content() 函数被调用！📄📄📄")
@@ -163,117 +535,13 @@ def get_document_content():
                 
                 # 如果能获取到单元格名称，使用正确的方法遍历
                 if all_cell_names:
-                    # 按单元格名称读取内容
-                    cell_data_dict = {}
-                    for cell_name in all_cell_names:
-                        try:
-                            # 获取单元格对象
-                            cell = table.getCellByName(cell_name)
-                            
-                            # 获取单元格文本内容
-                            cell_text = cell.getString()
-                            
-                            # 获取单元格的其他属性
-                            cell_info = {
-                                'position': cell_name,
-                                'content': cell_text,
-                                'is_merged': False,  # 可以进一步检测合并单元格
-                                'length': len(cell_text)
-                            }
-                            
-                            # 检查是否为合并单元格（改进的检测）
-                            try:
-                                # 检查单元格名称是否包含点号（表示分割单元格）
-                                if '.' in cell_name:
-                                    cell_info['is_split'] = True
-                                    cell_info['parent_cell'] = cell_name.split('.')[0]
-                                else:
-                                    cell_info['is_split'] = False
-                                
-                                # 尝试获取合并信息
-                                if hasattr(cell, 'getColumnSpan') and hasattr(cell, 'getRowSpan'):
-                                    col_span = getattr(cell, 'getColumnSpan', lambda: 1)()
-                                    row_span = getattr(cell, 'getRowSpan', lambda: 1)()
-                                    if col_span > 1 or row_span > 1:
-                                        cell_info['is_merged'] = True
-                                        cell_info['col_span'] = col_span
-                                        cell_info['row_span'] = row_span
-                            except Exception as merge_error:
-                                write_log(f"   检测合并信息时出错 {cell_name}: {str(merge_error)}")
-                            
-                            cell_data_dict[cell_name] = cell_info
-                            
-                            write_log(f"     单元格 {cell_name}: '{cell_text[:30]}'{'...' if len(cell_text) > 30 else ''}")
-                            
-                        except Exception as cell_error:
-                            write_log(f"❌ 读取单元格 {cell_name} 时出错: {str(cell_error)}")
-                            cell_data_dict[cell_name] = {
-                                'position': cell_name,
-                                'content': '',
-                                'error': str(cell_error)
-                            }
+                    # 按单元格名称读取内容（无分割的整行区域批量读取）
+                    cell_data_dict = _read_table_cells(table, all_cell_names)
                     
-                    # 尝试重新组织数据为行列结构（基于单元格名称）
-                    organized_data = []
-                    max_row = 0
-                    max_col = 0
-                    
-                    # 解析单元格名称以确定实际的表格结构
-                    cell_positions = {}
-                    for cell_name in cell_data_dict.keys():
-                        try:
-                            # 解析基本单元格名称（忽略分割后的.1.1部分）
-                            base_name = cell_name.split('.')[0] if '.' in cell_name else cell_name
-                            
-                            # 解析列字母和行数字
-                            col_letters = ""
-                            row_digits = ""
-                            for char in base_name:
-                                if char.isalpha():
-                                    col_letters += char
-                                elif char.isdigit():
-                                    row_digits += char
-                            
-                            if col_letters and row_digits:
-                                # 将列字母转换为数字（A=0, B=1, ...）
-                                col_num = 0
-                                for i, char in enumerate(reversed(col_letters.upper())):
-                                    col_num += (ord(char) - ord('A') + 1) * (26 ** i)
-                                col_num -= 1  # 转换为0基索引
-                                
-                                row_num = int(row_digits) - 1  # 转换为0基索引
-                                
-                                cell_positions[cell_name] = (row_num, col_num)
-                                max_row = max(max_row, row_num)
-                                max_col = max(max_col, col_num)
-                        except Exception as parse_error:
-                            write_log(f"   解析单元格位置失败 {cell_name}: {str(parse_error)}")
-                    
-                    # 创建行列结构的数据
-                    for row_idx in range(max_row + 1):
-                        row_data = []
-                        for col_idx in range(max_col + 1):
-                            # 查找该位置的单元格
-                            found_cell = None
-                            for cell_name, (r, c) in cell_positions.items():
-                                if r == row_idx and c == col_idx:
-                                    found_cell = cell_data_dict[cell_name]
-                                    break
-                            
-                            if found_cell:
-                                row_data.append(found_cell)
-                            else:
-                                # 该位置可能被合并或不存在
-                                row_data.append({
-                                    'position': f"{chr(65 + col_idx)}{row_idx + 1}",
-                                    'content': '[合并或空]',
-                                    'is_merged_target': True
-                                })
-                        
-                        organized_data.append(row_data)
+                    organized_data, row_total, col_total = _organize_table_cells(cell_data_dict)
                     
                     table_data['data'] = organized_data
-                    table_data['actual_structure'] = f"{max_row + 1} 行 x {max_col + 1} 列"
+                    table_data['actual_structure'] = f"{row_total} 行 x {col_total} 列"
                     
                 else:
                     # 回退到原来的方法（如果getCellNames失败）
@@ -487,6 +755,127 @@ def get_document_content():
             
         return error_msg
 
+def _param_value(value):
+    """取出官方格式参数 {'type': ..., 'value': ...} 中的值，直接传值时原样返回"""
+    if isinstance(value, dict) and 'type' in value and 'value' in value:
+        return value['value']
+    return value
+
+
+def _param_int(value, default):
+    """解析整数参数，无法解析时使用默认值"""
+    try:
+        return int(_param_value(value))
+    except (TypeError, ValueError):
+        write_log(f"⚠️ 无法解析整数参数: {value}，使用默认值 {default}")
+        return default
+
+
+def _param_bool(value):
+    """解析布尔参数（兼容字符串 "true" / "1" 等）"""
+    value = _param_value(value)
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _table_block(table):
+    """表格块：单元格文本的二维列表，被合并的位置为 None"""
+    try:
+        cell_names = table.getCellNames()
+    except Exception as cell_names_error:
+        write_log(f"⚠️ 获取单元格名称失败: {str(cell_names_error)}")
+        cell_names = []
+
+    cells = []
+    if cell_names:
+        organized_data, _, _ = _organize_table_cells(_read_table_cells(table, cell_names))
+        cells = [[None if cell.get('is_merged_target') else cell.get('content', '') for cell in row]
+                 for row in organized_data]
+
+    return {
+        'type': 'table',
+        'name': table.getName(),
+        'rows': table.getRows().getCount(),
+        'columns': table.getColumns().getCount(),
+        'cells': cells,
+    }
+
+
+def get_document_blocks(offset=0, limit=100, tables_only=False, text_only=False):
+    """
+    只读、分页获取文档内容的 JSON（段落块 / 表格块）
+
+    按文档顺序返回正文中的段落和表格，不修改文档，也不读取整篇文本。正文块列表（只含类型和
+    UNO 对象）按文档缓存，文档修改后重建；翻页时只读取本页块的内容，不再从文档开头重新枚举。
+
+    Args:
+        offset: 跳过的块数（按过滤后的块计数）
+        limit: 本页最多返回的块数
+        tables_only: 只返回表格块
+        text_only: 只返回段落块
+
+    Returns:
+        JSON 字符串：{"offset", "limit", "count", "total", "next_offset", "blocks": [...]}；
+        每个块带 index（文档中的块序号）以及 paragraph_index / table_index，
+        next_offset 为 null 表示已到文档末尾。出错时返回 "ERROR: ..." 字符串
+    """
+    import json
+
+    offset = max(0, _param_int(offset, 0))
+    limit = max(1, _param_int(limit, 100))
+    tables_only = _param_bool(tables_only)
+    text_only = _param_bool(text_only)
+    write_log(f"📄 get_document_blocks() 被调用: offset={offset}, limit={limit}, "
+              f"tables_only={tables_only}, text_only={text_only}")
+
+    if tables_only and text_only:
+        write_log("ERROR: tables_only 和 text_only 不能同时为真")
+        return "ERROR: tables_only 和 text_only 不能同时为真"
+
+    try:
+        model = XSCRIPTCONTEXT.getDesktop().getCurrentComponent()
+        if not model:
+            write_log("ERROR: 没有打开的文档")
+            return "ERROR: 没有打开的文档"
+
+        index, _ = _get_chapter_index(model, index_type=_BlockIndex)
+        matched = [entry for entry in index.paragraphs
+                   if not (tables_only and not entry['is_table']) and not (text_only and entry['is_table'])]
+
+        blocks = []
+        for entry in matched[offset:offset + limit]:
+            element = entry['paragraph_obj']
+            if entry['is_table']:
+                block = _table_block(element)
+                block['table_index'] = entry['table_index']
+            else:
+                block = {
+                    'type': 'paragraph',
+                    'paragraph_index': entry['paragraph_index'],
+                    'style': element.getPropertyValue("ParaStyleName"),
+                    'text': element.getString(),
+                }
+            block['index'] = entry['index']
+            blocks.append(block)
+
+        result = {
+            'offset': offset,
+            'limit': limit,
+            'count': len(blocks),
+            'total': len(matched),
+            'next_offset': offset + len(blocks) if offset + len(blocks) < len(matched) else None,
+            'blocks': blocks,
+        }
+        write_log(f"✅ get_document_blocks() 返回 {len(blocks)} 个块，next_offset={result['next_offset']}")
+        return json.dumps(result, ensure_ascii=False)
+
+    except Exception as e:
+        error_msg = f"ERROR in get_document_blocks(): {str(e)}"
+        error_traceback = traceback.format_exc()
+        write_log(f"{error_msg}\n{error_traceback}")
+        return error_msg
+
 def test_uno_connection():
     """测试UNO连接的函数"""
     write_log("🔧🔧🔧 test_uno_connection() 函数被调用！🔧🔧🔧")
@@ -650,7 +1039,7 @@ def search_and_format_text(*args, **kwargs):
         # 格式化每个找到的文本范围
         for i in range(found_ranges.getCount()):
             text_range = found_ranges.getByIndex(i)
-            write_log(f"正在格式化第 {i+1} 个匹配项: '{text_range.getString()}'")
+            log_trace("正在格式化第 %d 个匹配项", i + 1)
             
             # 设置背景色（高亮）
             text_range.setPropertyValue("CharBackColor", bg_color)
@@ -666,7 +1055,7 @@ def search_and_format_text(*args, **kwargs):
             text_range.setPropertyValue("CharHeightAsian", float(font_size))
             text_range.setPropertyValue("CharHeightComplex", float(font_size))
             
-            write_log(f"已设置格式: 背景色={highlight_color}, 字体={font_name}, 大小={font_size}pt")
+            log_trace("已设置格式: 背景色=%s, 字体=%s, 大小=%spt", highlight_color, font_name, font_size)
         
         # 在文档末尾插入操作确认消息
         text = model.getText()
@@ -782,11 +1171,571 @@ write_log("📦📦📦 office_api.py 模块已加载 (这只是导入时执行)
 write_log(f"模块加载时间: {datetime.datetime.now()}")
 write_log("如果您看到这条消息但没有看到函数调用日志，说明函数没有被实际调用")
 
-def select_chapter(chapter="2.1"):
-    """选中指定章节的完整内容"""
-    write_log(f"📖📖📖 select_chapter() 函数被调用！章节: {chapter}")
+# === 章节索引：select_chapter 使用的正则与按文档缓存的段落/章节标题索引 ===
+
+# 章节编号
+CHAPTER_NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)*)')
+# 章节标题：编号后跟空白
+CHAPTER_TITLE_RE = re.compile(r'^(\d+(?:\.\d+)*)\s+')
+# 以空格+页码结尾
+PAGE_NUMBER_TAIL_RE = re.compile(r'\s+\d+$')
+# 目录项特征：章节编号 + 标题 + 页码，如 "1.1 基本情况 1" 或 "2.1 建设现状 5"
+TOC_ITEM_RES = (
+    re.compile(r'^(\d+(?:\.\d+)*)\s+\S.*\s+(\d+)$'),  # 编号 + 标题 + 页码
+    re.compile(r'^(\d+(?:\.\d+)*)\s+.*\t+(\d+)$'),    # 编号 + 标题 + 制表符 + 页码
+    re.compile(r'^(\d+(?:\.\d+)*)\s+.*\.+\s*(\d+)$'), # 编号 + 标题 + 点填充 + 页码
+)
+
+# 最多缓存的文档数
+CHAPTER_INDEX_CACHE_SIZE = 8
+
+
+def _parse_chapter_level(chapter_num):
+    """解析章节编号的层级，返回层级列表"""
+    return [int(x) for x in chapter_num.split('.') if x.isdigit()]
+
+
+def _is_toc_item_format(text):
+    """判断是否为目录项格式"""
+    text = text.strip()
+    if not text:
+        return False
+    return any(pattern.match(text) for pattern in TOC_ITEM_RES)
+
+
+def _is_chapter_title(text, style):
+    """判断是否为正文章节标题（不是目录项）"""
+    text = text.strip()
+
+    # 首先检查是否为目录项格式，如果是则不能是正文章节标题
+    if _is_toc_item_format(text):
+        return False
+
+    # 检查样式是否为标题类型
+    if style and ("标题" in style or "Heading" in style):
+        return True
+
+    # 通过正则表达式检查章节编号模式，并确保不是目录项（不以空格+页码结尾）
+    return bool(CHAPTER_TITLE_RE.match(text)) and not PAGE_NUMBER_TAIL_RE.search(text)
+
+
+def _find_table_of_contents_area(all_paragraphs):
+    """识别文档中的目录区域，返回(开始索引, 结束索引)"""
+    toc_start = -1
+    toc_end = -1
+
+    # 查找包含"目录"字样的段落
+    for i, para in enumerate(all_paragraphs):
+        text = para['text'].strip()
+        if "目录" in text:
+            write_log(f"找到目录标题: 第{i}段 - {text}")
+            toc_start = i
+            break
+
+    if toc_start != -1:
+        # 从目录标题开始查找目录结束位置
+        for i in range(toc_start + 1, min(toc_start + 50, len(all_paragraphs))):  # 限制在50段内查找
+            text = all_paragraphs[i]['text'].strip()
+
+            # 如果不是目录项格式，且不是空行，可能是目录结束
+            if text and not _is_toc_item_format(text):
+                # 检查是否是正文章节开始
+                if _is_chapter_title(text, all_paragraphs[i]['style']):
+                    toc_end = i
+                    write_log(f"目录结束: 第{i}段，下一个是正文章节: {text[:50]}...")
+                    break
+
+        # 如果没找到明确结束，使用启发式方法
+        if toc_end == -1:
+            toc_end = min(toc_start + 30, len(all_paragraphs))  # 假设目录不超过30段
+            write_log(f"目录结束(启发式): 第{toc_end}段")
+
+    write_log(f"目录区域: 第{toc_start}段 到 第{toc_end}段")
+    return toc_start, toc_end
+
+
+def _is_table_of_contents(text, index, toc_start, toc_end):
+    """判断是否为目录项：在目录区域内，且符合目录项格式"""
+    if toc_start <= index <= toc_end:
+        return _is_toc_item_format(text)
+    return False
+
+
+def _document_revision(model):
+    """
+    文档修订标识：段落数和字符数（文档统计，由 Writer 在本地计算，不需要逐段落跨桥调用）
+
+    Returns:
+        (段落数, 字符数)；无法获取时返回 None（不使用缓存）
+    """
+    try:
+        return (model.getPropertyValue("ParagraphCount"), model.getPropertyValue("CharacterCount"))
+    except Exception as e:
+        write_log(f"⚠️ 无法获取文档统计信息，不使用章节索引缓存: {str(e)}")
+        return None
+
+
+def _document_key(model):
+    """
+    文档在本进程中的唯一标识（RuntimeUID），用作缓存键
+
+    不能用 URL：所有未保存文档的 URL 都是空字符串，不同文档会共用同一个索引
+
+    Returns:
+        RuntimeUID；无法获取时返回 None（不使用缓存）
+    """
+    try:
+        return model.getPropertyValue("RuntimeUID")
+    except Exception:
+        pass
+    try:
+        return model.getRuntimeUID()
+    except Exception as e:
+        write_log(f"⚠️ 无法获取文档 RuntimeUID，不使用章节索引缓存: {str(e)}")
+        return None
+
+
+class _ChapterIndex:
+    """
+    单个文档的段落/章节标题索引
+
+    保存每个正文块（段落或表格）的文本、样式和 UNO 对象，以及目录区域和正文章节标题的位置，
+    重复选择章节时不必再跨桥枚举全部段落。
+    """
+
+    def __init__(self, revision):
+        self.revision = revision
+        self.paragraphs = []
+        self.toc_start = -1
+        self.toc_end = -1
+        self.headings = []  # (段落索引, 章节编号)
+
+    def add_blocks(self, block_enum, replace_last=False):
+        """
+        追加枚举出的正文块并重新计算章节标题
+
+        Args:
+            block_enum: 段落枚举器（文档或文本范围的 createEnumeration()）
+            replace_last: 第一个块替换已索引的最后一个段落（枚举追加内容时，第一个块是原来的最后一个段落）
+        """
+        if replace_last and self.paragraphs:
+            self.paragraphs.pop()
+
+        while block_enum.hasMoreElements():
+            self.paragraphs.append(self._read_block(block_enum.nextElement()))
+        self._index_headings()
+
+    def _read_block(self, block):
+        """读取一个正文块的文本和样式（表格没有文本和段落样式，按空段落处理）"""
+        try:
+            block_text = block.getString()
+        except Exception:
+            block_text = ""
+        try:
+            block_style = block.getPropertyValue("ParaStyleName")
+        except Exception:
+            block_style = "普通"
+
+        return {
+            'index': len(self.paragraphs),
+            'text': block_text,
+            'style': block_style,
+            'paragraph_obj': block
+        }
+
+    def _index_headings(self):
+        """识别目录区域和全部正文章节标题（跳过目录项）"""
+        self.toc_start, self.toc_end = _find_table_of_contents_area(self.paragraphs)
+        self.headings = []
+        for para in self.paragraphs:
+            para_text = para['text'].strip()
+            if not para_text or _is_table_of_contents(para_text, para['index'], self.toc_start, self.toc_end):
+                continue
+            if _is_chapter_title(para_text, para['style']):
+                match = CHAPTER_NUMBER_RE.match(para_text)
+                if match:
+                    self.headings.append((para['index'], match.group(1)))
+
+    def find_chapter(self, chapter):
+        """
+        查找章节范围
+
+        Args:
+            chapter: 章节编号，如 "2.1"
+
+        Returns:
+            (开始段落索引, 结束段落索引（不含）)；未找到时返回 None
+        """
+        # 开始位置只在目录区域之外查找
+        search_start = max(0, self.toc_end + 1) if self.toc_end != -1 else 0
+        target_level = _parse_chapter_level(chapter)
+
+        start_index = -1
+        end_index = len(self.paragraphs)
+        for position, (para_index, found_chapter) in enumerate(self.headings):
+            if para_index < search_start:
+                continue
+            if start_index == -1:
+                if found_chapter == chapter:
+                    start_index = para_index
+                    write_log(f"✅ 找到目标章节开始位置: 第{para_index}段")
+                continue
+
+            # 结束位置：下一个同级（编号更大）或更高级章节
+            found_level = _parse_chapter_level(found_chapter)
+            if (len(found_level) == len(target_level) and
+                found_level[:-1] == target_level[:-1] and
+                found_level[-1] > target_level[-1]) or \
+               len(found_level) < len(target_level):
+                end_index = para_index
+                write_log(f"✅ 找到章节结束位置: 第{para_index}段 (下一章节: {found_chapter})")
+                break
+
+        if start_index == -1:
+            return None
+        return start_index, end_index
+
+    def is_current(self, *para_indexes):
+        """抽查段落文本是否与索引一致（防止段落数和字符数都不变的修改）"""
+        try:
+            for para_index in para_indexes:
+                if para_index < len(self.paragraphs):
+                    para = self.paragraphs[para_index]
+                    if para['text'] is not None and para['paragraph_obj'].getString() != para['text']:
+                        return False
+            return True
+        except Exception:
+            return False
+
+    def outline(self):
+        """
+        全部章节标题
+
+        Returns:
+            [(段落索引, 层级, 章节编号, 标题文本)]，层级按编号段数计算
+        """
+        return [(para_index, len(_parse_chapter_level(number)), number, self.paragraphs[para_index]['text'].strip())
+                for para_index, number in self.headings]
+
+
+class _OutlineIndex(_ChapterIndex):
+    """
+    按段落大纲级别（OutlineLevel）识别章节标题的索引
+
+    Writer 在标题段落上保存大纲级别（标题样式或 insert_title 直接设置）。每个正文块只用一次
+    getPropertyValues 读取大纲级别和样式，只有标题段落才读取文本和编号标签；目录项的大纲级别
+    为 0，不需要目录区域识别。建索引仍要枚举全部正文块（UNO 没有只枚举标题段落的接口，
+    段落索引也需要完整枚举），比 _ChapterIndex 省下的只是非标题块的文本读取。
+    """
+
+    def _read_block(self, block):
+        try:
+            outline_level, block_style = block.getPropertyValues(("OutlineLevel", "ParaStyleName"))
+        except Exception:
+            # 表格等非段落块
+            outline_level, block_style = 0, ""
+
+        para = {
+            'index': len(self.paragraphs),
+            'text': None,
+            'style': block_style,
+            'level': outline_level or 0,
+            'label': "",
+            'paragraph_obj': block
+        }
+        if para['level'] > 0:
+            para['text'] = block.getString()
+            try:
+                # 自动编号的标签（如 "2.1"），不包含在段落文本中
+                para['label'] = block.getPropertyValue("ListLabelString") or ""
+            except Exception:
+                pass
+        return para
+
+    def _index_headings(self):
+        """按大纲级别识别全部章节标题"""
+        self.headings = []
+        for para in self.paragraphs:
+            if para['level'] <= 0 or not para['text'].strip():
+                continue
+            match = CHAPTER_NUMBER_RE.match(para['label'].strip()) or CHAPTER_NUMBER_RE.match(para['text'].strip())
+            self.headings.append((para['index'], match.group(1) if match else None))
+
+    def find_chapter(self, chapter):
+        """
+        查找章节范围：章节编号（或标题文本）匹配的标题，到下一个大纲级别相同或更高的标题为止
+
+        Args:
+            chapter: 章节编号（如 "2.1"）或标题文本
+
+        Returns:
+            (开始段落索引, 结束段落索引（不含）)；未找到时返回 None
+        """
+        start_index = -1
+        start_level = 0
+        end_index = len(self.paragraphs)
+        for para_index, number in self.headings:
+            para = self.paragraphs[para_index]
+            if start_index == -1:
+                if number == chapter or para['text'].strip() == chapter:
+                    start_index = para_index
+                    start_level = para['level']
+                    write_log(f"✅ 按大纲级别找到目标章节开始位置: 第{para_index}段 (级别 {start_level})")
+                continue
+            if para['level'] <= start_level:
+                end_index = para_index
+                write_log(f"✅ 按大纲级别找到章节结束位置: 第{para_index}段 (下一章节: {number or para['text'].strip()[:30]})")
+                break
+
+        if start_index == -1:
+            return None
+        return start_index, end_index
+
+    def is_current(self, *para_indexes):
+        """抽查标题段落的文本和大纲级别是否与索引一致"""
+        try:
+            for para_index in para_indexes:
+                if para_index < len(self.paragraphs):
+                    para = self.paragraphs[para_index]
+                    if para['text'] is None:
+                        continue
+                    block = para['paragraph_obj']
+                    if block.getString() != para['text'] or block.getPropertyValue("OutlineLevel") != para['level']:
+                        return False
+            return True
+        except Exception:
+            return False
+
+    def outline(self):
+        """全部章节标题：[(段落索引, 大纲级别, 章节编号, 标题文本)]"""
+        return [(para_index, self.paragraphs[para_index]['level'], number, self.paragraphs[para_index]['text'].strip())
+                for para_index, number in self.headings]
+
+
+class _BlockIndex(_ChapterIndex):
+    """
+    get_document_blocks 使用的正文块列表
+
+    每个块只判断一次类型（段落 / 表格）并保存 UNO 对象，内容在翻页读取时才获取
+    """
+
+    def _read_block(self, block):
+        try:
+            is_table = block.supportsService("com.sun.star.text.TextTable")
+        except Exception:
+            is_table = False
+        return {
+            'index': len(self.paragraphs),
+            'text': None,
+            'is_table': is_table,
+            'paragraph_obj': block
+        }
+
+    def _index_headings(self):
+        """计算段落序号和表格序号（块列表不识别章节标题）"""
+        self.headings = []
+        paragraph_index = 0
+        table_index = 0
+        for entry in self.paragraphs:
+            if entry['is_table']:
+                entry['table_index'] = table_index
+                table_index += 1
+            else:
+                entry['paragraph_index'] = paragraph_index
+                paragraph_index += 1
+
+
+_chapter_indexes = {}
+_chapter_indexes_lock = threading.Lock()
+
+
+def _get_chapter_index(model, refresh=False, index_type=_ChapterIndex):
+    """
+    获取文档的章节索引（按文档 RuntimeUID 和索引类型缓存，修订标识变化时重建）
+
+    Args:
+        model: 文档
+        refresh: 强制重建
+        index_type: _ChapterIndex（按正则识别标题）、_OutlineIndex（按大纲级别识别标题）
+                    或 _BlockIndex（get_document_blocks 的正文块列表）
+
+    Returns:
+        (章节索引, 是否命中缓存)
+    """
+    url = model.getURL()
+    document_key = _document_key(model)
+    key = (document_key, index_type.__name__)
+    revision = _document_revision(model)
+
+    with _chapter_indexes_lock:
+        index = _chapter_indexes.get(key)
+        if index is not None and not refresh and revision is not None and index.revision == revision:
+            write_log(f"章节索引缓存命中: {url or '未保存文档'}（{len(index.paragraphs)}段）")
+            return index, True
+
+    index = index_type(revision)
+    index.add_blocks(model.getText().createEnumeration())
+    write_log(f"重建章节索引: {url or '未保存文档'}，共 {len(index.paragraphs)} 段，{len(index.headings)} 个章节标题")
+
+    if revision is not None and document_key is not None:
+        with _chapter_indexes_lock:
+            _chapter_indexes.pop(key, None)
+            _chapter_indexes[key] = index
+            while len(_chapter_indexes) > CHAPTER_INDEX_CACHE_SIZE:
+                _chapter_indexes.pop(next(iter(_chapter_indexes)))
+    return index, False
+
+
+def _append_to_chapter_index(model, index, length):
+    """
+    把宏自己追加到文档末尾的内容加入索引，并更新修订标识，避免下次调用重建索引
+
+    同一文档缓存的其他索引（大纲级别索引、正文块列表）也一起追加；追加前已经过期的索引
+    直接作废。
+
+    Args:
+        model: 文档
+        index: 本次使用的章节索引（追加前与文档一致）
+        length: 追加到文档末尾的字符数
+    """
+    previous_revision = index.revision
+    document_key = _document_key(model)
+    with _chapter_indexes_lock:
+        indexes = [cached for key, cached in _chapter_indexes.items()
+                   if document_key is not None and key[0] == document_key]
+    if index not in indexes:
+        indexes.append(index)
+
+    appended = []
+    try:
+        for target in indexes:
+            if previous_revision is None or target.revision != previous_revision:
+                target.revision = None
+                continue
+            appended_range = model.getText().createTextCursor()
+            appended_range.gotoEnd(False)
+            appended_range.goLeft(length, True)
+            target.add_blocks(appended_range.createEnumeration(), replace_last=True)
+            appended.append(target)
+        revision = _document_revision(model)
+        for target in appended:
+            target.revision = revision
+    except Exception as e:
+        write_log(f"⚠️ 更新章节索引失败，下次调用时重建: {str(e)}")
+        for target in indexes:
+            target.revision = None
+
+
+def _locate_chapter(model, chapter, index_type):
+    """
+    用指定类型的索引查找章节范围
+
+    修订标识一致的缓存索引命中章节时，抽查开始、结束段落；与文档不一致（如同长度的标题修改）时重建一次。
+    未命中时不重建：修订标识一致即视为索引最新，由调用方决定是否换用其他索引查找
+
+    Args:
+        model: 文档
+        chapter: 章节编号
+        index_type: _ChapterIndex 或 _OutlineIndex
+
+    Returns:
+        (章节索引, (开始段落索引, 结束段落索引) 或 None)
+    """
+    index, cached = _get_chapter_index(model, index_type=index_type)
+    chapter_range = index.find_chapter(chapter)
+    if cached and chapter_range is not None and not index.is_current(*chapter_range):
+        index, _ = _get_chapter_index(model, refresh=True, index_type=index_type)
+        chapter_range = index.find_chapter(chapter)
+    return index, chapter_range
+
+
+def _build_heading_tree(entries):
+    """
+    按层级把章节标题组织为树
+
+    Args:
+        entries: [(段落索引, 层级, 章节编号, 标题文本)]
+
+    Returns:
+        [{'level', 'number', 'title', 'paragraph_index', 'children'}]
+    """
+    roots = []
+    stack = []
+    for para_index, level, number, title in entries:
+        node = {'level': level, 'number': number, 'title': title, 'paragraph_index': para_index, 'children': []}
+        while stack and stack[-1]['level'] >= level:
+            stack.pop()
+        (stack[-1]['children'] if stack else roots).append(node)
+        stack.append(node)
+    return roots
+
+
+def get_outline(mode="auto"):
+    """
+    获取文档的完整章节标题树（JSON，只读）
+
+    Args:
+        mode: "outline" 按段落大纲级别；"regex" 按章节编号正则；"auto" 优先大纲级别，
+              文档没有设置大纲级别时回退到正则
+
+    Returns:
+        JSON 字符串：{"source": "outline_level" / "regex", "count", "headings": [树]}；
+        出错时返回 "ERROR: ..." 字符串
+    """
+    import json
+
+    mode = str(_param_value(mode) or "auto").lower()
+    write_log(f"🗂️ get_outline() 被调用: mode={mode}")
+    if mode not in ("auto", "outline", "regex"):
+        write_log(f"ERROR: 不支持的模式 {mode}")
+        return f"ERROR: 不支持的模式 {mode}（可选 auto / outline / regex）"
+
+    try:
+        model = XSCRIPTCONTEXT.getDesktop().getCurrentComponent()
+        if not model:
+            write_log("ERROR: 没有打开的文档")
+            return "ERROR: 没有打开的文档"
+
+        # 应用标题样式、修改大纲级别、同长度改标题都不改变段落数和字符数，
+        # 修订标识无法发现，这里总是重建索引（重建结果继续供 select_chapter 使用）
+        entries = []
+        source = "outline_level"
+        if mode != "regex":
+            index, _ = _get_chapter_index(model, refresh=True, index_type=_OutlineIndex)
+            entries = index.outline()
+        if mode == "regex" or (mode == "auto" and not entries):
+            source = "regex"
+            index, _ = _get_chapter_index(model, refresh=True, index_type=_ChapterIndex)
+            entries = index.outline()
+
+        result = {'source': source, 'count': len(entries), 'headings': _build_heading_tree(entries)}
+        write_log(f"✅ get_outline() 返回 {len(entries)} 个章节标题（{source}）")
+        return json.dumps(result, ensure_ascii=False)
+
+    except Exception as e:
+        error_msg = f"ERROR in get_outline(): {str(e)}"
+        error_traceback = traceback.format_exc()
+        write_log(f"{error_msg}\n{error_traceback}")
+        return error_msg
+
+
+def select_chapter(chapter="2.1", mode="auto"):
+    """
+    选中指定章节的完整内容
+
+    Args:
+        chapter: 章节编号，如 "2.1"
+        mode: "outline" 按段落大纲级别识别标题；"regex" 按章节编号正则识别标题；
+              "auto" 优先大纲级别，找不到章节时回退到正则
+    """
+    write_log(f"📖📖📖 select_chapter() 函数被调用！章节: {chapter}，模式: {mode}")
     write_log("=== select_chapter() 函数开始执行 ===")
     
+    mode = str(_param_value(mode) or "auto").lower()
+    if mode not in ("auto", "outline", "regex"):
+        write_log(f"ERROR: 不支持的模式 {mode}")
+        return f"ERROR: 不支持的模式 {mode}（可选 auto / outline / regex）"
+    
     try:
         write_log("尝试获取XSCRIPTCONTEXT...")
         
@@ -805,205 +1754,21 @@ def select_chapter(chapter="2.1"):
         text = model.getText()
         write_log("成功获取文档文本对象")
         
-        # 创建用于搜索的枚举器
-        paragraph_enum = text.createEnumeration()
-        write_log("成功创建段落枚举器")
-        
-        # 存储所有段落的信息
-        paragraphs = []
-        paragraph_index = 0
-        
-        # 遍历所有段落
-        while paragraph_enum.hasMoreElements():
-            paragraph = paragraph_enum.nextElement()
-            paragraph_text = paragraph.getString()
-            
-            # 获取段落样式信息
-            paragraph_style = ""
-            try:
-                paragraph_style = paragraph.getPropertyValue("ParaStyleName")
-            except:
-                paragraph_style = "普通"
-            
-            paragraphs.append({
-                'index': paragraph_index,
-                'text': paragraph_text,
-                'style': paragraph_style,
-                'paragraph_obj': paragraph
-            })
-            
-            paragraph_index += 1
-        
+        # 段落/章节标题索引（按文档缓存，文档修改后自动重建）
+        chapter_range = None
+        if mode != "regex":
+            index, chapter_range = _locate_chapter(model, chapter, _OutlineIndex)
+        if mode == "regex" or (mode == "auto" and chapter_range is None):
+            index, chapter_range = _locate_chapter(model, chapter, _ChapterIndex)
+        paragraphs = index.paragraphs
         write_log(f"总共找到 {len(paragraphs)} 个段落")
         
-        # 解析章节编号的层级
-        def parse_chapter_level(chapter_num):
-            """解析章节编号的层级，返回层级列表"""
-            return [int(x) for x in chapter_num.split('.') if x.isdigit()]
-        
-        # 检查是否为章节标题
-        import re
-        def is_chapter_title(text, style):
-            """判断是否为正文章节标题（不是目录项）"""
-            text = text.strip()
-            
-            # 首先检查是否为目录项格式，如果是则不能是正文章节标题
-            if is_toc_item_format(text):
-                return False
-            
-            # 检查样式是否为标题类型
-            if style and ("标题" in style or "Heading" in style):
-                return True
-            
-            # 通过正则表达式检查章节编号模式
-            chapter_pattern = r'^(\d+(?:\.\d+)*)\s+'
-            match = re.match(chapter_pattern, text)
-            if match:
-                # 确保不是目录项：检查是否以页码结尾
-                if not re.search(r'\s+\d+$', text):  # 不以空格+数字结尾
-                    return True
-            
-            return False
-        
-        # 首先识别目录区域
-        def find_table_of_contents_area(all_paragraphs):
-            """识别文档中的目录区域，返回(开始索引, 结束索引)"""
-            toc_start = -1
-            toc_end = -1
-            
-            # 查找包含"目录"字样的段落
-            for i, para in enumerate(all_paragraphs):
-                text = para['text'].strip()
-                if text == "目录" or "目录" in text:
-                    write_log(f"找到目录标题: 第{i}段 - {text}")
-                    toc_start = i
-                    break
-            
-            if toc_start != -1:
-                # 从目录标题开始查找目录结束位置
-                for i in range(toc_start + 1, min(toc_start + 50, len(all_paragraphs))):  # 限制在50段内查找
-                    text = all_paragraphs[i]['text'].strip()
-                    
-                    # 如果不是目录项格式，且不是空行，可能是目录结束
-                    if text and not is_toc_item_format(text):
-                        # 检查是否是正文章节开始
-                        if is_chapter_title(text, all_paragraphs[i]['style']):
-                            toc_end = i
-                            write_log(f"目录结束: 第{i}段，下一个是正文章节: {text[:50]}...")
-                            break
-                
-                # 如果没找到明确结束，使用启发式方法
-                if toc_end == -1:
-                    toc_end = min(toc_start + 30, len(all_paragraphs))  # 假设目录不超过30段
-                    write_log(f"目录结束(启发式): 第{toc_end}段")
-            
-            write_log(f"目录区域: 第{toc_start}段 到 第{toc_end}段")
-            return toc_start, toc_end
-        
-        def is_toc_item_format(text):
-            """判断是否为目录项格式"""
-            text = text.strip()
-            if not text:
-                return False
-                
-            # 目录项特征：章节编号 + 标题 + 页码
-            # 如："1.1 基本情况 1" 或 "2.1 建设现状 5"
-            toc_patterns = [
-                r'^(\d+(?:\.\d+)*)\s+\S.*\s+(\d+)$',  # 编号 + 标题 + 页码
-                r'^(\d+(?:\.\d+)*)\s+.*\t+(\d+)$',    # 编号 + 标题 + 制表符 + 页码
-                r'^(\d+(?:\.\d+)*)\s+.*\.+\s*(\d+)$', # 编号 + 标题 + 点填充 + 页码
-            ]
-            
-            for pattern in toc_patterns:
-                if re.match(pattern, text):
-                    return True
-            return False
-        
-        # 检查是否为目录项（改进版）
-        def is_table_of_contents(text, index, all_paragraphs, toc_start, toc_end):
-            """判断是否为目录项"""
-            # 如果在目录区域内，且符合目录项格式
-            if toc_start <= index <= toc_end:
-                return is_toc_item_format(text)
-            return False
-        
-        # 首先识别目录区域
-        toc_start, toc_end = find_table_of_contents_area(paragraphs)
-        
-        # 查找目标章节和下一个章节
-        target_chapter_level = parse_chapter_level(chapter)
-        target_start_index = -1
-        target_end_index = len(paragraphs)
-        
-        write_log(f"目标章节 '{chapter}' 的层级: {target_chapter_level}")
-        
-        # 第一遍：查找目标章节的开始位置（只在目录区域之外查找）
-        search_start = max(0, toc_end + 1) if toc_end != -1 else 0
-        write_log(f"从第{search_start}段开始搜索正文章节（跳过目录区域）")
-        
-        for i in range(search_start, len(paragraphs)):
-            para = paragraphs[i]
-            para_text = para['text'].strip()
-            para_style = para['style']
-            
-            # 跳过空段落
-            if not para_text:
-                continue
-            
-            # 跳过目录项（双重保险）
-            if is_table_of_contents(para_text, i, paragraphs, toc_start, toc_end):
-                write_log(f"跳过目录项: 第{i}段 - {para_text[:30]}...")
-                continue
-            
-            # 检查是否为章节标题
-            if is_chapter_title(para_text, para_style):
-                # 提取章节编号
-                chapter_pattern = r'^(\d+(?:\.\d+)*)'
-                match = re.match(chapter_pattern, para_text)
-                if match:
-                    found_chapter = match.group(1)
-                    write_log(f"找到正文章节标题 ({para_style}): {found_chapter} - {para_text[:50]}...")
-                    
-                    # 检查是否为目标章节
-                    if found_chapter == chapter:
-                        target_start_index = i
-                        write_log(f"✅ 找到目标章节开始位置: 第{i}段")
-                        break
-        
-        if target_start_index == -1:
+        if chapter_range is None:
             error_msg = f"未找到章节 '{chapter}'"
             write_log(f"ERROR: {error_msg}")
             return f"ERROR: {error_msg}"
         
-        # 第二遍：查找目标章节的结束位置（下一个同级或更高级章节）
-        for i in range(target_start_index + 1, len(paragraphs)):
-            para_text = paragraphs[i]['text'].strip()
-            para_style = paragraphs[i]['style']
-            
-            # 跳过空段落和目录项
-            if not para_text or is_table_of_contents(para_text, i, paragraphs, toc_start, toc_end):
-                continue
-            
-            # 检查是否为章节标题
-            if is_chapter_title(para_text, para_style):
-                chapter_pattern = r'^(\d+(?:\.\d+)*)'
-                match = re.match(chapter_pattern, para_text)
-                if match:
-                    found_chapter = match.group(1)
-                    found_level = parse_chapter_level(found_chapter)
-                    
-                    # 判断是不是下一个章节
-                    # 如果层级相同或更高（数字更少），则为结束位置
-                    if len(found_level) <= len(target_chapter_level):
-                        # 检查是否为同级的下一个章节或更高级章节
-                        if (len(found_level) == len(target_chapter_level) and 
-                            found_level[:-1] == target_chapter_level[:-1] and 
-                            found_level[-1] > target_chapter_level[-1]) or \
-                           len(found_level) < len(target_chapter_level):
-                            target_end_index = i
-                            write_log(f"✅ 找到章节结束位置: 第{i}段 (下一章节: {found_chapter})")
-                            break
-        
+        target_start_index, target_end_index = chapter_range
         write_log(f"章节范围: 第{target_start_index}段 到 第{target_end_index-1}段")
         
         # 创建文本光标并选择范围
@@ -1041,6 +1806,7 @@ def select_chapter(chapter="2.1"):
         confirmation_msg += f"   内容预览: {selected_text[:100]}{'...' if len(selected_text) > 100 else ''}\n"
         
         text.insertString(text_cursor, confirmation_msg, False)
+        _append_to_chapter_index(model, index, len(confirmation_msg))
         write_log("已在文档末尾插入选择确认消息")
         
         write_log("=== select_chapter() 函数执行完成 ===")
@@ -1779,7 +2545,7 @@ def insert_table(rows=3, columns=3, table_title="", cell_data=None,
                             # 转换为微米单位 (1cm = 10000微米)
                             width_microns = int(width * 10000)
                             col.setPropertyValue("Width", width_microns)
-                            write_log(f"  列{i+1}宽度设置为: {width}cm ({width_microns}微米)")
+                            log_trace("  列%d宽度设置为: %scm (%d微米)", i + 1, width, width_microns)
                     
                     write_log("✅ 列宽设置完成")
                 except Exception as width_error:
@@ -1872,7 +2638,7 @@ def insert_table(rows=3, columns=3, table_title="", cell_data=None,
                         try:
                             cell = table.getCellByName(cell_name.upper())
                             cell.setString(str(cell_value) if cell_value is not None else "")
-                            write_log(f"  填充单元格 {cell_name}: {str(cell_value)[:20]}...")
+                            log_trace("  填充单元格 %s: %.20s...", cell_name, cell_value)
                         except Exception as cell_error:
                             write_log(f"❌ 填充单元格 {cell_name} 失败: {str(cell_error)}")
                 
@@ -1911,7 +2677,7 @@ def insert_table(rows=3, columns=3, table_title="", cell_data=None,
                         # 设置背景色（浅灰色）
                         cell.setPropertyValue("BackColor", 0xF0F0F0)
                         
-                        write_log(f"  表头单元格 {cell_name} 样式设置完成")
+                        log_trace("  表头单元格 %s 样式设置完成", cell_name)
                         
                     except Exception as header_error:
                         write_log(f"❌ 设置表头单元格 {cell_name} 样式失败: {str(header_error)}")
@@ -2328,4 +3094,4 @@ def insert_math(formula="E = m c^2", as_inline=True, base_font_height=12):
 
 # LibreOffice/Collabora CODE 要求导出函数
 # 这是必须的，否则CallPythonScript无法找到函数
-g_exportedScripts = (hello, get_document_content, test_uno_connection, simple_test, debug_params, search_and_format_text, search_and_replace_with_format, select_chapter, insert_text, set_paragraph, insert_title, insert_table, insert_image, insert_math, ) 
\ No newline at end of file
+g_exportedScripts = (hello, get_document_content, get_document_blocks, test_uno_connection, simple_test, debug_params, search_and_format_text, search_and_replace_with_format, select_chapter, get_outline, insert_text, set_paragraph, insert_title, insert_table, insert_image, insert_math, ) 
\ No newline at end of file
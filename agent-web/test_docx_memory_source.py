@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+从内存（bytes / 二进制流）解析模板的测试
+
+- bytes、BytesIO 与文件路径的大纲、章节内容完全一致（两种大纲引擎）
+- 内存模板按内容缓存：相同内容再次解析直接命中缓存，调用方修改章节列表不影响缓存
+- 不支持的输入（文本流、非 doc/docx 内容）给出明确错误
+
+用法:
+  python test_docx_memory_source.py
+"""
+
+import io
+import os
+import tempfile
+
+from from_server_docx_para import DocxParser
+from from_server_docx_outline import DocxOutlineExtractor
+from from_server_docx_cache import get_docx_parse_cache
+from from_server_docx_corpus import build_corpus_docx
+
+
+def test_memory_source_matches_path():
+    """bytes / 二进制流的解析结果与文件路径一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = build_corpus_docx(os.path.join(tmp_dir, "template.docx"), 500, depth=4, numbering='mixed', toc=True)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        for engine in DocxOutlineExtractor.ENGINES:
+            extractor = DocxOutlineExtractor(engine=engine)
+            expected = extractor.extract_outline(path, use_cache=False)
+            assert extractor.extract_outline(data, use_cache=False) == expected
+            assert extractor.extract_outline(io.BytesIO(data), use_cache=False) == expected
+            print(f"✅ {engine}: bytes / BytesIO 大纲与文件路径一致（{len(expected)}个章节）")
+
+        parser = DocxParser(path, use_cache=False)
+        with open(path, 'rb') as f:
+            stream_parser = DocxParser(f, use_cache=False)
+        numbers = [chapter['number'] for chapter in parser.chapters]
+        assert stream_parser.chapters == parser.chapters
+        assert stream_parser.get_chapters(numbers) == parser.get_chapters(numbers)
+        print("✅ DocxParser: 二进制流的章节内容与文件路径一致")
+
+        # 篇幅限制按章节分别计算，结果与逐个调用 get_chapter 相同
+        budgeted = stream_parser.get_chapters(numbers[:5], max_chars=200)
+        assert budgeted == {n: parser.get_chapter(n, max_chars=200) for n in numbers[:5]}
+        assert any(len(content) < len(parser.get_chapter(n)) for n, content in budgeted.items())
+        print("✅ DocxParser: get_chapters 的篇幅限制按章节分别计算")
+
+
+def test_memory_source_cached_by_content():
+    """相同内容的内存模板再次解析时命中缓存"""
+    cache = get_docx_parse_cache()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = build_corpus_docx(os.path.join(tmp_dir, "template.docx"), 300, seed=7)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        DocxParser(data)
+        hits = cache.stats()['hits']
+        parser = DocxParser(bytearray(data))
+        assert cache.stats()['hits'] == hits + 1, "相同内容未命中缓存"
+        assert parser.get_chapter(parser.chapters[0]['number'])
+        print("✅ 相同内容的内存模板命中缓存")
+
+        # 调用方修改章节列表不影响缓存中的解析结果
+        chapters = parser.get_all_chapters()
+        expected = [dict(chapter) for chapter in chapters]
+        chapters.reverse()
+        chapters[0]['number'] = 'modified'
+        parser.chapters[0]['title'] = 'modified'
+        assert DocxParser(data).get_all_chapters() == expected, "修改章节列表影响了缓存"
+        print("✅ 章节列表按实例复制，修改不影响缓存")
+
+
+def test_invalid_inputs():
+    """文本流、非 doc/docx 内容、不存在的路径"""
+    for bad, error in ((io.StringIO("text"), TypeError), (b"not a docx", ValueError),
+                       ("/nonexistent/template.docx", FileNotFoundError)):
+        try:
+            DocxParser(bad, use_cache=False)
+        except error as e:
+            print(f"✅ {type(bad).__name__}: {type(e).__name__}: {e}")
+        else:
+            raise AssertionError(f"{bad!r} 未报错")
+
+
+if __name__ == "__main__":
+    test_memory_source_matches_path()
+    test_memory_source_cached_by_content()
+    test_invalid_inputs()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DocxOutlineExtractor 增量大纲更新测试
+
+- 正确性：修改、插入、删除段落后，增量更新的结果与完整重新提取完全一致
+- 性能：10000段落的模板修改1个段落后，增量更新在毫秒级完成
+- DocxParser：基于上一版本增量更新的章节索引与完整建立一致，修改1个段落后索引更新在毫秒级完成
+
+用法:
+  python test_docx_outline_incremental.py
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+from docx import Document
+
+from from_server_docx_outline import DocxOutlineExtractor
+from from_server_docx_para import DocxParser
+from from_server_docx_corpus import build_corpus_docx
+
+# 10000段落模板修改1个段落后，增量更新（不含读取文档）的耗时上限
+UPDATE_TIME_LIMIT_MS = 100
+
+
+def _edit_docx(src: str, dst: str, edit):
+    """复制文档并用 edit(document) 修改后保存"""
+    doc = Document(src)
+    edit(doc)
+    doc.save(dst)
+    return dst
+
+
+def _assert_same_as_full(extractor: DocxOutlineExtractor, previous: dict, path: str, max_depth: int = 6) -> dict:
+    """增量更新结果必须与完整提取（含不使用状态的原提取流程）一致"""
+    updated = extractor.extract_outline_state(path, max_depth, previous_state=previous)
+    full = extractor.extract_outline_state(path, max_depth)
+
+    assert updated['chapters'] == full['chapters'], f"章节列表不一致: {path}"
+    assert updated['positions'] == full['positions'], f"章节位置不一致: {path}"
+    assert updated['infos'] == full['infos'], f"段落分类结果不一致: {path}"
+    assert updated['system_type'] == full['system_type']
+    assert updated['chapters'] == extractor._extract_outline(path, max_depth)
+    return updated
+
+
+def _body_to_heading(doc):
+    doc.paragraphs[200].text = "9.9.9 新增的章节标题"
+
+
+def _heading_to_body(doc):
+    heading = next(p for p in doc.paragraphs[100:] if p.text[:1].isdigit())
+    heading.text = "原来的标题改成了正文内容。"
+
+
+def _insert_and_delete(doc):
+    doc.paragraphs[300].insert_paragraph_before("7.1 插入的章节")
+    doc.paragraphs[300].insert_paragraph_before("插入的正文段落。")
+    body = doc.paragraphs[500]._element
+    body.getparent().remove(body)
+    doc.paragraphs[-1].text = "99 文档末尾的新章节"
+
+
+def _change_numbering_system(doc):
+    # 前50个段落的编号全部改为中文编号，编号体系由数字体系变为混合体系
+    for i, para in enumerate(doc.paragraphs[:50]):
+        para.text = f"第{i + 1}章 改写后的章节{i}"
+
+
+EDITS = [('body_to_heading', _body_to_heading), ('heading_to_body', _heading_to_body),
+         ('insert_and_delete', _insert_and_delete), ('change_numbering_system', _change_numbering_system)]
+
+
+def _parser_index(parser: DocxParser) -> tuple:
+    """DocxParser 的章节索引（标题匹配、标题位置表、各章节范围）"""
+    return (parser._title_matches, parser._heading_positions, parser._heading_position_levels,
+            parser._heading_position_chapter_indices, parser._boundary_positions,
+            [(s.start, s.end) for s in parser._sections], parser._body_length)
+
+
+def test_incremental_matches_full_extract():
+    """修改、插入、删除段落以及改变编号体系后，增量结果与完整提取一致"""
+    extractor = DocxOutlineExtractor(engine='stream')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base = build_corpus_docx(os.path.join(tmp_dir, "base.docx"), 1000)
+        state = extractor.extract_outline_state(base)
+
+        for name, edit in EDITS:
+            path = _edit_docx(base, os.path.join(tmp_dir, f"{name}.docx"), edit)
+            _assert_same_as_full(extractor, state, path)
+            print(f"✅ {name}: 增量结果与完整提取一致")
+
+
+def test_parser_index_matches_full_rebuild():
+    """DocxParser 基于上一版本增量更新的章节索引与完整建立一致；经缓存重新加载修改后的模板也走增量路径"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base = build_corpus_docx(os.path.join(tmp_dir, "base.docx"), 1000, toc=True)
+        previous = DocxParser(base, use_cache=False)._index_state()
+
+        for name, edit in EDITS:
+            path = _edit_docx(base, os.path.join(tmp_dir, f"{name}.docx"), edit)
+            full = DocxParser(path, use_cache=False)
+            parser = DocxParser(path, use_cache=False)
+            parser._build_section_index(previous)
+
+            numbers = [chapter['number'] for chapter in full.chapters]
+            assert _parser_index(parser) == _parser_index(full), f"章节索引不一致: {name}"
+            assert parser.get_chapters(numbers) == full.get_chapters(numbers)
+            print(f"✅ DocxParser {name}: 增量更新的章节索引与完整建立一致")
+
+        # 同一路径的模板被修改后重新加载：以进程内缓存中上一版本的索引为基础
+        path = shutil.copy(base, os.path.join(tmp_dir, "template.docx"))
+        DocxParser(path)
+        _edit_docx(path, path, _insert_and_delete)
+
+        calls = []
+        update = DocxParser._update_title_matches
+        DocxParser._update_title_matches = lambda self, prev: calls.append(1) or update(self, prev)
+        try:
+            reloaded = DocxParser(path)
+        finally:
+            DocxParser._update_title_matches = update
+
+        full = DocxParser(path, use_cache=False)
+        numbers = [chapter['number'] for chapter in full.chapters]
+        assert calls, "修改后的模板没有走增量更新"
+        assert _parser_index(reloaded) == _parser_index(full)
+        assert reloaded.get_chapters(numbers) == full.get_chapters(numbers)
+        print("✅ DocxParser: 修改后的模板经缓存重新加载，增量更新索引与完整解析一致")
+
+
+def test_single_edit_update_time():
+    """10000段落模板修改1个段落，增量更新在毫秒级完成"""
+    extractor = DocxOutlineExtractor(engine='stream')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base = build_corpus_docx(os.path.join(tmp_dir, "base.docx"), 10000)
+        state = extractor.extract_outline_state(base)
+
+        def edit(doc):
+            doc.paragraphs[5000].text = "5.5 修改后的章节标题"
+
+        path = _edit_docx(base, os.path.join(tmp_dir, "edited.docx"), edit)
+        paragraphs = list(extractor._iter_paragraphs(path))
+
+        start = time.perf_counter()
+        updated = extractor.update_outline_state(state, paragraphs)
+        update_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        full = extractor.extract_outline_state(path)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        assert updated['chapters'] == full['chapters']
+        assert update_ms < UPDATE_TIME_LIMIT_MS, f"增量更新耗时 {update_ms:.1f}ms"
+        print(f"✅ {len(paragraphs)}段落修改1段：增量更新 {update_ms:.1f}ms，完整提取 {full_ms:.1f}ms")
+
+def test_parser_single_edit_reload_time():
+    """10000段落模板修改1个段落：DocxParser 章节索引增量更新在毫秒级完成，并给出整体重新加载的耗时"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = build_corpus_docx(os.path.join(tmp_dir, "template.docx"), 10000)
+        previous = DocxParser(path)._index_state()
+
+        def edit(doc):
+            doc.paragraphs[5000].text = "5.5 修改后的章节标题"
+
+        _edit_docx(path, path, edit)
+
+        # 整体重新加载（含读取文档主体、增量更新大纲和章节索引）
+        start = time.perf_counter()
+        reloaded = DocxParser(path)
+        reload_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        full = DocxParser(path, use_cache=False)
+        full_reload_ms = (time.perf_counter() - start) * 1000
+
+        # 只计章节索引：增量更新与完整建立
+        start = time.perf_counter()
+        full._build_section_index(previous)
+        update_ms = (time.perf_counter() - start) * 1000
+        updated_index = _parser_index(full)
+
+        start = time.perf_counter()
+        full._build_section_index()
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        assert updated_index == _parser_index(full) == _parser_index(reloaded)
+        assert update_ms < UPDATE_TIME_LIMIT_MS, f"章节索引增量更新耗时 {update_ms:.1f}ms"
+        print(f"✅ DocxParser {full._body_length}段落修改1段：章节索引增量更新 {update_ms:.1f}ms，"
+              f"完整建立 {rebuild_ms:.1f}ms；重新加载 {reload_ms:.1f}ms，不使用缓存完整解析 {full_reload_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_extract()
+    test_parser_index_matches_full_rebuild()
+    test_single_edit_update_time()
+    test_parser_single_edit_reload_time()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+段落大纲级别解析测试（styleId -> 大纲级别 样式表）
+
+- 内置标题样式、w:basedOn 继承、样式上的 w:outlineLvl、段落上直接设置的 w:outlineLvl
+- 正文文本级别（w:val=9）、basedOn 循环引用
+- docx / stream 两种引擎结果一致
+
+用法:
+  python test_docx_outline_levels.py
+"""
+
+import os
+import copy
+import tempfile
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from from_server_docx_outline import DocxOutlineExtractor
+
+
+def _set_outline_level(element, value: int):
+    """在段落或样式的 w:pPr 中设置 w:outlineLvl"""
+    outline = OxmlElement('w:outlineLvl')
+    outline.set(qn('w:val'), str(value))
+    element.get_or_add_pPr().append(outline)
+
+
+def _add_style(doc, name: str, base: str = None, outline_level: int = None):
+    """添加自定义段落样式"""
+    style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+    if base:
+        style.base_style = doc.styles[base]
+    if outline_level is not None:
+        _set_outline_level(style.element, outline_level)
+    return style
+
+
+def build_levels_docx(path: str) -> dict:
+    """
+    生成覆盖各种大纲级别来源的文档
+
+    Returns:
+        段落文本 -> 期望的大纲级别
+    """
+    doc = Document()
+    _add_style(doc, 'Custom Title', base='Heading 2')  # 继承 Heading 2 的 outlineLvl=1
+    _add_style(doc, 'Deep Custom', base='Custom Title')  # 两级继承
+    _add_style(doc, 'Level Four', outline_level=3)  # 样式自身设置
+    _add_style(doc, 'Body Heading', base='Heading 1', outline_level=9)  # 正文文本级别覆盖继承
+    loop_a = _add_style(doc, 'Loop A')
+    loop_b = _add_style(doc, 'Loop B', base='Loop A')
+    loop_a.base_style = loop_b  # 循环引用
+
+    expected = {}
+
+    def add(text, style=None, direct=None, level=None):
+        para = doc.add_paragraph(text, style=style)
+        if direct is not None:
+            _set_outline_level(para._p, direct)
+        expected[text] = level
+
+    add("内置一级标题", 'Heading 1', level=1)
+    add("内置三级标题", 'Heading 3', level=3)
+    add("继承二级", 'Custom Title', level=2)
+    add("两级继承", 'Deep Custom', level=2)
+    add("样式四级", 'Level Four', level=4)
+    add("正文级别样式", 'Body Heading', level=None)
+    add("循环引用样式", 'Loop B', level=None)
+    add("普通正文", level=None)
+    add("直接设置一级", direct=0, level=1)
+    add("直接设置覆盖样式", 'Heading 1', direct=4, level=5)
+    add("直接设置正文级别", 'Heading 2', direct=9, level=None)
+    add("目录标题", 'TOC Heading', level=None)
+
+    # 重复的 styleId 以第一个为准
+    heading_1 = doc.styles['Heading 1'].element
+    duplicate = copy.deepcopy(heading_1)
+    duplicate.find(qn('w:pPr')).find(qn('w:outlineLvl')).set(qn('w:val'), '6')
+    heading_1.getparent().append(duplicate)
+
+    doc.save(path)
+    return expected
+
+
+def test_outline_levels():
+    """两种引擎对各种来源的大纲级别解析结果与 Word 规则一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "levels.docx")
+        expected = build_levels_docx(path)
+
+        results = {}
+        for engine in DocxOutlineExtractor.ENGINES:
+            paragraphs = list(DocxOutlineExtractor(engine=engine)._iter_paragraphs(path))
+            levels = {para['text']: para['level'] for para in paragraphs}
+            assert levels == expected, f"{engine}: {levels}"
+            results[engine] = paragraphs
+            print(f"✅ {engine}: {len(levels)}个段落的大纲级别正确")
+
+        assert results['docx'] == results['stream'], "两种引擎结果不一致"
+        print("✅ docx / stream 引擎的样式名与大纲级别一致")
+
+
+if __name__ == "__main__":
+    test_outline_levels()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DocxParser 内存占用测试
+
+- 解析完成后不再持有 python-docx 的 Document / lxml 元素（段落记录只保存文本、样式ID和表格网格）
+- 峰值内存与常驻内存：常驻内存应明显低于同时持有 Document 时的水平
+
+每个场景在独立进程中运行，互不影响峰值RSS。
+
+用法:
+  python test_docx_parser_memory.py
+"""
+
+import os
+import gc
+import ctypes
+import tempfile
+import multiprocessing
+
+from from_server_docx_bench import peak_rss_mb
+from from_server_docx_corpus import build_corpus_docx
+
+# 测试文档段落数
+PARAGRAPH_COUNT = 5000
+
+# 释放文档后常驻内存至少比持有文档时低的比例
+MIN_STEADY_SAVING = 0.3
+
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存（MB），先回收垃圾并把空闲堆内存归还系统"""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure(path: str, keep_document: bool, queue):
+    """加载 DocxParser 并读取章节，返回 (峰值RSS增量, 常驻RSS增量, 残留的lxml元素数)"""
+    from docx import Document
+    from lxml import etree
+    from from_server_docx_para import DocxParser
+
+    baseline = current_rss_mb()
+    peak_before = peak_rss_mb()
+
+    parser = DocxParser(path, use_cache=False)
+    # 模拟旧实现：段落信息引用 python-docx 对象，整棵树随解析器常驻
+    retained = Document(path) if keep_document else None
+    for chapter in parser.chapters[:20]:
+        parser.get_chapter(chapter['number'])
+
+    steady = current_rss_mb() - baseline
+    peak = peak_rss_mb() - peak_before
+    leaked = sum(1 for obj in gc.get_objects() if isinstance(obj, etree._Element)) if not keep_document else -1
+    queue.put((peak, steady, leaked, len(parser.paragraphs)))
+    del retained
+
+
+def _run(path: str, keep_document: bool):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(path, keep_document, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def test_document_released_after_indexing():
+    """解析器常驻内存只包含段落记录，不含 lxml 树"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = build_corpus_docx(os.path.join(tmp_dir, "memory.docx"), PARAGRAPH_COUNT, depth=3, toc=True)
+
+        peak, steady, leaked, count = _run(path, keep_document=False)
+        _, retained_steady, _, _ = _run(path, keep_document=True)
+
+        print(f"{count}个body元素: 峰值RSS增量 {peak:.1f}MB，常驻RSS增量 {steady:.1f}MB，"
+              f"持有Document时常驻 {retained_steady:.1f}MB")
+
+        assert leaked == 0, f"解析后仍有 {leaked} 个 lxml 元素存活"
+        assert steady < retained_steady * (1 - MIN_STEADY_SAVING), \
+            f"常驻内存 {steady:.1f}MB 未明显低于持有文档时的 {retained_steady:.1f}MB"
+        print("✅ 解析完成后 Document 已释放")
+
+
+if __name__ == "__main__":
+    test_document_released_after_indexing()